@@ -1,9 +1,21 @@
 import os
 import re
 
+from utils.sign_archive import SignArchive
+from utils.sign_store import archive_is_current
+
+def available_signs(sigml_dir, archive_path):
+    """Sign names from the packed archive when it is current, else from the directory"""
+    if archive_is_current(archive_path, sigml_dir):
+        archive = SignArchive(archive_path)
+        for name in archive.verify():
+            print(f"ERROR: '{name}' in {archive_path} fails its hash check.")
+        return {name.lower() for name in archive.names}
+    return {f[:-6].lower() for f in os.listdir(sigml_dir) if f.endswith('.sigml')}
+
 def audit():
     sigml_dir = 'static/SignFiles'
-    available_files = {f[:-6].lower() for f in os.listdir(sigml_dir) if f.endswith('.sigml')}
+    available_files = available_signs(sigml_dir, os.getenv("SIGN_ARCHIVE", 'signs.pack'))
     
     with open('main.py', 'r', encoding='utf-8') as f:
         content = f.read()
@@ -0,0 +1,132 @@
+"""
+Benchmark formula handling: expand_formulas() and the exact physics/context
+lookups of analyze_input() and /explain, using the startup FormulaIndex versus
+the previous per-call loops (one regex compile per chemical formula, a
+normalize-and-scan over PHYSICS_FORMULAS). Outputs must be identical.
+
+The corpus is every known formula in typed variants (case, spaces, carets,
+superscripts), chemistry embedded in sentences, test_chapter.txt sentences and
+random strings built from formula fragments.
+
+    python bench_formulas.py [--random 5000] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import re
+import time
+
+# Formula handling never calls Groq, but main.py needs a key to import
+os.environ.setdefault("GROQ_API_KEY", "unused")
+import main
+from main import CHEM_FORMULAS, FORMULA_CONTEXT, GREEK_LETTERS, PHYSICS_FORMULAS
+
+
+def legacy_expand_formulas(text):
+    """The formula steps of preprocess_math before FormulaIndex"""
+    text_lower = text.lower().replace(' ', '')
+    text_lower_no_caret = text_lower.replace('^', '')
+    for formula, expansion in PHYSICS_FORMULAS.items():
+        formula_clean = formula.replace(' ', '').replace('^', '')
+        if formula_clean in text_lower_no_caret:
+            pattern = re.compile(re.escape(formula).replace(r'\^', r'\^?'), re.IGNORECASE)
+            return pattern.sub(expansion, text), True
+
+    for formula, expansion in CHEM_FORMULAS.items():
+        pattern = re.compile(r'\b' + re.escape(formula) + r'\b', re.IGNORECASE)
+        text = pattern.sub(expansion, text)
+    return text, False
+
+
+def legacy_physics_exact(text_key):
+    """analyze_input's physics bypass before FormulaIndex"""
+    input_normalized = text_key.replace('^', '').replace('²', '2').replace('³', '3')
+    for formula, expansion in PHYSICS_FORMULAS.items():
+        formula_normalized = formula.replace('^', '').replace('²', '2').replace('³', '3').replace(' ', '')
+        if input_normalized == formula_normalized:
+            for ctx_key in FORMULA_CONTEXT:
+                if ctx_key.replace(' ', '') == formula_normalized:
+                    return expansion, ctx_key
+            return expansion, None
+    return None
+
+
+def legacy_find_formula_context(formula_input):
+    target = re.sub(r'\s+', '', formula_input).lower()
+    for key, context in FORMULA_CONTEXT.items():
+        if re.sub(r'\s+', '', key).lower() == target or re.sub(r'\s+', '', context['name']).lower() == target:
+            return key
+    return None
+
+
+def variants(formula):
+    yield formula
+    yield formula.upper()
+    yield formula.replace('=', ' = ')
+    yield formula.replace('2', '^2')
+    yield formula.replace('2', '²').replace('3', '³')
+    yield formula.replace('^', '')
+
+
+def corpus(n_random, seed=7):
+    rng = random.Random(seed)
+    texts = []
+    for formula in list(PHYSICS_FORMULAS) + list(CHEM_FORMULAS) + list(FORMULA_CONTEXT):
+        texts.extend(variants(formula))
+    texts.extend(c['name'] for c in FORMULA_CONTEXT.values())
+    for formula in CHEM_FORMULAS:
+        texts.append(f"When {formula} reacts with {rng.choice(list(CHEM_FORMULAS)).upper()} we get heat")
+    with open('test_chapter.txt', 'r', encoding='utf-8') as f:
+        texts.extend(s.strip() for s in re.split(r'(?<=[.!?])\s+', f.read()) if s.strip())
+
+    fragments = list(CHEM_FORMULAS) + list(PHYSICS_FORMULAS) + list(GREEK_LETTERS) + [
+        ' ', ' ', '=', '+', '-', '^', '(', ')', '²', '₂', 'x', '3', '12', 'the', 'CO', 'Na', 'of']
+    for _ in range(n_random):
+        texts.append(''.join(rng.choice(fragments) for _ in range(rng.randint(1, 6))))
+    return texts
+
+
+def timed(fn, texts, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in texts:
+            fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def report(label, old, new, n, same):
+    print(f"\n--- {label}: {n} inputs ---")
+    print(f"per-call loops : {old * 1000:9.1f} ms  ({old / n * 1e6:7.2f} us/input)")
+    print(f"FormulaIndex   : {new * 1000:9.1f} ms  ({new / n * 1e6:7.2f} us/input)")
+    print(f"Speedup        : {old / new:9.1f}x")
+    print(f"Identical output: {same}")
+    return same
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark formula lookup and preprocess_math")
+    parser.add_argument('--random', type=int, default=5000, help="random fragment strings to add")
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    texts = corpus(args.random)
+    keys = [t.lower().replace(' ', '') for t in texts]
+    ok = True
+
+    mismatches = [t for t in texts if legacy_expand_formulas(t) != main.expand_formulas(t)]
+    for t in mismatches[:5]:
+        print(f"[MISMATCH] {t!r}: {legacy_expand_formulas(t)!r} != {main.expand_formulas(t)!r}")
+    ok &= report("expand_formulas (preprocess_math)", timed(legacy_expand_formulas, texts, args.repeat),
+                 timed(main.expand_formulas, texts, args.repeat), len(texts), not mismatches)
+
+    same = all(legacy_physics_exact(k) == main.formula_index.physics_exact(k) for k in keys)
+    ok &= report("physics exact match (analyze_input)", timed(legacy_physics_exact, keys, args.repeat),
+                 timed(main.formula_index.physics_exact, keys, args.repeat), len(keys), same)
+
+    same = all(legacy_find_formula_context(t) == main.find_formula_context(t) for t in texts)
+    ok &= report("find_formula_context (/explain)", timed(legacy_find_formula_context, texts, args.repeat),
+                 timed(main.find_formula_context, texts, args.repeat), len(texts), same)
+
+    raise SystemExit(0 if ok else 1)
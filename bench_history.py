@@ -0,0 +1,139 @@
+"""
+Benchmark the translation history store against the old history.json rewrite.
+
+1. Request path: time spent in save_to_history() per translation with a full
+   (50 entry) history. The old code parsed and rewrote the whole file; the
+   store only queues the entry.
+2. Concurrent workers: several processes save entries at the same time, as
+   gunicorn workers do. The old load-modify-write loses entries whenever two
+   workers overlap; every entry should reach the SQLite store.
+3. Compaction of a large table down to the retained entries.
+
+    python bench_history.py [--workers 4] [--entries 200]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from utils.history_store import HistoryStore
+
+
+def json_save(path, entry, keep):
+    """save_to_history() as it was: parse, prepend, truncate, rewrite"""
+    history = []
+    if os.path.exists(path):
+        try:
+            with open(path, 'r') as f:
+                history = json.load(f)
+        except Exception:
+            history = []
+    history.insert(0, entry)
+    history = history[:keep]
+    with open(path, 'w') as f:
+        json.dump(history, f, indent=2)
+
+
+def sample_entry(worker, i):
+    return {
+        "input": f"worker {worker} sentence {i}: the cat drinks milk every morning",
+        "language": "isl",
+        "gloss": "CAT MILK DRINK MORNING EVERY",
+        "display": "CAT MILK DRINK MORNING EVERY",
+        "timestamp": "2026-01-01T00:00:00",
+    }
+
+
+def percentile(values, p):
+    return sorted(values)[min(len(values) - 1, int(len(values) * p))]
+
+
+def request_path(work, count):
+    path = os.path.join(work, 'history.json')
+    for i in range(50):
+        json_save(path, sample_entry(0, i), 50)
+    before = []
+    for i in range(count):
+        start = time.perf_counter()
+        json_save(path, sample_entry(0, i), 50)
+        before.append(time.perf_counter() - start)
+
+    store = HistoryStore(os.path.join(work, 'history.db'), keep=50)
+    after = []
+    for i in range(count):
+        start = time.perf_counter()
+        store.add(sample_entry(0, i))
+        after.append(time.perf_counter() - start)
+    store.flush()
+    return before, after, store.stats()
+
+
+def json_worker(path, worker, entries):
+    for i in range(entries):
+        json_save(path, sample_entry(worker, i), 1 << 30)
+
+
+def store_worker(path, worker, entries):
+    store = HistoryStore(path, keep=1 << 30)
+    for i in range(entries):
+        store.add(sample_entry(worker, i))
+    store.flush(timeout=30)
+
+
+def run_workers(target, path, workers, entries):
+    procs = [multiprocessing.Process(target=target, args=(path, w, entries)) for w in range(workers)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the translation history store")
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--entries', type=int, default=200)
+    args = parser.parse_args()
+
+    work = tempfile.mkdtemp()
+    try:
+        before, after, stats = request_path(work, args.entries)
+        print(f"--- request path, {args.entries} saves into a 50-entry history ---")
+        for label, times in (("json rewrite", before), ("write-behind", after)):
+            print(f"{label:13}: mean {statistics.mean(times) * 1e6:8.1f} us  "
+                  f"p99 {percentile(times, 0.99) * 1e6:8.1f} us")
+        print(f"Speedup      : {statistics.mean(before) / statistics.mean(after):.0f}x  "
+              f"(writer batches: last {stats['last_batch_ms']} ms, {stats['written']} written)")
+
+        expected = args.workers * args.entries
+        print(f"\n--- {args.workers} workers x {args.entries} saves ---")
+        path = os.path.join(work, 'concurrent.json')
+        run_workers(json_worker, path, args.workers, args.entries)
+        try:
+            with open(path, 'r') as f:
+                kept = len(json.load(f))
+        except ValueError:
+            kept = 0  # Two writers interleaved and left invalid JSON
+        print(f"json rewrite : {kept:6} of {expected} entries kept  ({expected - kept} lost)")
+        path = os.path.join(work, 'concurrent.db')
+        HistoryStore(path)  # Create the table before the workers race to
+        run_workers(store_worker, path, args.workers, args.entries)
+        kept = sqlite3.connect(path).execute("SELECT COUNT(*) FROM history").fetchone()[0]
+        print(f"write-behind : {kept:6} of {expected} entries kept  ({expected - kept} lost)")
+
+        # A burst this size would overflow the default queue; size it to keep every row
+        store = HistoryStore(os.path.join(work, 'compact.db'), keep=50, max_pending=20000)
+        for i in range(20000):
+            store.add(sample_entry(0, i))
+        store.flush(timeout=60)
+        start = time.perf_counter()
+        removed = store.compact()
+        print(f"\n--- compaction ---")
+        print(f"{store.stats()['written']} rows -> {len(store.recent())}: {removed} deleted in "
+              f"{(time.perf_counter() - start) * 1000:.1f} ms")
+    finally:
+        shutil.rmtree(work)
@@ -0,0 +1,225 @@
+"""
+Golden-output check and throughput benchmark for preprocess_math().
+
+1. Every input in math_gloss_golden.json must verbalize to its recorded
+   output. After an intended change, review the diff and re-record with
+   --update.
+2. Throughput of the single-pass MathVerbalizer (cold, then memoized) versus
+   the previous chain of regex/replace passes, on the golden inputs,
+   test_chapter.txt sentences and random expressions.
+3. Numeric-heavy science text: signs produced and number conversions
+   computed, before and after the table-driven NumberWords, for the whole
+   sentences and for their numbers alone.
+
+    python bench_math_gloss.py [--update] [--random 2000] [--repeat 5]
+"""
+import argparse
+import json
+import os
+import random
+import re
+import time
+
+# Verbalizing never calls Groq, but main.py needs a key to import
+os.environ.setdefault("GROQ_API_KEY", "unused")
+import main
+from main import GREEK_LETTERS, MATH_OPS
+
+GOLDEN_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'math_gloss_golden.json')
+
+
+NUM_WORDS = {
+    '0': 'ZERO', '1': 'ONE', '2': 'TWO', '3': 'THREE', '4': 'FOUR',
+    '5': 'FIVE', '6': 'SIX', '7': 'SEVEN', '8': 'EIGHT', '9': 'NINE',
+    '10': 'TEN', '11': 'ELEVEN', '12': 'TWELVE', '13': 'THIRTEEN',
+    '14': 'FOURTEEN', '15': 'FIFTEEN', '16': 'SIXTEEN', '17': 'SEVENTEEN',
+    '18': 'EIGHTEEN', '19': 'NINETEEN', '20': 'TWENTY', '30': 'THIRTY',
+    '40': 'FORTY', '50': 'FIFTY', '60': 'SIXTY', '70': 'SEVENTY',
+    '80': 'EIGHTY', '90': 'NINETY', '100': 'HUNDRED', '1000': 'THOUSAND',
+}
+legacy_calls = [0]
+
+
+def number_to_words(num_str):
+    """number_to_words before the table-driven NumberWords"""
+    legacy_calls[0] += 1
+    if num_str in NUM_WORDS:
+        return NUM_WORDS[num_str]
+    try:
+        num = int(num_str)
+        if num < 0:
+            return 'MINUS ' + number_to_words(str(abs(num)))
+        if num <= 20:
+            return NUM_WORDS.get(str(num), ' '.join(NUM_WORDS.get(d, d) for d in num_str))
+        if num < 100:
+            tens, ones = (num // 10) * 10, num % 10
+            if ones == 0:
+                return NUM_WORDS.get(str(tens), str(num))
+            return NUM_WORDS.get(str(tens), '') + ' ' + NUM_WORDS.get(str(ones), '')
+        if num < 1000:
+            result = NUM_WORDS[str(num // 100)] + ' HUNDRED'
+            if num % 100 > 0:
+                result += ' ' + number_to_words(str(num % 100))
+            return result
+        return ' '.join(NUM_WORDS.get(d, d) for d in num_str)
+    except ValueError:
+        if '.' in num_str:
+            parts = num_str.split('.')
+            return number_to_words(parts[0]) + ' POINT ' + ' '.join(NUM_WORDS.get(d, d) for d in parts[1])
+        return ' '.join(NUM_WORDS.get(d, d) for d in num_str)
+
+
+def legacy_preprocess_math(text):
+    """preprocess_math before the single-pass verbalizer and NumberWords"""
+    text, done = main.expand_formulas(text)
+    if done:
+        return text
+    for greek, word in GREEK_LETTERS.items():
+        text = text.replace(greek, f' {word} ')
+    for sub, digit in zip('₀₁₂₃₄₅₆₇₈₉', '0123456789'):
+        text = text.replace(sub, digit)
+
+    def expand_coefficients(match):
+        return f" {number_to_words(match.group(1))} {' '.join(list(match.group(2).upper()))} "
+
+    text = re.sub(r'(\d+)([a-zA-Z]+)', expand_coefficients, text)
+
+    def expand_exponents(match):
+        base, exp = match.group(1), match.group(2)
+        if base.isalpha():
+            base = base.upper()
+        if exp == '2':
+            word = "SQUARE"
+        elif exp == '3':
+            word = "CUBE"
+        else:
+            word = f"POWER {number_to_words(exp)}"
+        return f" {base} {word} "
+
+    text = re.sub(r'([a-zA-Z]|\))(\d+)', expand_exponents, text)
+    text = re.sub(r'\b[a-z]\b', lambda m: m.group(0).upper(), text)
+    for op, word in sorted(MATH_OPS.items(), key=lambda x: -len(x[0])):
+        text = text.replace(op, f' {word} ')
+    text = re.sub(r'\b\d+\.?\d*\b', lambda m: ' ' + number_to_words(m.group(0)) + ' ', text)
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+NUMERIC_SENTENCES = [
+    "The speed of light is 299,792,458 m/s.",
+    "Avogadro's number is 6.02e23 particles per mole.",
+    "Water boils at 100 °C and freezes at 0 °C.",
+    "A car travelling at 72 km/h covers 1200 meters in 60 seconds.",
+    "The Earth is about 4.54e9 years old and 149,600,000 km from the Sun.",
+    "In 1905 Einstein published 4 papers.",
+    "The 3rd planet has a gravity of 9.81 m/s².",
+    "A 2 kg mass needs 19.6 newtons to lift it.",
+    "The experiment was repeated 25 times between 2019 and 2024.",
+    "The atom has 47 protons and 61 neutrons.",
+]
+
+
+# The number strings of NUMERIC_SENTENCES, as the tokenizer sees them
+NUMERIC_TOKEN_RE = re.compile(r'\d{1,3}(?:,\d{3})+|\d+(?:st|nd|rd|th)|\d+(?:\.\d+)?(?:e\d+)?')
+
+
+def gloss_tokens(text):
+    """Words as the matcher would see them, without punctuation"""
+    return [w for w in (t.strip('.,;:!?') for t in text.split()) if w]
+
+
+def load_golden():
+    with open(GOLDEN_FILE, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def check_golden(update=False):
+    golden = load_golden()
+    failures = 0
+    for case in golden:
+        got = main.preprocess_math(case["input"])
+        if got != case["output"]:
+            failures += 1
+            print(f"[GOLDEN] {case['input']!r}\n   expected {case['output']!r}\n   got      {got!r}")
+            case["output"] = got
+    if update and failures:
+        with open(GOLDEN_FILE, 'w', encoding='utf-8') as f:
+            json.dump(golden, f, indent=1, ensure_ascii=False)
+            f.write("\n")
+        print(f"[GOLDEN] Re-recorded {failures} outputs in {GOLDEN_FILE}")
+        return True
+    print(f"[GOLDEN] {len(golden) - failures}/{len(golden)} cases match")
+    return failures == 0
+
+
+def corpus(n_random, seed=11):
+    rng = random.Random(seed)
+    texts = [case["input"] for case in load_golden()]
+    with open('test_chapter.txt', 'r', encoding='utf-8') as f:
+        texts.extend(s.strip() for s in re.split(r'(?<=[.!?])\s+', f.read()) if s.strip())
+    atoms = ['x', 'y', 'a', 'b', '2', '3', '10', '3.5', 'π', 'θ', 'x₁', '(a+b)', 'sin(x)']
+    ops = ['+', '-', '*', '/', '=', '^2', '²', ' >= ', '√']
+    for _ in range(n_random):
+        parts = [rng.choice(atoms)]
+        for _ in range(rng.randint(1, 8)):
+            parts += [rng.choice(ops), rng.choice(atoms)]
+        texts.append(''.join(parts))
+    return texts
+
+
+def timed(fn, texts, repeat, before=None):
+    best = float('inf')
+    for _ in range(repeat):
+        if before:
+            before()
+        start = time.perf_counter()
+        for text in texts:
+            fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check and benchmark preprocess_math")
+    parser.add_argument('--update', action='store_true', help="re-record golden outputs that changed")
+    parser.add_argument('--random', type=int, default=2000, help="random expressions to add")
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    ok = check_golden(update=args.update)
+
+    texts = corpus(args.random)
+    n = len(texts)
+
+    def clear():
+        main.preprocess_math.cache_clear()
+        main.math_verbalizer.clear()
+
+    legacy = timed(legacy_preprocess_math, texts, args.repeat)
+    cold = timed(main.preprocess_math, texts, args.repeat, before=clear)
+    warm = timed(main.preprocess_math, texts, args.repeat)
+
+    print(f"\n--- preprocess_math on {n} inputs (best of {args.repeat}) ---")
+    print(f"regex passes   : {legacy * 1000:9.1f} ms  ({legacy / n * 1e6:7.2f} us/input)")
+    print(f"single pass    : {cold * 1000:9.1f} ms  ({cold / n * 1e6:7.2f} us/input)  {legacy / cold:5.1f}x")
+    print(f"memoized       : {warm * 1000:9.1f} ms  ({warm / n * 1e6:7.2f} us/input)  {legacy / warm:5.1f}x")
+
+    science = [s for s in NUMERIC_SENTENCES for _ in range(20)]
+    main.print = lambda *a, **k: None
+    legacy_calls[0] = 0
+    main.number_words.say.cache_clear()
+    old_signs = sum(len(main.match_to_sigml(gloss_tokens(legacy_preprocess_math(t)))) for t in science)
+    clear()
+    new_signs = sum(len(main.match_to_sigml(gloss_tokens(main.preprocess_math(t)))) for t in science)
+    print(f"\n--- numeric science text: {len(science)} sentences ---")
+    print(f"signs          : {old_signs} before, {new_signs} after ({new_signs / old_signs:.0%})")
+    print(f"number calls   : {legacy_calls[0]} before, {main.number_words.stats()['misses']} computed after")
+
+    numbers = [n for t in science for n in NUMERIC_TOKEN_RE.findall(t)]
+    old_number_signs = sum(len(main.match_to_sigml(gloss_tokens(legacy_preprocess_math(n)))) for n in numbers)
+    new_number_signs = sum(len(main.match_to_sigml(gloss_tokens(main.preprocess_math(n)))) for n in numbers)
+    print(f"numbers only   : {old_number_signs} before, {new_number_signs} after "
+          f"({new_number_signs / old_number_signs:.0%}, {len(numbers)} numbers)")
+    print("The extra signs are the parts the old text lost: scale words (MILLION) and")
+    print("exponents (TIMES 10 POWER), and unit names (METER PER SECOND) fingerspelled")
+    print("where the old text kept the bare symbol.")
+    raise SystemExit(0 if ok else 1)
@@ -0,0 +1,237 @@
+"""
+Check and benchmark SIGML matching.
+
+0. Every gloss in sign_match_golden.json must match its recorded signs: real
+   words without a sign are fingerspelled rather than "corrected", and letter
+   or number tokens never form a handshape-name phrase. After an intended
+   change, review the diff and re-record with --update.
+1. Cost of match_to_sigml with the in-memory SignIndex versus the same
+   matcher with every lookup done by os.path.exists(), as before SignIndex,
+   for one call on glosses of 1 to 20000 tokens. Both sides run identical
+   matching and must give identical output. The gloss stream mixes vocabulary
+   words, synonyms, suffixed forms and unknown words that fall through to
+   fingerspelling.
+2. Whole-document matching: build_sigml_dict per sentence on its own versus
+   one new_match_memo() per document, build_sigml_dicts over packed-batch
+   groups as /stream does, and build_sigml_dicts over the whole document as
+   the explain bundles do. The text is test_chapter.txt-style, scaled to
+   textbook size and glossed offline with the rule engine. Outputs must be
+   identical. Times are for the whole document.
+
+    python bench_sigml_match.py [--update] [--tokens 20000] [--sentences 5000] [--repeat 5]
+"""
+import argparse
+import json
+import os
+import random
+import time
+
+# Matching never calls Groq, but main.py needs a key to import
+os.environ.setdefault("GROQ_API_KEY", "unused")
+import main
+from utils.rule_gloss import rule_gloss
+
+SIGN_DIR = os.path.join("static", "SignFiles")
+GOLDEN_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sign_match_golden.json')
+
+
+class StatSignIndex:
+    """SignIndex's lookups done the way the matcher did them before it: a stat()
+    per candidate file on every lookup. Swapped in for main.sign_index, so both
+    sides of the comparison run the same matching (phrases, synonyms,
+    inflections, fuzzy correction, fingerspelling)."""
+
+    def __init__(self, index):
+        self.valid_words = index.valid_words
+        self.synonyms = index.synonyms
+        self.inflections = index.inflections
+
+    @staticmethod
+    def _exists(stem):
+        return os.path.exists(os.path.join(SIGN_DIR, f"{stem}.sigml"))
+
+    def _resolve(self, token):
+        if token in self.valid_words and self._exists(token):
+            return token
+        syn = self.synonyms.get(token)
+        if syn and syn in self.valid_words and self._exists(syn):
+            return syn
+        return None
+
+    def lookup(self, word):
+        token = word.lower()
+        stem = self._resolve(token)
+        if stem is None and token in self.inflections:
+            stem = self._resolve(self.inflections[token])
+        return stem
+
+    def file_for(self, name):
+        for stem in dict.fromkeys((name, name.lower(), name.upper())):
+            if self._exists(stem):
+                return stem
+        return None
+
+    def refresh(self, force=False):
+        return False
+
+
+def with_stat_index(fn):
+    """fn, run with every sign lookup going to disk"""
+    def run(*args):
+        index = main.sign_index
+        main.sign_index = StatSignIndex(index)
+        try:
+            return fn(*args)
+        finally:
+            main.sign_index = index
+    return run
+
+
+def check_golden(update=False):
+    with open(GOLDEN_FILE, 'r', encoding='utf-8') as f:
+        golden = json.load(f)
+    failures = 0
+    for case in golden:
+        got = main.match_to_sigml(case["gloss"].split())
+        if got != case["signs"]:
+            failures += 1
+            print(f"[GOLDEN] {case['gloss']!r}\n   expected {case['signs']!r}\n   got      {got!r}")
+            case["signs"] = got
+    if update and failures:
+        with open(GOLDEN_FILE, 'w', encoding='utf-8') as f:
+            json.dump(golden, f, indent=1, ensure_ascii=False)
+            f.write("\n")
+        print(f"[GOLDEN] Re-recorded {failures} outputs in {GOLDEN_FILE}")
+        return True
+    print(f"[GOLDEN] {len(golden) - failures}/{len(golden)} cases match")
+    return failures == 0
+
+
+def chapter_gloss(n_tokens, seed=7):
+    rnd = random.Random(seed)
+    vocab = sorted(w.upper() for w in main.VALID_WORDS if w.isalpha() and len(w) > 1)
+    synonyms = sorted(main.SYNONYM_MAP)
+    unknown = ["PHOTOSYNTHESIS", "MITOCHONDRIA", "NEWTON", "KINETIC", "CATALYST", "ISOTOPE", "VECTOR"]
+    tokens = []
+    for _ in range(n_tokens):
+        roll = rnd.random()
+        if roll < 0.6:
+            tokens.append(rnd.choice(vocab))
+        elif roll < 0.75:
+            tokens.append(rnd.choice(synonyms))
+        elif roll < 0.9:
+            tokens.append(rnd.choice(vocab) + rnd.choice(["S", "ING", "ED", "LY"]))
+        else:
+            tokens.append(rnd.choice(unknown))
+    return tokens
+
+
+TEXTBOOK_SENTENCES = [
+    "Force equals mass times acceleration.",
+    "Heavier objects need more force to move.",
+    "Plants use sunlight, water and carbon dioxide to make food.",
+    "The heart pumps blood through the body.",
+    "Water boils at one hundred degrees and freezes at zero.",
+    "Electric current flows when a circuit is closed.",
+    "The temperatur of the gas rises when it is heated.",
+    "Thank you for asking a good question.",
+    "Light travels faster than sound.",
+    "Every student should measure the length of the table.",
+    "An atom has protons, neutrons and electrons.",
+    "The moon goes around the earth every month.",
+]
+
+
+def textbook_glosses(n_sentences, seed=11):
+    """test_chapter.txt plus typical textbook sentences, repeated and shuffled"""
+    with open('test_chapter.txt', 'r', encoding='utf-8') as f:
+        chapter = main.split_sentences(f.read())
+    pool = chapter + TEXTBOOK_SENTENCES
+    rnd = random.Random(seed)
+    glossed = {s: rule_gloss(s, 'isl')['gloss_words'] for s in pool}
+    return [list(glossed[rnd.choice(pool)]) for _ in range(n_sentences)]
+
+
+def match_sentences(glosses):
+    """Each sentence matched on its own, as index() does for a single input"""
+    return [main.build_sigml_dict(g) for g in glosses]
+
+
+def match_with_memo(glosses):
+    """One memo for the document, but still one build_sigml_dict per sentence"""
+    memo = main.new_match_memo()
+    return [main.build_sigml_dict(g, memo) for g in glosses]
+
+
+def match_stream(glosses):
+    """As /stream does it: one memo per request, matched in packed-batch groups"""
+    memo = main.new_match_memo()
+    size = main.GLOSS_BATCH_MAX_SENTENCES
+    return [d for i in range(0, len(glosses), size) for d in main.build_sigml_dicts(glosses[i:i + size], memo)]
+
+
+def match_document(glosses):
+    """The whole document in one build_sigml_dicts call"""
+    return main.build_sigml_dicts(glosses)
+
+
+def timed_calls(fn, tokens, calls, repeat):
+    """Median seconds per call of fn(tokens)"""
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(calls):
+            fn(tokens)
+        runs.append((time.perf_counter() - start) / calls)
+    return sorted(runs)[len(runs) // 2]
+
+
+def timed(fn, tokens, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(tokens)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check and benchmark SIGML matching")
+    parser.add_argument('--update', action='store_true', help="re-record golden signs that changed")
+    parser.add_argument('--tokens', type=int, default=20000)
+    parser.add_argument('--sentences', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    # Quiet the per-letter warnings while timing
+    main.print = lambda *a, **k: None
+    ok = check_golden(update=args.update)
+
+    print(f"\n--- match_to_sigml, one call per gloss (median of {args.repeat} runs) ---")
+    print(f"{'tokens':>7} {'os.path.exists':>16} {'SignIndex':>16} {'speedup':>8}")
+    for size in (1, 10, 100, 1000, args.tokens):
+        tokens = chapter_gloss(size)
+        # Small glosses are timed over many calls so each run takes a while
+        calls = max(1, 20000 // size)
+        legacy = timed_calls(with_stat_index(main.match_to_sigml), tokens, calls, args.repeat)
+        indexed = timed_calls(main.match_to_sigml, tokens, calls, args.repeat)
+        same = with_stat_index(main.match_to_sigml)(tokens) == main.match_to_sigml(tokens)
+        ok = ok and same
+        print(f"{size:>7} {legacy * 1e6:>13.1f} us {indexed * 1e6:>13.1f} us {legacy / indexed:>7.1f}x"
+              f"{'' if same else '  OUTPUT DIFFERS'}")
+
+    glosses = textbook_glosses(args.sentences)
+    n_tokens = sum(len(g) for g in glosses)
+    expected = match_sentences(glosses)
+    print(f"\n--- whole document: {len(glosses)} sentences, {n_tokens} gloss tokens (best of {args.repeat}) ---")
+    single = timed(match_sentences, glosses, args.repeat)
+    print(f"per sentence       : {single * 1000:9.1f} ms total  ({single / n_tokens * 1e6:7.2f} us/token)")
+    for label, fn in (("memo per sentence", match_with_memo),
+                      (f"batches of {main.GLOSS_BATCH_MAX_SENTENCES}", match_stream),
+                      ("whole document", match_document)):
+        took = timed(fn, glosses, args.repeat)
+        same = fn(glosses) == expected
+        ok = ok and same
+        print(f"{label:<19}: {took * 1000:9.1f} ms total  ({took / n_tokens * 1e6:7.2f} us/token)  "
+              f"{single / took:4.1f}x  identical: {same}")
+    raise SystemExit(0 if ok else 1)
@@ -0,0 +1,196 @@
+"""
+Check and benchmark the memory-resident SignStore.
+
+1. Every minified sign must parse to the same XML tree as its file on disk,
+   ignoring whitespace and empty <hamnosys_nonmanual> blocks.
+2. Payload: bytes on disk versus minified versus minified + gzip.
+3. Serving one sign: send_from_directory() from disk versus the store, both
+   through a Flask request context.
+4. Reload: a full rescan with nothing changed, and with one edited file.
+5. A real WSGI server: the app runs under gunicorn, as in production, and
+   signs are fetched over HTTP with and without gzip. With a packed archive
+   the bodies are memoryviews, which the test client accepts but a server
+   does not; every sign that gzip does not pay off for is fetched, plus a
+   sample of the rest, and must match the store byte for byte.
+
+    python bench_sign_store.py [--repeat 5]
+"""
+import argparse
+import gzip
+import http.client
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+import xml.etree.ElementTree as ET
+
+# Serving signs never calls Groq, but main.py needs a key to import
+os.environ.setdefault("GROQ_API_KEY", "unused")
+import main
+from flask import send_from_directory
+from utils.sign_index import SIGML_EXT
+from utils.sign_store import SignStore
+
+
+def canonical(element):
+    children = [canonical(c) for c in element
+                if not (c.tag == 'hamnosys_nonmanual' and len(c) == 0 and not (c.text or '').strip())]
+    return element.tag, sorted(element.attrib.items()), (element.text or '').strip(), children
+
+
+def check_semantics(store):
+    failures = 0
+    for name in sorted(os.listdir(main.SIGN_DIR)):
+        if not name.endswith(SIGML_EXT):
+            continue
+        stem = name[:-len(SIGML_EXT)]
+        with open(os.path.join(main.SIGN_DIR, name), 'r', encoding='utf-8') as f:
+            original = f.read()
+        try:
+            expected = canonical(ET.fromstring(original)) if original.strip() else None
+        except ET.ParseError:
+            continue  # Malformed on disk; nothing to preserve
+        body = bytes(store.get(stem).body).decode('utf-8')
+        got = canonical(ET.fromstring(body)) if body else None
+        if got != expected:
+            failures += 1
+            print(f"[SEMANTICS] {name}: minified tree differs")
+    return failures
+
+
+def timed(fn, items, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            fn(item)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def from_disk(path):
+    with main.app.test_request_context('/' + path):
+        response = send_from_directory(main.STATIC_DIR, path)
+        response.direct_passthrough = False
+        return response.get_data()
+
+
+def from_store(path):
+    with main.app.test_request_context('/' + path):
+        return main.send_static_asset(path).get_data()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def fetch(url, encoding=None):
+    headers = {'Accept-Encoding': encoding} if encoding else {}
+    with urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=10) as response:
+        body = response.read()
+        if response.headers.get('Content-Encoding') == 'gzip':
+            body = gzip.decompress(body)
+        return body
+
+
+def check_server(store, sample=40):
+    """Fetch signs from the app under gunicorn. Returns the number of bad responses, or None if skipped."""
+    try:
+        import gunicorn  # noqa: F401
+    except ImportError:
+        print("[SERVER] gunicorn not installed; skipping the real-server check")
+        return None
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', 'main:app', '--bind', f'127.0.0.1:{port}', '--workers', '1'],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=dict(os.environ))
+    base = f'http://127.0.0.1:{port}'
+    try:
+        for _ in range(120):
+            try:
+                fetch(base + '/status')
+                break
+            except OSError:
+                time.sleep(0.5)
+        stems = main.sign_index.stems()
+        no_gzip = [stem for stem in stems if store.get(stem).gzip is None]
+        checked = no_gzip + stems[::max(1, len(stems) // sample)]
+        failures = 0
+        for stem in checked:
+            expected = bytes(store.get(stem).body)
+            for encoding in (None, 'gzip'):
+                try:
+                    body = fetch(f"{base}/SignFiles/{stem}{SIGML_EXT}", encoding)
+                except (OSError, http.client.HTTPException) as e:
+                    body = repr(e).encode()
+                if body != expected:
+                    failures += 1
+                    print(f"[SERVER] {stem} ({encoding or 'identity'}): got {len(body)} bytes, expected {len(expected)}")
+        print(f"gunicorn       : {len(checked)} signs ({len(no_gzip)} without gzip) x 2 encodings, "
+              f"{failures} bad responses")
+        return failures
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check and benchmark the SIGML sign store")
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    store = main.sign_store
+    failures = check_semantics(store)
+    for stem in main.sign_index.stems():
+        store.get(stem).gzip  # Derived lazily; count it for every sign
+    stats = store.stats()
+    print(f"\n--- {stats['files']} sign files from {stats['source']}: {failures} semantic differences ---")
+    print(f"on disk        : {stats['disk_bytes'] / 1024:8.1f} KB")
+    print(f"minified       : {stats['minified_bytes'] / 1024:8.1f} KB  "
+          f"({stats['minified_bytes'] / stats['disk_bytes']:.0%})")
+    print(f"gzip           : {stats['gzip_bytes'] / 1024:8.1f} KB  "
+          f"({stats['gzip_bytes'] / stats['disk_bytes']:.0%})")
+    print(f"store footprint: {stats['footprint_bytes'] / 1024:8.1f} KB")
+
+    paths = [f"SignFiles/{stem}{SIGML_EXT}" for stem in main.sign_index.stems()]
+    disk = timed(from_disk, paths, args.repeat)
+    memory = timed(from_store, paths, args.repeat)
+    n = len(paths)
+    print(f"\n--- serving {n} signs (best of {args.repeat}) ---")
+    print(f"from disk      : {disk * 1000:8.1f} ms  ({disk / n * 1e6:7.1f} us/sign)")
+    print(f"from memory    : {memory * 1000:8.1f} ms  ({memory / n * 1e6:7.1f} us/sign)  {disk / memory:.1f}x")
+
+    work = tempfile.mkdtemp()
+    try:
+        copy = os.path.join(work, 'SignFiles')
+        shutil.copytree(main.SIGN_DIR, copy)
+        start = time.perf_counter()
+        scratch = SignStore(copy, check_interval=0)
+        load = time.perf_counter() - start
+        start = time.perf_counter()
+        scratch.refresh()
+        unchanged = time.perf_counter() - start
+        with open(os.path.join(copy, 'hello' + SIGML_EXT), 'a', encoding='utf-8') as f:
+            f.write('\n')
+        os.utime(os.path.join(copy, 'hello' + SIGML_EXT), ns=(0, 1))
+        start = time.perf_counter()
+        reloaded = scratch.refresh()
+        edited = time.perf_counter() - start
+    finally:
+        shutil.rmtree(work)
+    print(f"\n--- reload ---")
+    print(f"initial load   : {load * 1000:8.1f} ms")
+    print(f"rescan, no edit: {unchanged * 1000:8.1f} ms")
+    print(f"rescan, 1 edit : {edited * 1000:8.1f} ms  (reloaded: {reloaded})")
+
+    print(f"\n--- real WSGI server, signs from {stats['source']} ---")
+    if stats['source'] != 'archive':
+        print("[SERVER] No current signs.pack; run build_sign_archive.py to check archive-backed signs")
+    bad = check_server(store)
+    raise SystemExit(1 if failures or bad else 0)
@@ -0,0 +1,91 @@
+"""
+Check and benchmark the HamNoSys sign duration model (utils/sign_timing.py).
+
+1. Startup: parsing every sign into its timing record, from the SignFiles
+   directory and from the packed archive when there is one.
+2. The estimated durations across the sign files.
+3. Lesson playback at speed 1, taking each sign to last its estimate:
+   - before: a 1.2 s polling loop starts the next sign on the first tick
+     after the avatar goes idle, and captures every frame 700 ms in;
+   - after: the next sign starts the timeline's gap after the idle event, and
+     each frame is captured CAPTURE_AT of the way into its sign.
+   "Dead time" is time the avatar stands still between signs. A capture is
+   "late" when it lands after its sign has ended, i.e. on the rest pose.
+
+    python bench_sign_timing.py
+"""
+import math
+import os
+import statistics
+import time
+
+# Timing signs never calls Groq, but main.py needs a key to import
+os.environ.setdefault("GROQ_API_KEY", "unused")
+import main
+from bench_static_assets import lesson_signs
+from utils.sign_store import SignStore
+from utils.sign_timing import SignTimings
+
+POLL_MS = 1200
+OLD_CAPTURE_MS = 700
+CAPTURE_AT = 0.6  # static/js/script.js
+
+
+def timed_preload(store):
+    start = time.perf_counter()
+    count = SignTimings(store).preload()
+    return count, time.perf_counter() - start
+
+
+def polled(durations):
+    """(total ms, dead ms, late captures) of the old polling loop"""
+    clock = dead = late = 0
+    for duration in durations:
+        # The next sign waits for the first tick after this one ends
+        slot = max(1, math.ceil(duration / POLL_MS)) * POLL_MS
+        clock += slot
+        dead += slot - duration
+        late += OLD_CAPTURE_MS > duration
+    return clock, dead, late
+
+
+def scheduled(durations, gap):
+    """(total ms, dead ms, late captures) of the idle-driven timeline"""
+    total = sum(durations) + gap * max(0, len(durations) - 1)
+    late = sum(1 for d in durations if d * CAPTURE_AT > d)
+    return total, total - sum(durations), late
+
+
+if __name__ == "__main__":
+    print("--- parsing every sign ---")
+    count, seconds = timed_preload(SignStore(main.SIGN_DIR))
+    print(f"directory      : {count} signs in {seconds * 1000:7.1f} ms")
+    if os.path.exists(main.SIGN_ARCHIVE):
+        count, seconds = timed_preload(SignStore(main.SIGN_DIR, archive_path=main.SIGN_ARCHIVE))
+        print(f"archive        : {count} signs in {seconds * 1000:7.1f} ms")
+
+    timings = main.sign_timings
+    durations = sorted(timings.duration(stem) for stem in main.sign_index.stems())
+    deciles = statistics.quantiles(durations, n=10)
+    print(f"\n--- estimated durations, {len(durations)} signs ---")
+    print(f"min {durations[0]} ms, median {statistics.median(durations):.0f} ms, "
+          f"p90 {deciles[-1]:.0f} ms, max {durations[-1]} ms")
+    print(f"signs shorter than the old 700 ms capture point: "
+          f"{sum(1 for d in durations if d < OLD_CAPTURE_MS)}")
+
+    sequences = [[s for s in signs if s] for signs in lesson_signs()]
+    before = [0, 0, 0]
+    after = [0, 0, 0]
+    n = 0
+    for signs in sequences:
+        timeline = timings.timeline(signs)
+        n += len(signs)
+        for totals, result in ((before, polled(timeline["durations"])),
+                               (after, scheduled(timeline["durations"], timeline["gap"]))):
+            for i, value in enumerate(result):
+                totals[i] += value
+    print(f"\n--- lesson: {len(sequences)} sentences, {n} signs ---")
+    for label, (total, dead, late) in (("before (polled)", before), ("after (timeline)", after)):
+        print(f"{label:17}: {total / 1000:7.1f} s  dead {dead / 1000:6.1f} s ({dead / total:4.0%})  "
+              f"late captures {late}")
+    print(f"Speedup          : {before[0] / after[0]:.2f}x")
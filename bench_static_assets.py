@@ -0,0 +1,128 @@
+"""
+Bytes and requests per lesson, before and after precompressed, fingerprinted
+static assets (build_static_assets.py) and merged sign bundles (/sigml/bundle).
+
+A lesson loads the page's local assets, then signs test_chapter.txt and the
+textbook sentences of bench_sigml_match.py, glossed offline by the rule
+engine. A small browser model keeps a cache: immutable responses are not
+requested again, and everything else is revalidated with If-None-Match.
+
+- before: what the old server sent. Identity encoding, no fingerprints, and
+  one SignFiles request per sign played. This is reproduced by requesting
+  without Accept-Encoding or ?v=.
+- after: gzip/br, fingerprinted page assets, and one bundle request per
+  sentence for the signs not fetched yet.
+
+Each is run for a first visit and a repeat visit with a warm browser cache.
+Bytes are response bodies only.
+
+    python build_static_assets.py && python bench_static_assets.py
+"""
+import os
+import re
+
+# Serving files never calls Groq, but main.py needs a key to import
+os.environ.setdefault("GROQ_API_KEY", "unused")
+import main
+from bench_sigml_match import TEXTBOOK_SENTENCES
+from utils.rule_gloss import rule_gloss
+
+ASSET_RE = re.compile(r'(?:href|src)=["\'](/[^"\'/][^"\']*)["\']')
+
+
+class Browser:
+    """HTTP cache with just enough behaviour to count requests and bytes"""
+
+    def __init__(self, client, accept_encoding=''):
+        self.client = client
+        self.headers = {'Accept-Encoding': accept_encoding} if accept_encoding else {}
+        self.cache = {}  # url -> (etag, immutable)
+        self.requests = 0
+        self.bytes = 0
+        self.not_modified = 0
+
+    def get(self, url):
+        cached = self.cache.get(url)
+        if cached and cached[1]:
+            return
+        headers = dict(self.headers)
+        if cached:
+            headers['If-None-Match'] = cached[0]
+        r = self.client.get(url, headers=headers)
+        self.requests += 1
+        self.bytes += len(r.data)
+        if r.status_code == 304:
+            self.not_modified += 1
+        elif r.status_code == 200 and r.headers.get('ETag'):
+            self.cache[url] = (r.headers['ETag'], 'immutable' in r.headers.get('Cache-Control', ''))
+
+    def post_json(self, url, payload):
+        r = self.client.post(url, json=payload, headers=self.headers)
+        self.requests += 1
+        self.bytes += len(r.data)
+        return r.get_json()
+
+
+def page_assets(client):
+    html = client.get('/').data.decode('utf-8')
+    return [url for url in ASSET_RE.findall(html) if client.get(url).status_code == 200]
+
+
+def lesson_signs():
+    with open('test_chapter.txt', 'r', encoding='utf-8') as f:
+        sentences = main.split_sentences(f.read()) + TEXTBOOK_SENTENCES
+    return [main.match_to_sigml(rule_gloss(s, 'isl')['gloss_words']) for s in sentences]
+
+
+def strip_fingerprint(url):
+    return url.split('?', 1)[0]
+
+
+def visit_before(browser, assets, lessons):
+    for url in assets:
+        browser.get(strip_fingerprint(url))
+    for signs in lessons:
+        for sign in signs:
+            browser.get(f'/SignFiles/{sign}.sigml')
+
+
+def visit_after(browser, assets, lessons):
+    for url in assets:
+        browser.get(url)
+    # The page keeps fetched sign text in memory (sigmlTextCache) until reload
+    loaded = set()
+    for signs in lessons:
+        new = list(dict.fromkeys(s for s in signs if s not in loaded))
+        if new:
+            browser.post_json('/sigml/bundle', {"signs": new})
+            loaded.update(new)
+
+
+def run(browser, visit, assets, lessons):
+    """(requests, bytes, 304s) for one visit"""
+    start = browser.requests, browser.bytes, browser.not_modified
+    visit(browser, assets, lessons)
+    return browser.requests - start[0], browser.bytes - start[1], browser.not_modified - start[2]
+
+
+if __name__ == "__main__":
+    main.print = lambda *a, **k: None
+    client = main.app.test_client()
+    if not main.static_assets.files:
+        raise SystemExit("No static manifest; run build_static_assets.py first")
+
+    assets = page_assets(client)
+    lessons = lesson_signs()
+    total_signs = sum(len(signs) for signs in lessons)
+    distinct = len({s for signs in lessons for s in signs})
+    print(f"--- lesson: {len(lessons)} sentences, {total_signs} signs ({distinct} distinct), "
+          f"{len(assets)} page assets ---")
+
+    for name, browser, visit in (("before", Browser(client), visit_before),
+                                 ("after", Browser(client, 'gzip, deflate, br'), visit_after)):
+        for label in ("first visit", "repeat visit"):
+            requests, size, not_modified = run(browser, visit, assets, lessons)
+            print(f"{name + ', ' + label:22}: {requests:5} requests ({not_modified:3} x 304) {size / 1024:9.1f} KB")
+    print(f"\nWhole static tree: {main.static_assets.stats()['bytes'] / 1e6:.2f} MB, "
+          f"{main.static_assets.stats()['gzip_bytes'] / 1e6:.2f} MB gzip, "
+          f"{main.static_assets.stats()['br_bytes'] / 1e6:.2f} MB best encoding")
@@ -0,0 +1,46 @@
+"""
+Prebuild /explain bundles for every FORMULA_CONTEXT entry in ISL and ASL.
+
+    python build_explain_bundles.py           # build missing or stale bundles
+    python build_explain_bundles.py --force   # rebuild everything
+    python build_explain_bundles.py --check   # exit 1 if any bundle is missing or stale
+
+Needs GROQ_API_KEY (or GROQ_BASE_URL pointing at mock_groq.py). The result is
+written to EXPLAIN_BUNDLES_PATH (explain_bundles.json by default); commit it
+so deployments serve canned explanations without calling Groq.
+"""
+import argparse
+import sys
+
+import main
+
+
+def build(force=False, check=False):
+    missing = []
+    built = 0
+    for language in main.EXPLAIN_LANGUAGES:
+        for key, context in main.FORMULA_CONTEXT.items():
+            if not force and main.explain_bundles.get(language, key, context) is not None:
+                continue
+            if check:
+                missing.append(f"{key} ({language})")
+                continue
+            if main.build_explain_bundle(key, language, main.new_deadline()) is None:
+                missing.append(f"{key} ({language})")
+            else:
+                built += 1
+
+    total = len(main.FORMULA_CONTEXT) * len(main.EXPLAIN_LANGUAGES)
+    print(f"\nVersion {main.EXPLAIN_BUNDLE_VERSION}: {total - len(missing)}/{total} bundles current, "
+          f"{built} built this run -> {main.EXPLAIN_BUNDLES_PATH}")
+    for item in missing:
+        print(f"MISSING: {item}")
+    return not missing
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--force', action='store_true', help="rebuild bundles that are already current")
+    parser.add_argument('--check', action='store_true', help="only report missing or stale bundles")
+    args = parser.parse_args()
+    sys.exit(0 if build(force=args.force, check=args.check) else 1)
@@ -0,0 +1,56 @@
+"""
+Generate inflections.json: every inflected, irregular and synonym surface form
+of the sign vocabulary (words.txt + SYNONYM_MAP), mapped to its base token, and
+the English words fuzzy correction must leave alone (within FUZZY_MAX_DISTANCE
+of a vocabulary word, but real words with no sign).
+
+    python build_inflections.py           # rebuild the table
+    python build_inflections.py --check   # exit 1 if the table is out of date
+
+Uses NLTK's WordNet lemmatizer and exception lists when their data is
+installed (python -m nltk.downloader wordnet omw-1.4), otherwise plural and
+verb spelling rules and the built-in irregular list. Re-run after editing words.txt or SYNONYM_MAP.
+"""
+import argparse
+import os
+import sys
+
+# Building the table never calls Groq, but main.py needs a key to import
+os.environ.setdefault("GROQ_API_KEY", "unused")
+import main
+from utils.inflections import build_table, dictionary_words, inputs_fingerprint, save_table
+
+
+def build(check=False):
+    fingerprint = inputs_fingerprint(main.INFLECTION_BASES)
+    if check:
+        current = main.INFLECTIONS_META.get("inputs") == fingerprint
+        source = main.INFLECTIONS_META.get("source")
+        print(f"inflections.json is {'current' if current else 'OUT OF DATE'} ({fingerprint}, {source})")
+        if source != 'nltk-wordnet':
+            print("[INFLECT] Built without WordNet: no comparatives, superlatives or -ly adverbs")
+        return current
+
+    vocab = sorted(main.VALID_WORDS)
+    synonyms = sorted(k.lower() for k in main.SYNONYM_MAP)
+    table, source = build_table(vocab, synonyms)
+    known = set(vocab) | set(synonyms) | {s for forms in table.values() for s in forms.split()}
+
+    def near(word):
+        return (len(word) >= main.FUZZY_MIN_LENGTH and word not in known
+                and bool(main.fuzzy_index.lookup(word)[0]))
+
+    dictionary = dictionary_words(near)
+    save_table(main.INFLECTIONS_FILE, table, source, fingerprint, dictionary)
+
+    forms = sum(len(f.split()) for f in table.values())
+    print(f"\nWrote {forms} surface forms for {len(table)} base tokens and {len(dictionary)} "
+          f"dictionary words ({source}) -> {main.INFLECTIONS_FILE}")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the sign inflection table")
+    parser.add_argument('--check', action='store_true', help="only report whether the table is current")
+    args = parser.parse_args()
+    sys.exit(0 if build(check=args.check) else 1)
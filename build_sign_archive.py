@@ -0,0 +1,89 @@
+"""
+Pack static/SignFiles into one archive that the server maps instead of reading
+a thousand small files (format in utils/sign_archive.py).
+
+    python build_sign_archive.py                # pack, then verify every payload hash
+    python build_sign_archive.py --check        # exit 1 if the archive is stale or corrupt
+    python build_sign_archive.py --unpack DIR   # write every sign back out as DIR/<name>.sigml
+
+Payloads are the minified signs the server sends. The archive is written to
+SIGN_ARCHIVE (signs.pack by default); the server uses it when it is newer than
+every file in SignFiles. --unpack recovers lost sign files without a network.
+"""
+import argparse
+import os
+import sys
+
+from utils.sign_archive import ArchiveError, SignArchive, write_archive
+from utils.sign_index import SIGML_EXT
+from utils.sign_store import archive_is_current, minify_file
+
+BASE_DIR = os.path.dirname(os.path.realpath(__file__))
+SIGN_DIR = os.path.join(BASE_DIR, 'static', 'SignFiles')
+SIGN_ARCHIVE = os.getenv("SIGN_ARCHIVE", os.path.join(BASE_DIR, 'signs.pack'))
+
+
+def read_signs(sign_dir):
+    return {name[:-len(SIGML_EXT)]: minify_file(os.path.join(sign_dir, name))
+            for name in sorted(os.listdir(sign_dir)) if name.endswith(SIGML_EXT)}
+
+
+def verify(path, expected=None):
+    """Problems with the archive at path: unreadable, bad hashes, or (given the
+    expected {name: bytes}) missing, extra or different signs"""
+    try:
+        archive = SignArchive(path)
+    except (OSError, ArchiveError) as e:
+        return [str(e)]
+    problems = [f"{name}: hash mismatch" for name in archive.verify()]
+    if expected is not None:
+        problems += [f"{name}: not in archive" for name in sorted(set(expected) - set(archive.names))]
+        problems += [f"{name}: not in {SIGN_DIR}" for name in sorted(set(archive.names) - set(expected))]
+        problems += [f"{name}: differs from {SIGN_DIR}" for name in archive.names
+                     if name in expected and archive.get(name) != expected[name]]
+    return problems
+
+
+def build():
+    signs = read_signs(SIGN_DIR)
+    count = write_archive(SIGN_ARCHIVE, signs)
+    problems = verify(SIGN_ARCHIVE, signs)
+    raw = sum(os.path.getsize(os.path.join(SIGN_DIR, name + SIGML_EXT)) for name in signs)
+    print(f"Packed {count} signs: {raw / 1024:.1f} KB of files -> "
+          f"{os.path.getsize(SIGN_ARCHIVE) / 1024:.1f} KB in {SIGN_ARCHIVE}")
+    return problems
+
+
+def check():
+    if not archive_is_current(SIGN_ARCHIVE, SIGN_DIR):
+        return [f"{SIGN_ARCHIVE} is missing or older than {SIGN_DIR}"]
+    signs = read_signs(SIGN_DIR) if os.path.isdir(SIGN_DIR) else None
+    return verify(SIGN_ARCHIVE, signs)
+
+
+def unpack(target):
+    archive = SignArchive(SIGN_ARCHIVE)
+    os.makedirs(target, exist_ok=True)
+    for name in archive.names:
+        with open(os.path.join(target, name + SIGML_EXT), 'wb') as f:
+            f.write(archive.get(name))
+    print(f"Unpacked {len(archive)} signs to {target}")
+    return archive.verify()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pack, check or unpack the sign archive")
+    parser.add_argument('--check', action='store_true', help="verify the archive against SignFiles")
+    parser.add_argument('--unpack', metavar='DIR', help="write every sign in the archive to DIR")
+    args = parser.parse_args()
+
+    if args.unpack:
+        problems = unpack(args.unpack)
+    elif args.check:
+        problems = check()
+    else:
+        problems = build()
+    for problem in problems:
+        print(f"ERROR: {problem}")
+    print("OK" if not problems else f"{len(problems)} problems")
+    sys.exit(1 if problems else 0)
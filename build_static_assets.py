@@ -0,0 +1,126 @@
+"""
+Precompress static/ and write the content-hash manifest the server uses for
+Accept-Encoding negotiation, strong ETags and fingerprinted URLs.
+
+    python build_static_assets.py           # compress new or changed files
+    python build_static_assets.py --force   # recompress everything
+    python build_static_assets.py --check   # exit 1 if the manifest is out of date
+
+Every compressible file (SIGML, HTML, JS, CSS, JSON...) gets a .gz copy, and a
+.br copy when the brotli package is installed, under STATIC_BUILD_DIR
+(static_build/ by default). A variant is kept only if it saves at least 5%.
+Run it after changing anything under static/; deployments run it at build time.
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from utils.static_assets import COMPRESSIBLE, MANIFEST_NAME, content_hash
+
+BASE_DIR = os.path.dirname(os.path.realpath(__file__))
+STATIC_DIR = os.path.join(BASE_DIR, 'static')
+BUILD_DIR = os.getenv("STATIC_BUILD_DIR", os.path.join(BASE_DIR, 'static_build'))
+MIN_SAVING = 0.05
+
+
+def compressors():
+    found = [('gzip', '.gz', lambda data: gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        found.append(('br', '.br', lambda data: brotli.compress(data, quality=11)))
+    return found
+
+
+def static_files(static_dir):
+    for root, dirs, files in os.walk(static_dir):
+        dirs.sort()
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            yield os.path.relpath(path, static_dir).replace(os.sep, '/'), path
+
+
+def load_manifest(build_dir):
+    try:
+        with open(os.path.join(build_dir, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+            return json.load(f).get("files", {})
+    except (OSError, ValueError):
+        return {}
+
+
+def build(static_dir=STATIC_DIR, build_dir=BUILD_DIR, force=False, check=False):
+    old = load_manifest(build_dir)
+    codecs = compressors()
+    files = {}
+    changed = []
+    for key, path in static_files(static_dir):
+        st = os.stat(path)
+        previous = old.get(key)
+        fresh = (previous and previous["size"] == st.st_size and previous["mtime_ns"] == st.st_mtime_ns
+                 and all(enc in previous for enc, _, _ in codecs))
+        if fresh and not force:
+            files[key] = previous
+            continue
+        changed.append(key)
+        if check:
+            files[key] = previous
+            continue
+
+        with open(path, 'rb') as f:
+            data = f.read()
+        entry = {"hash": content_hash(data), "size": len(data), "mtime_ns": st.st_mtime_ns}
+        compressible = os.path.splitext(key)[1].lower() in COMPRESSIBLE
+        for encoding, suffix, compress in codecs:
+            target = os.path.join(build_dir, *key.split('/')) + suffix
+            packed = compress(data) if compressible else None
+            if packed is not None and len(packed) <= len(data) * (1 - MIN_SAVING):
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                with open(target, 'wb') as f:
+                    f.write(packed)
+                entry[encoding] = len(packed)
+            else:
+                entry[encoding] = None
+                if os.path.exists(target):
+                    os.remove(target)
+        files[key] = entry
+
+    removed = sorted(set(old) - set(files))
+    if check:
+        for key in changed + removed:
+            print(f"STALE: {key}")
+        print(f"{len(files)} files, {len(changed) + len(removed)} out of date")
+        return not changed and not removed
+
+    for key in removed:
+        for _, suffix, _ in codecs:
+            target = os.path.join(build_dir, *key.split('/')) + suffix
+            if os.path.exists(target):
+                os.remove(target)
+
+    os.makedirs(build_dir, exist_ok=True)
+    manifest = os.path.join(build_dir, MANIFEST_NAME)
+    with open(manifest + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump({"files": files}, f, indent=1, sort_keys=True)
+    os.replace(manifest + '.tmp', manifest)
+
+    total = sum(e["size"] for e in files.values())
+    print(f"{len(files)} files, {len(changed)} compressed this run, {len(removed)} removed -> {manifest}")
+    for encoding, _, _ in codecs:
+        packed = sum(e.get(encoding) or e["size"] for e in files.values())
+        print(f"  {encoding:5}: {total / 1e6:.2f} MB -> {packed / 1e6:.2f} MB ({packed / total:.0%})")
+    if brotli is None:
+        print("  brotli not installed; only gzip variants written")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompress static assets and write their manifest")
+    parser.add_argument('--force', action='store_true', help="recompress every file")
+    parser.add_argument('--check', action='store_true', help="report out-of-date files, write nothing")
+    args = parser.parse_args()
+    sys.exit(0 if build(force=args.force, check=args.check) else 1)
@@ -0,0 +1,247 @@
+"""
+End-to-end load harness for the Flask app.
+
+Drives /, /ask, /explain, /upload and /learn/* at a fixed request rate and
+reports p50/p95/p99 latency and throughput per route. Run the app against
+mock_groq.py so results don't depend on Groq quota or network:
+
+    python mock_groq.py --mode synthetic --latency 0.3 --jitter 0.1 &
+    GROQ_BASE_URL=http://127.0.0.1:8090 GROQ_API_KEY=mock python main.py &
+    python loadtest.py --rps 20 --duration 60 --json results.json
+
+The load is open-loop: requests start on schedule whether or not earlier ones
+finished, and latency is measured from the scheduled start, so queueing in the
+app shows up in the percentiles instead of slowing the generator down.
+"""
+import argparse
+import json
+import math
+import random
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+SENTENCES = [
+    "The boy kicked the ball",
+    "Water boils at one hundred degrees",
+    "Plants need sunlight to make food",
+    "Force equals mass times acceleration",
+    "The heart pumps blood through the body",
+    "I don't understand the question",
+    "H2O is made of hydrogen and oxygen",
+    "F = ma",
+    "Energy cannot be created or destroyed. It only changes form.",
+    "Electric current flows through a wire. Resistance slows it down.",
+]
+QUESTIONS = [
+    "Why is the sky blue?",
+    "What is gravity?",
+    "How do plants make food?",
+    "What is an atom?",
+    "Why does ice float on water?",
+]
+FORMULAS = [
+    ("F = ma", "f=ma"),
+    ("E = mc2", "e=mc2"),
+    ("V = IR", "v=ir"),
+    ("Photosynthesis", ""),
+    ("a2 + b2 = c2", ""),
+]
+CATEGORIES = ["Greetings 🤝", "Numbers 🔢", "Family 👨‍👩‍👧", "Colors 🎨", "Actions 🏃", "Time 🕐", "Feelings 😊"]
+UPLOAD_TEXT = "Newton's second law says force equals mass times acceleration.\n"
+
+DEFAULT_MIX = "index=5,ask=2,explain=2,upload=1,learn_categories=1,learn_words=2,learn_quiz=2"
+
+
+def _request(base, path, data=None, headers=None, method=None):
+    req = urllib.request.Request(base + path, data=data, headers=headers or {}, method=method)
+    with urllib.request.urlopen(req, timeout=120) as resp:
+        resp.read()
+        return resp.status
+
+
+def _post_json(base, path, payload):
+    return _request(base, path, json.dumps(payload).encode('utf-8'), {"Content-Type": "application/json"})
+
+
+def hit_index(base, rnd):
+    form = urllib.parse.urlencode({"text": rnd.choice(SENTENCES), "language": rnd.choice(["asl", "isl"])})
+    return _request(base, '/', form.encode('utf-8'), {"Content-Type": "application/x-www-form-urlencoded"})
+
+
+def hit_ask(base, rnd):
+    return _post_json(base, '/ask', {"question": rnd.choice(QUESTIONS), "language": rnd.choice(["asl", "isl"])})
+
+
+def hit_explain(base, rnd):
+    formula, key = rnd.choice(FORMULAS)
+    return _post_json(base, '/explain', {"formula": formula, "formula_key": key, "language": "asl"})
+
+
+def hit_upload(base, rnd):
+    boundary = uuid.uuid4().hex
+    body = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="file"; filename="load_{boundary[:8]}.txt"\r\n'
+        f"Content-Type: text/plain\r\n\r\n{UPLOAD_TEXT}\r\n"
+        f"--{boundary}--\r\n"
+    ).encode('utf-8')
+    return _request(base, '/upload', body, {"Content-Type": f"multipart/form-data; boundary={boundary}"})
+
+
+def hit_learn_categories(base, rnd):
+    return _request(base, '/learn/categories')
+
+
+def hit_learn_words(base, rnd):
+    return _post_json(base, '/learn/words', {"category": rnd.choice(CATEGORIES)})
+
+
+def hit_learn_quiz(base, rnd):
+    return _post_json(base, '/learn/quiz', {"category": rnd.choice(CATEGORIES)})
+
+
+SCENARIOS = {
+    "index": hit_index,
+    "ask": hit_ask,
+    "explain": hit_explain,
+    "upload": hit_upload,
+    "learn_categories": hit_learn_categories,
+    "learn_words": hit_learn_words,
+    "learn_quiz": hit_learn_quiz,
+}
+
+
+def parse_mix(mix):
+    weights = {}
+    for part in mix.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise SystemExit(f"Unknown scenario '{name}'. Choose from: {', '.join(SCENARIOS)}")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = {}
+
+    def add(self, name, latency, ok, status):
+        with self._lock:
+            s = self.samples.setdefault(name, {"latencies": [], "errors": 0, "statuses": {}})
+            s["latencies"].append(latency)
+            s["statuses"][str(status)] = s["statuses"].get(str(status), 0) + 1
+            if not ok:
+                s["errors"] += 1
+
+    def summary(self, elapsed):
+        def describe(latencies, errors, statuses=None):
+            ordered = sorted(latencies)
+            row = {
+                "requests": len(ordered),
+                "errors": errors,
+                "throughput_rps": round(len(ordered) / elapsed, 2) if elapsed else 0.0,
+                "p50_ms": None, "p95_ms": None, "p99_ms": None, "max_ms": None,
+            }
+            if ordered:
+                row.update({
+                    "p50_ms": round(percentile(ordered, 50) * 1000, 1),
+                    "p95_ms": round(percentile(ordered, 95) * 1000, 1),
+                    "p99_ms": round(percentile(ordered, 99) * 1000, 1),
+                    "max_ms": round(ordered[-1] * 1000, 1),
+                })
+            if statuses is not None:
+                row["statuses"] = statuses
+            return row
+
+        with self._lock:
+            routes = {name: describe(s["latencies"], s["errors"], dict(s["statuses"]))
+                      for name, s in sorted(self.samples.items())}
+            all_latencies = [l for s in self.samples.values() for l in s["latencies"]]
+            all_errors = sum(s["errors"] for s in self.samples.values())
+        return {"elapsed_s": round(elapsed, 2), "routes": routes, "total": describe(all_latencies, all_errors)}
+
+
+def run(base, rps, duration, concurrency, weights, seed=None):
+    rnd = random.Random(seed)
+    names = list(weights)
+    recorder = Recorder()
+    interval = 1.0 / rps
+    total = int(rps * duration)
+
+    def fire(name, scheduled, request_rnd):
+        try:
+            status = SCENARIOS[name](base, request_rnd)
+            ok = 200 <= status < 400
+        except urllib.error.HTTPError as e:
+            status, ok = e.code, False
+        except Exception as e:
+            status, ok = e.__class__.__name__, False
+        recorder.add(name, time.monotonic() - scheduled, ok, status)
+
+    print(f"[LOAD] {total} requests at {rps} rps against {base} (max {concurrency} in flight)")
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for i in range(total):
+            scheduled = start + i * interval
+            delay = scheduled - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            name = rnd.choices(names, weights=[weights[n] for n in names])[0]
+            pool.submit(fire, name, scheduled, random.Random(rnd.random()))
+    return recorder.summary(time.monotonic() - start)
+
+
+def print_report(summary):
+    print(f"\n{'route':<18}{'reqs':>7}{'errs':>6}{'rps':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    rows = list(summary["routes"].items()) + [("TOTAL", summary["total"])]
+    for name, r in rows:
+        print(f"{name:<18}{r['requests']:>7}{r['errors']:>6}{r['throughput_rps']:>8}"
+              f"{str(r['p50_ms']):>10}{str(r['p95_ms']):>10}{str(r['p99_ms']):>10}{str(r['max_ms']):>10}")
+    print(f"\nElapsed {summary['elapsed_s']}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the STEM sign language app")
+    parser.add_argument('--base', default='http://127.0.0.1:5000')
+    parser.add_argument('--rps', type=float, default=10.0, help="target requests per second")
+    parser.add_argument('--duration', type=float, default=30.0, help="seconds of load")
+    parser.add_argument('--concurrency', type=int, default=64, help="max requests in flight")
+    parser.add_argument('--mix', default=DEFAULT_MIX, help="weighted scenarios, e.g. index=5,ask=1")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--json', dest='json_path', help="also write the summary to this file")
+    parser.add_argument('--max-error-rate', type=float, default=None,
+                        help="exit non-zero if the overall error rate is higher (for CI)")
+    args = parser.parse_args()
+
+    summary = run(args.base, args.rps, args.duration, args.concurrency, parse_mix(args.mix), args.seed)
+    print_report(summary)
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+        print(f"[LOAD] Summary written to {args.json_path}")
+
+    total = summary["total"]
+    if args.max_error_rate is not None and total["requests"]:
+        error_rate = total["errors"] / total["requests"]
+        if error_rate > args.max_error_rate:
+            raise SystemExit(f"[LOAD] Error rate {error_rate:.1%} above {args.max_error_rate:.1%}")
+
+
+if __name__ == '__main__':
+    main()
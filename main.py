@@ -1,20 +1,46 @@
+import atexit
 import json
 import os
 import ssl
 import re
+import collections
 import datetime
+import hashlib
+import mimetypes
+import time
+import urllib.parse
 import urllib.request
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 import torch
 
 
 ssl._create_default_https_context = ssl._create_unverified_context
 
 from dotenv import load_dotenv
-from flask import Flask, request, render_template, send_from_directory, jsonify
+from flask import Flask, Response, request, render_template, send_file, send_from_directory, jsonify
 from groq import Groq
 from werkzeug.utils import secure_filename
 
+from utils.concepts import ConceptMatcher
+from utils.explain_bundles import ExplainBundles
 from utils.extraction import extract_text
+from utils.formulas import FormulaIndex
+from utils.fuzzy import SymSpell
+from utils.gloss_cache import GlossCache
+from utils.history_store import HistoryStore
+from utils.inflections import inputs_fingerprint as inflections_fingerprint, load_table as load_inflections
+from utils.math_gloss import MathVerbalizer
+from utils.numbers import NumberWords
+from utils.phrases import PhraseMatcher, derive_compounds
+from utils.rule_gloss import rule_gloss, tagger_name
+from utils.sigml_bundle import SigmlBundler
+from utils.sign_index import SIGML_EXT, SignIndex
+from utils.sign_store import SignStore, archive_is_current
+from utils.sign_timing import SignTimings
+from utils.singleflight import SingleFlight
+from utils.static_assets import StaticAssets, accepted_encodings, normalize_path
+from utils.resilience import CircuitBreaker, CircuitOpenError, Deadline, DeadlineExceeded
 
 load_dotenv()
 
@@ -29,6 +55,7 @@ def add_cors_headers(response):
 
 BASE_DIR = os.path.dirname(os.path.realpath(__file__))
 UPLOAD_FOLDER = os.path.join(BASE_DIR, 'uploads')
+# Pre-SQLite history, imported into HISTORY_DB on first start
 HISTORY_FILE = os.path.join(BASE_DIR, 'history.json')
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
@@ -42,7 +69,71 @@ def allowed_file(filename):
 # Configuration
 # ============================================================
 GROQ_MODEL = "llama-3.3-70b-versatile"
-groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+# Retries are off by default: every call already runs under a request deadline
+# and the circuit breaker, and SDK retries would silently multiply latency.
+GROQ_MAX_RETRIES = int(os.getenv("GROQ_MAX_RETRIES", "0"))
+# GROQ_BASE_URL points the client at another endpoint, e.g. mock_groq.py for load tests
+groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"), base_url=os.getenv("GROQ_BASE_URL") or None,
+                   max_retries=GROQ_MAX_RETRIES)
+
+# Time budgets (seconds): whole request, and any single Groq call within it
+GROQ_REQUEST_DEADLINE = float(os.getenv("GROQ_REQUEST_DEADLINE", "25"))
+GROQ_CALL_TIMEOUT = float(os.getenv("GROQ_CALL_TIMEOUT", "15"))
+
+# Gloss cache: in-process LRU + SQLite (WAL) shared by all gunicorn workers.
+# Set GLOSS_CACHE_DB to an empty string to run memory-only.
+GLOSS_CACHE_DB = os.getenv("GLOSS_CACHE_DB", os.path.join(BASE_DIR, 'gloss_cache.db'))
+GLOSS_CACHE_SIZE = int(os.getenv("GLOSS_CACHE_SIZE", "2048"))
+GLOSS_CACHE_TTL = int(os.getenv("GLOSS_CACHE_TTL", str(24 * 3600)))
+GLOSS_CACHE_DISK_TTL = int(os.getenv("GLOSS_CACHE_DISK_TTL", str(30 * 24 * 3600)))
+
+# Translation history: SQLite (WAL), written by a background thread and
+# compacted to the newest HISTORY_KEEP entries. An old history.json is
+# imported once. Set HISTORY_DB to an empty string to keep history in memory.
+HISTORY_DB = os.getenv("HISTORY_DB", os.path.join(BASE_DIR, 'history.db'))
+HISTORY_KEEP = int(os.getenv("HISTORY_KEEP", "50"))
+HISTORY_COMPACT_INTERVAL = float(os.getenv("HISTORY_COMPACT_INTERVAL", "60"))
+
+# Identical in-flight Groq requests (e.g. a whole class opening the same
+# lesson) share one upstream call.
+llm_flight = SingleFlight()
+
+
+# Opens after consecutive failures or calls slower than the latency threshold;
+# while open, every LLM stage goes straight to its local fallback.
+groq_breaker = CircuitBreaker(
+    failure_threshold=int(os.getenv("GROQ_BREAKER_FAILURES", "5")),
+    latency_threshold=float(os.getenv("GROQ_BREAKER_LATENCY", "10")),
+    open_seconds=float(os.getenv("GROQ_BREAKER_OPEN_SECONDS", "30")),
+    half_open_probes=int(os.getenv("GROQ_BREAKER_PROBES", "2")),
+)
+
+
+def new_deadline():
+    """Fresh time budget for one request"""
+    return Deadline(GROQ_REQUEST_DEADLINE)
+
+
+def groq_chat(deadline=None, **kwargs):
+    """groq_client.chat.completions.create with concurrent duplicates coalesced,
+    a timeout taken from the request deadline, and circuit breaking.
+    Raises CircuitOpenError / DeadlineExceeded without calling upstream."""
+    timeout = deadline.timeout(cap=GROQ_CALL_TIMEOUT) if deadline else GROQ_CALL_TIMEOUT
+    key = hashlib.sha256(json.dumps(kwargs, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+    def call():
+        if not groq_breaker.allow():
+            raise CircuitOpenError("Groq circuit breaker is open")
+        start = time.monotonic()
+        try:
+            response = groq_client.chat.completions.create(timeout=timeout, **kwargs)
+        except Exception:
+            groq_breaker.record_failure()
+            raise
+        groq_breaker.record_success(time.monotonic() - start)
+        return response
+
+    return llm_flight.do(key, call, timeout=timeout)
 
 # GPU Status Check
 cuda_available = torch.cuda.is_available()
@@ -190,16 +281,6 @@ SYNONYM_MAP = {
 # MATH/FORMULA PREPROCESSOR (EXPANDED)
 # ============================================================
 
-NUM_WORDS = {
-    '0': 'ZERO', '1': 'ONE', '2': 'TWO', '3': 'THREE', '4': 'FOUR',
-    '5': 'FIVE', '6': 'SIX', '7': 'SEVEN', '8': 'EIGHT', '9': 'NINE',
-    '10': 'TEN', '11': 'ELEVEN', '12': 'TWELVE', '13': 'THIRTEEN',
-    '14': 'FOURTEEN', '15': 'FIFTEEN', '16': 'SIXTEEN', '17': 'SEVENTEEN',
-    '18': 'EIGHTEEN', '19': 'NINETEEN', '20': 'TWENTY', '30': 'THIRTY',
-    '40': 'FORTY', '50': 'FIFTY', '60': 'SIXTY', '70': 'SEVENTY',
-    '80': 'EIGHTY', '90': 'NINETY', '100': 'HUNDRED', '1000': 'THOUSAND',
-}
-
 MATH_OPS = {
     '+': 'PLUS', '-': 'MINUS', '*': 'TIMES', '×': 'TIMES',
     '/': 'DIVIDE', '÷': 'DIVIDE', '=': 'EQUAL',
@@ -400,6 +481,9 @@ FORMULA_CONTEXT = {
     },
 }
 
+# Normalized formula keys and the combined chemistry regex, built once
+formula_index = FormulaIndex(PHYSICS_FORMULAS, CHEM_FORMULAS, FORMULA_CONTEXT)
+
 # ============================================================
 # STEM CONCEPTS — Complex Terms that need Explanation
 # ============================================================
@@ -435,6 +519,8 @@ STEM_CONCEPTS = {
     "fractal", "fibonacci", "pythagorean", "differential", "sine", "cosine", "math",
     "formula", "equation", "logic", "reasoning"
 }
+# Whole-word matching in one pass; the most specific concept wins
+concept_matcher = ConceptMatcher(STEM_CONCEPTS)
 
 # Units mapping
 UNITS = {
@@ -450,113 +536,35 @@ UNITS = {
 
 def number_to_words(num_str):
     """Convert a number string to sign-friendly words"""
-    if num_str in NUM_WORDS:
-        return NUM_WORDS[num_str]
+    return number_words.say(num_str)
 
-    try:
-        num = int(num_str)
-        if num < 0:
-            return 'MINUS ' + number_to_words(str(abs(num)))
-        if num <= 20:
-            return NUM_WORDS.get(str(num), ' '.join(NUM_WORDS.get(d, d) for d in num_str))
-        if num < 100:
-            tens = (num // 10) * 10
-            ones = num % 10
-            if ones == 0:
-                return NUM_WORDS.get(str(tens), str(num))
-            return NUM_WORDS.get(str(tens), '') + ' ' + NUM_WORDS.get(str(ones), '')
-        if num < 1000:
-            hundreds = num // 100
-            remainder = num % 100
-            result = NUM_WORDS[str(hundreds)] + ' HUNDRED'
-            if remainder > 0:
-                result += ' ' + number_to_words(str(remainder))
-            return result
-        return ' '.join(NUM_WORDS.get(d, d) for d in num_str)
-    except ValueError:
-        if '.' in num_str:
-            parts = num_str.split('.')
-            whole = number_to_words(parts[0])
-            decimal = ' '.join(NUM_WORDS.get(d, d) for d in parts[1])
-            return whole + ' POINT ' + decimal
-        return ' '.join(NUM_WORDS.get(d, d) for d in num_str)
 
 
-def preprocess_math(text):
-    """Convert math, formulas, numbers, Greek letters, units to sign-friendly words"""
 
+def expand_formulas(text):
+    """Known physics/chemical formulas -> words. Returns (text, done); done is
+    True when a physics formula matched and the text must not be touched further."""
     # 1. Handle known physics formulas first (normalize ^ for matching)
-    text_lower = text.lower().replace(' ', '')
-    text_lower_no_caret = text_lower.replace('^', '')
-    for formula, expansion in PHYSICS_FORMULAS.items():
-        formula_clean = formula.replace(' ', '').replace('^', '')
-        if formula_clean in text_lower_no_caret:
-            # Replace the original text (with or without ^) using a flexible pattern
-            pattern = re.compile(
-                re.escape(formula).replace(r'\^', r'\^?'),
-                re.IGNORECASE
-            )
-            text = pattern.sub(expansion, text)
-            # If formula matched, return early to avoid further mangling
-            return text
-
-    # 2. Handle known chemical formulas
-    for formula, expansion in CHEM_FORMULAS.items():
-        pattern = re.compile(r'\b' + re.escape(formula) + r'\b', re.IGNORECASE)
-        text = pattern.sub(expansion, text)
-
-    # 3. Handle Greek letters
-    for greek, word in GREEK_LETTERS.items():
-        text = text.replace(greek, f' {word} ')
-
-    # 4. Handle subscripts (x₁ -> X ONE)
-    subscripts = {'₀': '0', '₁': '1', '₂': '2', '₃': '3', '₄': '4',
-                  '₅': '5', '₆': '6', '₇': '7', '₈': '8', '₉': '9'}
-    for sub, digit in subscripts.items():
-        text = text.replace(sub, digit)
-
-    # 5. Handle coefficients like 2ab -> TWO A B
-    def expand_coefficients(match):
-        num = match.group(1)
-        vars_str = match.group(2)
-        expanded_vars = ' '.join(list(vars_str.upper()))
-        return f" {number_to_words(num)} {expanded_vars} "
-
-    text = re.sub(r'(\d+)([a-zA-Z]+)', expand_coefficients, text)
-
-    # 6. Handle exponents
-    def expand_exponents(match):
-        base = match.group(1)
-        exp = match.group(2)
-        if base.isalpha():
-            base = base.upper()
-        word = ""
-        if exp == '2':
-            word = "SQUARE"
-        elif exp == '3':
-            word = "CUBE"
-        else:
-            word = f"POWER {number_to_words(exp)}"
-        return f" {base} {word} "
-
-    text = re.sub(r'([a-zA-Z]|\))(\d+)', expand_exponents, text)
-
-    # 7. Uppercase single letters (variables)
-    text = re.sub(r'\b[a-z]\b', lambda m: m.group(0).upper(), text)
+    physics = formula_index.physics_in(text)
+    if physics:
+        # Replace the original text (with or without ^) using a flexible pattern
+        pattern, expansion = physics
+        return pattern.sub(expansion, text), True
 
-    # 8. Replace symbols/operators
-    for op, word in sorted(MATH_OPS.items(), key=lambda x: -len(x[0])):
-        text = text.replace(op, f' {word} ')
+    # 2. Handle known chemical formulas (one combined regex, single pass)
+    return formula_index.substitute_chemistry(text), False
 
-    # 9. Convert remaining numbers
-    def replace_remaining_numbers(match):
-        return ' ' + number_to_words(match.group(0)) + ' '
 
-    text = re.sub(r'\b\d+\.?\d*\b', replace_remaining_numbers, text)
-
-    # Clean up
-    text = re.sub(r'\s+', ' ', text).strip()
-    return text
+# Memoized: the same formulas and sentences are preprocessed again and again
+@lru_cache(maxsize=4096)
+def preprocess_math(text):
+    """Convert math, formulas, numbers, Greek letters, units to sign-friendly words"""
+    text, done = expand_formulas(text)
+    if done:
+        # If formula matched, return early to avoid further mangling
+        return text
+    # 3. Operators, numbers, powers, subscripts and Greek letters in one pass
+    return math_verbalizer.gloss(text)
 
 
 # ============================================================
@@ -606,6 +614,49 @@ ISL Gloss:"""
     return prompt
 
 
+def build_batch_gloss_prompt(sentences, language="isl"):
+    """Build one numbered prompt that glosses several sentences at once.
+    The model must answer with one numbered line per input sentence."""
+    numbered = '\n'.join(f"{i}. {s}" for i, s in enumerate(sentences, start=1))
+    if language == "asl":
+        rules = """Rules for EACH sentence:
+1. Keep the EXACT same word order as the English sentence.
+2. Remove ONLY: THE, A, AN, IS, AM, ARE, WAS, WERE, BE, BEEN.
+3. DO NOT rearrange words. DO NOT repeat the output.
+
+Example:
+1. She asked an important question
+2. I eat food every day
+->
+1. SHE ASKED IMPORTANT QUESTION
+2. I EAT FOOD EVERY DAY"""
+        task = "Convert each numbered English sentence to ASL gloss."
+    else:
+        rules = """CRITICAL ISL Grammar Rules for EACH sentence:
+1. Word order MUST be: [Subject] [Time/Location] [Object] [Verb].
+2. The main Verb must ALWAYS come LAST.
+3. Remove articles: THE, A, AN, IS, AM, ARE, WAS, WERE, BE, BEEN.
+4. Negation: Put "NOT" after the verb at the very end.
+
+Example:
+1. I eat food every day
+2. I don't understand
+->
+1. I FOOD EVERY DAY EAT
+2. I UNDERSTAND NOT"""
+        task = "Convert each numbered English sentence to ISL (Indian Sign Language) Gloss."
+
+    return f"""{task}
+Output EXACTLY {len(sentences)} lines. Each line starts with the sentence number, a period, then the UPPERCASE gloss. No other text.
+
+{rules}
+
+Sentences:
+{numbered}
+
+Gloss:"""
+
+
 # System prompts for each language
 SYSTEM_PROMPTS = {
     "isl": "You are an ISL (Indian Sign Language) expert. You MUST use SOV (Subject-Object-Verb) grammar. The verb ALWAYS comes last. Output ONLY UPPERCASE gloss words. No explanations.",
@@ -613,13 +664,70 @@ SYSTEM_PROMPTS = {
 }
 
 
-def llm_to_gloss(text, language="isl"):
-    """Use Groq/Llama 3.3 to convert English/STEM text to sign language gloss"""
+# Fingerprint of everything that shapes the LLM output. Changing a prompt
+# changes the version, which invalidates every cached gloss for it.
+GLOSS_PROMPT_VERSION = hashlib.sha1(json.dumps([
+    build_gloss_prompt("{text}", "isl"),
+    build_gloss_prompt("{text}", "asl"),
+    build_batch_gloss_prompt(["{text}"], "isl"),
+    build_batch_gloss_prompt(["{text}"], "asl"),
+    SYSTEM_PROMPTS,
+], sort_keys=True).encode('utf-8')).hexdigest()[:12]
+
+gloss_cache = GlossCache(
+    db_path=GLOSS_CACHE_DB or None,
+    max_size=GLOSS_CACHE_SIZE,
+    ttl=GLOSS_CACHE_TTL,
+    disk_ttl=GLOSS_CACHE_DISK_TTL,
+)
+print(f"[CACHE] Gloss cache ready (prompt {GLOSS_PROMPT_VERSION}, disk: {gloss_cache.db_path or 'off'})")
+
+history_store = HistoryStore(db_path=HISTORY_DB or None, keep=HISTORY_KEEP,
+                             compact_interval=HISTORY_COMPACT_INTERVAL, legacy_json=HISTORY_FILE)
+# Entries still queued at shutdown are written before the process exits
+atexit.register(history_store.flush)
+
+
+def gloss_cache_key(text, language="isl"):
+    """Cache key for a gloss: normalized text, language, model and prompt version"""
+    language = "asl" if language == "asl" else "isl"
+    return GlossCache.make_key(text, language, GROQ_MODEL, GLOSS_PROMPT_VERSION)
+
+
+def parse_gloss_line(line):
+    """Turn one line of LLM gloss output into a list of UPPERCASE gloss words"""
+    # Remove any prefix
+    for prefix in ["ASL:", "ISL:", "GLOSS:", "Gloss:", "Output:", "Answer:", "ISL GLOSS:", "ASL GLOSS:"]:
+        if line.upper().startswith(prefix.upper()):
+            line = line[len(prefix):].strip()
+
+    print(f"[GLOSS] '{line}'")
+
+    # Remove non-alpha/non-space/non-digit (to keep numbers like H2O)
+    cleaned = re.sub(r'[^a-zA-Z0-9\s]', ' ', line)
+    gloss_words = [w.upper() for w in cleaned.split() if w.strip()]
+
+    # Deduplication: detect if the output is a repeated pattern
+    if len(gloss_words) >= 4:
+        half = len(gloss_words) // 2
+        # Check if the second half starts with the same words as the first
+        for split_at in range(max(2, half - 2), min(len(gloss_words) - 1, half + 3)):
+            if gloss_words[:min(3, split_at)] == gloss_words[split_at:split_at + min(3, split_at)]:
+                print(f"[DEDUP] Detected repetition at position {split_at}, trimming")
+                gloss_words = gloss_words[:split_at]
+                break
+
+    return gloss_words
+
+
+def groq_gloss(text, language="isl", deadline=None):
+    """Ask Groq for the gloss of one text. Returns None if the call or parse fails."""
     try:
         prompt = build_gloss_prompt(text, language)
         system_prompt = SYSTEM_PROMPTS.get(language, SYSTEM_PROMPTS["isl"])
 
-        response = groq_client.chat.completions.create(
+        response = groq_chat(
+            deadline=deadline,
             model=GROQ_MODEL,
             messages=[
                 {"role": "system", "content": system_prompt},
@@ -643,54 +751,212 @@ def llm_to_gloss(text, language="isl"):
         if not first_line:
             first_line = raw.split('\n')[0].strip() if raw else text
 
-        # Remove any prefix
-        for prefix in ["ASL:", "ISL:", "GLOSS:", "Gloss:", "Output:", "Answer:", "ISL GLOSS:", "ASL GLOSS:"]:
-            if first_line.upper().startswith(prefix.upper()):
-                first_line = first_line[len(prefix):].strip()
-
-        final_gloss_text = first_line
-        print(f"[GLOSS] '{final_gloss_text}'")
-
-        # Remove non-alpha/non-space/non-digit (to keep numbers like H2O)
-        cleaned = re.sub(r'[^a-zA-Z0-9\s]', ' ', final_gloss_text)
-        gloss_words = [w.upper() for w in cleaned.split() if w.strip()]
-
-        # Deduplication: detect if the output is a repeated pattern
-        if len(gloss_words) >= 4:
-            half = len(gloss_words) // 2
-            # Check if the second half starts with the same words as the first
-            for split_at in range(max(2, half - 2), min(len(gloss_words) - 1, half + 3)):
-                if gloss_words[:min(3, split_at)] == gloss_words[split_at:split_at + min(3, split_at)]:
-                    print(f"[DEDUP] Detected repetition at position {split_at}, trimming")
-                    gloss_words = gloss_words[:split_at]
-                    break
-
+        gloss_words = parse_gloss_line(first_line)
         if gloss_words:
             print(f"[LLM] Parsed ({language}) gloss: {gloss_words}")
             return gloss_words
 
     except Exception as e:
         print(f"[LLM ERROR] {e}")
+    return None
+
+
+# Offline rule engine: sentences up to RULE_GLOSS_MAX_WORDS whose rule gloss
+# scores at least RULE_GLOSS_MIN_CONFIDENCE never reach the LLM.
+RULE_GLOSS_MIN_CONFIDENCE = float(os.getenv("RULE_GLOSS_MIN_CONFIDENCE", "0.8"))
+RULE_GLOSS_MAX_WORDS = int(os.getenv("RULE_GLOSS_MAX_WORDS", "8"))
+rule_gloss_stats = {"fast_path": 0, "fallback": 0}
 
-    # Fallback: Simple word order mapping
-    print(f"[FALLBACK] Simple mapping for {language}")
+# Load the POS tagger once at startup rather than on the first request
+print(f"[RULES] Offline gloss engine tagger: {tagger_name()}")
+
+
+def rule_fast_path(text, language="isl"):
+    """Gloss short, simple sentences locally. Returns None if the LLM is needed."""
+    if len(text.split()) > RULE_GLOSS_MAX_WORDS:
+        return None
+    try:
+        result = rule_gloss(text, language)
+    except Exception as e:
+        print(f"[RULES ERROR] {e}")
+        return None
+    if result["gloss_words"] and result["confidence"] >= RULE_GLOSS_MIN_CONFIDENCE:
+        rule_gloss_stats["fast_path"] += 1
+        print(f"[RULES] Fast path ({language}, {result['tagger']}, "
+              f"confidence {result['confidence']}): {result['gloss_words']}")
+        return result["gloss_words"]
+    return None
+
+
+def fallback_gloss(text, language="isl"):
+    """Local gloss used when the LLM is unavailable"""
+    print(f"[FALLBACK] Rule engine for {language}")
+    rule_gloss_stats["fallback"] += 1
     processed_input = preprocess_math(text)
-    stop = {'a', 'an', 'the', 'is', 'am', 'are', 'was', 'were', 'be', 'been',
-            'do', 'does', 'did', 'will', 'would', 'can', 'could', 'shall', 'should',
-            'may', 'might', 'must', 'have', 'has', 'had', 'to', 'of', 'for', 'it'}
-    words = processed_input.split()
-    result = [w.upper() for w in words if w.strip() and w.lower() not in stop]
+    try:
+        result = rule_gloss(processed_input, language)["gloss_words"]
+    except Exception as e:
+        print(f"[RULES ERROR] {e}")
+        result = []
     return result if result else [w.upper() for w in text.split() if w.isalpha()]
 
 
+def llm_to_gloss(text, language="isl", deadline=None):
+    """Use Groq/Llama 3.3 to convert English/STEM text to sign language gloss.
+    Order: cache, offline rule fast path, Groq, then the local fallback.
+    Only successful LLM output is cached."""
+    cache_key = gloss_cache_key(text, language)
+    cached = gloss_cache.get(cache_key)
+    if cached is not None:
+        print(f"[CACHE] Hit ({language}): {cached}")
+        return cached
+
+    gloss_words = rule_fast_path(text, language)
+    if gloss_words:
+        return gloss_words
+
+    gloss_words = groq_gloss(text, language, deadline)
+    if gloss_words:
+        gloss_cache.set(cache_key, gloss_words)
+        return gloss_words
+
+    return fallback_gloss(text, language)
+
+
+# ============================================================
+# BATCHED GLOSS — many sentences per Groq call
+# ============================================================
+
+# Completion-token budget for one packed prompt, and a hard cap on sentences
+GLOSS_BATCH_TOKEN_BUDGET = int(os.getenv("GLOSS_BATCH_TOKEN_BUDGET", "1500"))
+GLOSS_BATCH_MAX_SENTENCES = int(os.getenv("GLOSS_BATCH_MAX_SENTENCES", "25"))
+
+BATCH_LINE_RE = re.compile(r'^\s*(\d+)\s*[.):\-]\s*(.*)$')
+
+
+def split_sentences(text):
+    """Split text on sentence punctuation or newlines (same rule as the frontend)"""
+    parts = re.split(r'(?<=[.!?])\s+|\n+', text or '')
+    return [p.strip() for p in parts if p.strip()]
+
+
+def estimate_gloss_tokens(sentence):
+    """Rough completion-token estimate for one numbered gloss line"""
+    return len(sentence) // 4 + 4
+
+
+def pack_sentence_batches(sentences, token_budget=None, max_sentences=None):
+    """Group sentences so each batch's estimated output fits the token budget"""
+    token_budget = token_budget or GLOSS_BATCH_TOKEN_BUDGET
+    max_sentences = max_sentences or GLOSS_BATCH_MAX_SENTENCES
+    batches, current, used = [], [], 0
+    for sentence in sentences:
+        cost = estimate_gloss_tokens(sentence)
+        if current and (used + cost > token_budget or len(current) >= max_sentences):
+            batches.append(current)
+            current, used = [], 0
+        current.append(sentence)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+def parse_batch_gloss(raw, count):
+    """Parse numbered gloss lines. Returns {index: gloss_words} for lines that parsed."""
+    parsed = {}
+    for line in raw.split('\n'):
+        m = BATCH_LINE_RE.match(line)
+        if not m:
+            continue
+        idx = int(m.group(1)) - 1
+        if 0 <= idx < count and idx not in parsed:
+            gloss_words = parse_gloss_line(m.group(2).strip())
+            if gloss_words:
+                parsed[idx] = gloss_words
+    return parsed
+
+
+def groq_gloss_batch(sentences, language="isl", deadline=None):
+    """Gloss a packed batch in one Groq call. Returns {index: gloss_words}."""
+    try:
+        prompt = build_batch_gloss_prompt(sentences, language)
+        system_prompt = SYSTEM_PROMPTS.get(language, SYSTEM_PROMPTS["isl"])
+        max_tokens = min(4000, int(sum(estimate_gloss_tokens(s) for s in sentences) * 1.5) + 50)
+
+        response = groq_chat(
+            deadline=deadline,
+            model=GROQ_MODEL,
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0,
+            max_tokens=max_tokens,
+        )
+
+        raw = response.choices[0].message.content.strip()
+        print(f"[BATCH] Raw response ({language}, {len(sentences)} sentences): {raw}")
+        return parse_batch_gloss(raw, len(sentences))
+    except Exception as e:
+        print(f"[BATCH ERROR] {e}")
+    return {}
+
+
+def llm_to_gloss_batch(sentences, language="isl", deadline=None):
+    """Gloss many sentences with as few Groq calls as possible.
+    Returns one gloss word list per input sentence, in order. Cached sentences
+    are skipped, and sentences that fail to parse are re-asked one by one."""
+    results = [None] * len(sentences)
+    pending = {}
+    for i, sentence in enumerate(sentences):
+        cached = gloss_cache.get(gloss_cache_key(sentence, language))
+        if cached is None:
+            cached = rule_fast_path(sentence, language)
+        if cached is not None:
+            results[i] = cached
+        else:
+            pending.setdefault(sentence, []).append(i)
+
+    if pending:
+        batches = pack_sentence_batches(list(pending))
+        print(f"[BATCH] {len(sentences)} sentences, {len(pending)} uncached -> {len(batches)} calls")
+        for batch in batches:
+            parsed = groq_gloss_batch(batch, language, deadline) if len(batch) > 1 else {}
+            for j, sentence in enumerate(batch):
+                gloss_words = parsed.get(j)
+                if gloss_words:
+                    gloss_cache.set(gloss_cache_key(sentence, language), gloss_words)
+                else:
+                    # Re-ask only the sentences the packed call did not answer
+                    gloss_words = llm_to_gloss(sentence, language, deadline)
+                for i in pending[sentence]:
+                    results[i] = gloss_words
+
+    return results
+
+
+def gloss_text(text, language="isl", deadline=None):
+    """Gloss raw free text. Sentences and lines are split off first and each is
+    analyzed and verbalized on its own (preprocess_math collapses whitespace, so
+    lines without a final period would merge). Lines with a bypass gloss keep
+    it; the rest go through the batched path."""
+    analyses = [analyze_input(s) for s in split_sentences(text)]
+    pending = [a["llm_text"] for a in analyses if a["gloss_words"] is None]
+    glossed = iter(llm_to_gloss_batch(pending, language, deadline))
+    return [w for a in analyses
+            for w in (a["gloss_words"] if a["gloss_words"] is not None else next(glossed))]
+
+
 # ============================================================
 # TOPIC-WISE STEM STRUCTURING
 # ============================================================
 
-def structure_stem_content(text):
+def structure_stem_content(text, deadline=None):
     """Use Groq to split STEM text into Definition, Formula, Example sections"""
     try:
-        response = groq_client.chat.completions.create(
+        response = groq_chat(
+            deadline=deadline,
             model=GROQ_MODEL,
             messages=[
                 {"role": "system", "content": """You are a STEM content structurer. Given educational text, split it into exactly 3 sections. 
@@ -725,60 +991,329 @@ Keep each section short (1-2 sentences max). If there's no formula, put empty st
 # SIGML FILE MATCHING
 # ============================================================
 
-def match_to_sigml(gloss_words):
-    """Enhanced matching with recursive suffix stripping and synonym checking.
+SIGN_DIR = os.path.join(BASE_DIR, 'static', 'SignFiles')
+SIGN_INDEX_CHECK_INTERVAL = float(os.getenv("SIGN_INDEX_CHECK_INTERVAL", "2"))
+
+# Surface forms -> base tokens, and the English words near the vocabulary that
+# are not typos, generated by build_inflections.py
+INFLECTIONS_FILE = os.path.join(BASE_DIR, 'inflections.json')
+INFLECTION_BASES = sorted(VALID_WORDS | {k.lower() for k in SYNONYM_MAP})
+INFLECTIONS, DICTIONARY_WORDS, INFLECTIONS_META = load_inflections(INFLECTIONS_FILE)
+if INFLECTIONS_META and INFLECTIONS_META.get("inputs") != inflections_fingerprint(INFLECTION_BASES):
+    print("[INFLECT] inflections.json predates words.txt/SYNONYM_MAP changes; run build_inflections.py")
+
+# Sign files, minified in memory. A current packed archive (build_sign_archive.py)
+# replaces the directory: one mmap instead of a thousand small files.
+SIGN_ARCHIVE = os.getenv("SIGN_ARCHIVE", os.path.join(BASE_DIR, 'signs.pack'))
+if archive_is_current(SIGN_ARCHIVE, SIGN_DIR):
+    sign_store = SignStore(SIGN_DIR, archive_path=SIGN_ARCHIVE, check_interval=SIGN_INDEX_CHECK_INTERVAL)
+    sign_source, list_sign_files = SIGN_ARCHIVE, sign_store.file_names
+else:
+    if os.path.exists(SIGN_ARCHIVE):
+        print(f"[SIGNS] {SIGN_ARCHIVE} is older than {SIGN_DIR}; using the directory. "
+              f"Run build_sign_archive.py")
+    sign_store = SignStore(SIGN_DIR, check_interval=SIGN_INDEX_CHECK_INTERVAL)
+    sign_source, list_sign_files = SIGN_DIR, None
+print(f"[SIGNS] Sign store ({sign_store.stats()['source']}): {sign_store.stats()['files']} files, "
+      f"{sign_store.stats()['minified_bytes'] // 1024} KB minified")
+
+sign_index = SignIndex(sign_source, VALID_WORDS, SYNONYM_MAP, inflections=INFLECTIONS,
+                       check_interval=SIGN_INDEX_CHECK_INTERVAL, list_files=list_sign_files)
+print(f"[SIGNS] Indexed {sign_index.stats()['files']} sign files, "
+      f"{sign_index.stats()['resolved_tokens']} resolvable tokens")
+
+# Whole sign sequences merged into one SIGML document for the avatar
+SIGML_BUNDLE_CACHE_SIZE = int(os.getenv("SIGML_BUNDLE_CACHE_SIZE", "256"))
+SIGML_BUNDLE_MAX_SIGNS = int(os.getenv("SIGML_BUNDLE_MAX_SIGNS", "1000"))
+sigml_bundler = SigmlBundler(sign_store, resolve=sign_index.file_for, cache_size=SIGML_BUNDLE_CACHE_SIZE)
+# Estimated sign durations from each sign's HamNoSys, for the playback timeline
+sign_timings = SignTimings(sign_store)
+_timing_start = time.perf_counter()
+print(f"[SIGNS] Timed {sign_timings.preload()} signs in {(time.perf_counter() - _timing_start) * 1000:.0f} ms")
+
+# Common signs the service worker keeps for offline use (/sigml/prefetch)
+SIGN_PRECACHE_LIMIT = int(os.getenv("SIGN_PRECACHE_LIMIT", "400"))
+
+# Numbers and units, preferring numerals and words that have a sign file
+number_words = NumberWords(has_sign=sign_index.lookup, units=UNITS)
+math_verbalizer = MathVerbalizer(MATH_OPS, GREEK_LETTERS, number_to_words, units=number_words.units)
+
+
+# Multi-word phrases signed with one sign. Curated entries cover names whose
+# words aren't all vocabulary; the rest are derived from the sign names below.
+PHRASE_MAP = {
+    "THANK YOU": "thankyou",
+    "ANOTHER TIME": "anothertime",
+    "BEAR WITH IT": "bearwithit",
+    "CHANGE BACK": "changeback",
+    "CHANGE MIND": "changemind",
+    "CLOSED HAND": "closedhand",
+    "COME TO YOU": "cometoyou",
+    "SIT AND MEET": "sitandmeet",
+    "HOW LONG": "howlong_",
+    "HOW MUCH": "howmuch",
+    # Separated sign names with a part that is not a vocabulary word
+    "POST OFFICE": "post_office",
+    "RAILWAY STATION": "railway_station",
+    "NORTH POLE": "north-pole",
+    "ZEBRA CROSSING": "zebra-crossing",
+    "TABLE TENNIS": "table-tennis",
+    "WALL CLOCK": "wall-clock",
+    "LIGHT HOUSE": "light-house",
+    "NOTE BOOK": "note-book",
+    "HEART BEAT": "heart_beat",
+    "LEAFY VEGETABLES": "leafy-vegetables",
+    "CURLY BRACKET": "curly_bracket",
+    "HARD WORKING": "hard_working",
+    "HALF PAST": "half-past",
+    "EXCEPT FOR": "except_for",
+    "WIPE OFF": "wipe-off",
+    "GIVE ME": "give-me",
+    "HELP ME": "help-me",
+    "HELP YOU": "help-you",
+}
+
+# Concatenations that only look like compounds ("fat her")
+NOT_COMPOUNDS = {"father", "understand", "without", "ronehandsign"}
+
+
+def build_phrase_table():
+    """Curated phrases + separated sign names ("come_over") + concatenated sign
+    names split into vocabulary words ("schoolbus") + multi-word STEM concepts
+    that have a sign. Only phrases whose sign resolves are kept.
+
+    A separated name only becomes a phrase when every part is a vocabulary
+    word of two or more letters: handshape names like "c-x" or "h_eat" would
+    otherwise take over the variables in "Y EQUAL C X"."""
+    phrases = {}
+    dictionary = {w for w in VALID_WORDS | {k.lower() for k in SYNONYM_MAP} if w.isalpha()}
+    phrases.update(derive_compounds(VALID_WORDS, dictionary, exclude=NOT_COMPOUNDS))
+    for word in VALID_WORDS:
+        parts = [p for p in re.split(r'[_\-]+', word) if p]
+        if len(parts) > 1 and all(len(p) > 1 and p in dictionary for p in parts):
+            phrases[tuple(p.upper() for p in parts)] = word
+    for concept in STEM_CONCEPTS:
+        parts = concept.split()
+        if len(parts) > 1 and sign_index.lookup(''.join(parts)):
+            phrases[tuple(p.upper() for p in parts)] = ''.join(parts)
+    for phrase, target in PHRASE_MAP.items():
+        phrases[tuple(phrase.split())] = target
+    return {tokens: target for tokens, target in phrases.items() if sign_index.lookup(target)}
+
+
+phrase_matcher = PhraseMatcher(build_phrase_table())
+print(f"[SIGNS] Phrase table: {phrase_matcher.size} multi-word phrases")
+
+# Synonyms that expand to several signs ("SQUARE" -> POWER TWO)
+SYNONYM_EXPANSIONS = {k: v.split() for k, v in SYNONYM_MAP.items() if ' ' in v.strip()}
+
+
+# Fuzzy correction of misspelled gloss tokens ("TEMPERATUR") before they are
+# fingerspelled. Confidence is 1 - distance / token length, so a one-letter
+# edit needs 5 letters and a two-letter edit 10. English words without a sign
+# (DICTIONARY_WORDS: GENE, SOLAR) are never corrected.
+FUZZY_MAX_DISTANCE = int(os.getenv("FUZZY_MAX_DISTANCE", "2"))
+FUZZY_MIN_CONFIDENCE = float(os.getenv("FUZZY_MIN_CONFIDENCE", "0.8"))
+FUZZY_MIN_LENGTH = 5
+
+fuzzy_index = SymSpell(
+    sorted(w for w in VALID_WORDS | {k.lower() for k in SYNONYM_MAP} if w.isalpha() and len(w) >= 3),
+    max_distance=FUZZY_MAX_DISTANCE,
+)
+print(f"[SIGNS] Fuzzy index: {fuzzy_index.stats()['words']} words, {fuzzy_index.stats()['deletes']} deletes")
+
+
+def fuzzy_correct(word):
+    """Closest vocabulary word and its sign for a misspelled token, as a
+    correction dict, or None if nothing is close or confident enough"""
+    token = word.lower()
+    if len(token) < FUZZY_MIN_LENGTH or not token.isalpha() or token in DICTIONARY_WORDS:
+        return None
+    distance, candidates = fuzzy_index.lookup(token)
+    if not distance:
+        return None
+    confidence = 1 - distance / len(token)
+    if confidence < FUZZY_MIN_CONFIDENCE:
+        return None
+    signs = {sign_index.lookup(c) for c in candidates}
+    if len(signs) != 1 or None in signs:
+        # Ambiguous ("CAT" vs "CUT") or no sign on disk: don't guess
+        return None
+    corrected = candidates[0]
+    return {"from": word, "to": corrected.upper(), "sign": signs.pop(),
+            "distance": distance, "confidence": round(confidence, 3)}
+
+
+def match_word_to_sigml(word, corrections=None):
+    """(display token, signs) for one gloss word: the word, a synonym or
+    inflection of it, a fuzzy correction, or fingerspelling"""
+    word_upper = word.upper()
+
+    # 1. Direct, synonym or inflected form (one lookup)
+    match = sign_index.lookup(word_upper)
+    if match:
+        return word_upper, [match]
+
+    # 2. Synonym that is signed as several words
+    if word_upper in SYNONYM_EXPANSIONS:
+        parts = [sign_index.lookup(p) for p in SYNONYM_EXPANSIONS[word_upper]]
+        if all(parts):
+            return ' '.join(SYNONYM_EXPANSIONS[word_upper]), parts
+
+    # 3. Probable typo of a vocabulary word
+    correction = fuzzy_correct(word)
+    if correction:
+        print(f"[FUZZY] {correction['from']} -> {correction['to']} "
+              f"(distance {correction['distance']}, confidence {correction['confidence']})")
+        if corrections is not None:
+            corrections.append({k: v for k, v in correction.items() if k != 'sign'})
+        return correction['to'], [correction['sign']]
+
+    # 4. Fingerspell — verify each letter file exists too
+    letters = []
+    for letter in word.lower():
+        if letter.isalpha():
+            letter_file = sign_index.file_for(letter)
+            if letter_file:
+                letters.append(letter_file)
+            else:
+                print(f"[WARN] No SIGML for letter '{letter}', skipping")
+    return '-'.join(l.upper() for l in letters), letters
+
+
+def scan_phrases(gloss_words):
+    """[(tokens, sign)] for a gloss sequence: multi-word phrases with a single
+    sign get it (longest match wins), everything else gets None"""
+    return [(tokens, sign_index.lookup(phrase_sign) if phrase_sign else None)
+            for tokens, phrase_sign in phrase_matcher.scan(gloss_words)]
+
+
+def resolve_words(scans, words):
+    """Match each distinct word the scans leave to word-by-word matching once,
+    into `words` ({word: (unit, corrections)}); words already there are kept"""
+    pending = dict.fromkeys(word for scan in scans for tokens, sign in scan if not sign for word in tokens)
+    for word in pending:
+        if word not in words:
+            word_corrections = []
+            words[word] = (match_word_to_sigml(word, word_corrections), word_corrections)
+
+
+def units_from_scan(scan, words=None, corrections=None):
+    """Scatter resolved words back over one sentence's phrase scan. Without
+    `words` each word is matched where it stands (one-off calls)."""
+    units = []
+    for tokens, sign in scan:
+        if sign:
+            units.append(('-'.join(t.upper() for t in tokens), [sign]))
+            continue
+        # Lone word, or a phrase whose sign file is gone: word by word
+        for word in tokens:
+            if words is None:
+                units.append(match_word_to_sigml(word, corrections))
+                continue
+            unit, word_corrections = words[word]
+            units.append(unit)
+            if corrections is not None:
+                corrections.extend(word_corrections)
+    return units
+
+
+def match_units(gloss_words, corrections=None, memo=None):
+    """[(display token, signs)] for a gloss sequence, one unit per matched
+    phrase or word. Every sign is verified to have a SIGML file on disk.
+    `memo` (from new_match_memo()) lets a document resolve each distinct
+    word once; a one-off call matches words as it goes, with no memo to fill."""
+    if memo is None:
+        sign_index.refresh()
+        return units_from_scan(scan_phrases(gloss_words), corrections=corrections)
+    scan = scan_phrases(gloss_words)
+    resolve_words([scan], memo['words'])
+    return units_from_scan(scan, memo['words'], corrections)
+
+
+def match_to_sigml(gloss_words, corrections=None):
+    """Enhanced matching with phrase, inflection, synonym and typo checking.
     Every word added is verified to have a valid SIGML file on disk.
     If not, it falls back to fingerspelling."""
-    result = []
-    suffixes = ["ING", "ED", "LY", "ES", "S"]
-    sigml_dir = os.path.join("static", "SignFiles")
-    
-    def sigml_exists(word_lower):
-        """Check if SIGML file actually exists on disk"""
-        return os.path.exists(os.path.join(sigml_dir, f"{word_lower}.sigml"))
-    
-    def find_in_vocab(w):
-        """Check word and its synonyms, but ONLY if the SIGML file exists"""
-        w_lower = w.lower()
-        if w_lower in VALID_WORDS and sigml_exists(w_lower):
-            return w_lower
-        syn = SYNONYM_MAP.get(w.upper())
-        if syn and syn.lower() in VALID_WORDS and sigml_exists(syn.lower()):
-            return syn.lower()
+    return [sign for _, signs in match_units(gloss_words, corrections) for sign in signs]
+
+
+def new_match_memo():
+    """Memo for matching every sentence of one document (a /stream request, an
+    explain bundle): refreshes the sign index once and returns the dict to pass
+    as `memo`. "words" holds each resolved word, "signs" each sign's prefetch
+    entry and duration."""
+    sign_index.refresh()
+    return {'words': {}, 'signs': {}}
+
+
+def build_display(units):
+    """Display text with one space-separated entry per sign: words as matched,
+    multi-sign expansions as words, fingerspelling hyphen-spelled"""
+    return ' '.join(display for display, signs in units if signs)
+
+
+def sign_prefetch_entry(stem):
+    """{"sign", "url", "hash"} for a stem with a sign file, else None"""
+    sign = sign_store.get(stem)
+    if sign is None:
         return None
+    url = f"/SignFiles/{urllib.parse.quote(stem)}{SIGML_EXT}?v={sign.etag}"
+    return {"sign": stem, "url": url, "hash": sign.etag}
+
+
+def sign_prefetch_manifest(stems):
+    """[{"sign", "url", "hash"}] for each distinct stem that has a sign file, in
+    first-seen order. The URLs carry the content hash, so they can be cached for good."""
+    return [entry for entry in map(sign_prefetch_entry, dict.fromkeys(stems)) if entry]
+
+
+def with_sign_metadata(sigml_dict):
+    """Copy of a stored sigml dict with the prefetch manifest and playback
+    timeline of the current sign files"""
+    numbered = sorted((k for k in sigml_dict if k.isdigit()), key=int)
+    signs = [sigml_dict[k] for k in numbered]
+    return dict(sigml_dict, _prefetch=sign_prefetch_manifest(signs), _timeline=sign_timings.timeline(signs))
+
+
+def build_sigml_dicts(gloss_lists, memo=None):
+    """build_sigml_dict for many sentences of one document at once. Phrases are
+    scanned per sentence, then each distinct word and each distinct sign of the
+    whole batch is resolved once and scattered back to the sentences. Pass the
+    document's new_match_memo() to carry resolved words and signs across batches."""
+    if memo is None:
+        memo = new_match_memo()
+    words, sign_meta = memo['words'], memo['signs']
+    scans = [scan_phrases(gloss_words) for gloss_words in gloss_lists]
+    resolve_words(scans, words)
+
+    matched = []
+    for scan in scans:
+        corrections = []
+        units = units_from_scan(scan, words, corrections)
+        matched.append((units, [sign for _, unit_signs in units for sign in unit_signs], corrections))
+    for stem in dict.fromkeys(sign for _, signs, _ in matched for sign in signs):
+        if stem not in sign_meta:
+            sign_meta[stem] = (sign_prefetch_entry(stem), sign_timings.duration(stem))
+
+    sigml_dicts = []
+    for units, signs, corrections in matched:
+        sigml_dict = {}
+        for i, sign in enumerate(signs, start=1):
+            sigml_dict[str(i)] = sign
+        sigml_dict['_display'] = build_display(units)
+        if corrections:
+            sigml_dict['_corrections'] = corrections
+        sigml_dict['_prefetch'] = [sign_meta[s][0] for s in dict.fromkeys(signs) if sign_meta[s][0]]
+        sigml_dict['_timeline'] = sign_timings.timeline_from([sign_meta[s][1] for s in signs])
+        sigml_dicts.append(sigml_dict)
+    return sigml_dicts
 
-    for word in gloss_words:
-        word_upper = word.upper()
-        found = False
-        
-        # 1. Direct or Synonym check
-        match = find_in_vocab(word_upper)
-        if match:
-            result.append(match)
-            continue
-            
-        # 2. Suffix stripping loop
-        temp_word = word_upper
-        for suffix in suffixes:
-            if temp_word.endswith(suffix) and len(temp_word) > len(suffix):
-                root = temp_word[:-len(suffix)]
-                match = find_in_vocab(root)
-                if match:
-                    result.append(match)
-                    found = True
-                    break
-        
-        if found:
-            continue
 
-        # 3. Fingerspell — verify each letter file exists too
-        for letter in word.lower():
-            if letter.isalpha():
-                if sigml_exists(letter):
-                    result.append(letter)
-                else:
-                    print(f"[WARN] No SIGML for letter '{letter}', skipping")
-    return result
+def build_sigml_dict(gloss_words, memo=None):
+    """Numbered signs for avatar playback plus display text, any typo corrections,
+    the prefetch manifest of the signs' URLs and the playback timeline"""
+    return build_sigml_dicts([gloss_words], memo)[0]
 
 
 # ============================================================
@@ -786,61 +1321,34 @@ def match_to_sigml(gloss_words):
 # ============================================================
 
 def load_history():
-    """Load translation history from file"""
-    if os.path.exists(HISTORY_FILE):
-        try:
-            with open(HISTORY_FILE, 'r') as f:
-                return json.load(f)
-        except Exception:
-            return []
-    return []
+    """Translation history, newest first"""
+    return history_store.recent()
 
 
 def save_to_history(entry):
-    """Save a translation to history"""
-    history = load_history()
-    history.insert(0, entry)
-    # Keep only last 50 entries
-    history = history[:50]
-    with open(HISTORY_FILE, 'w') as f:
-        json.dump(history, f, indent=2)
+    """Queue a translation for the history; the write happens off the request thread"""
+    history_store.add(entry)
 
 
 # ============================================================
-# FLASK ROUTES
+# INPUT ANALYSIS & TRANSLATION BUILDING
 # ============================================================
 
-final_words_dict = {}
-
-
-def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
-
-
-@app.route('/', methods=['GET', 'POST'])
-def index():
-    if request.method == 'GET':
-        return render_template('index.html')
-
-    # POST - translate text
-    global final_words_dict
-    final_words_dict = {}
+# A bullet at the start of a line ("- ", "* ", "• "); "-5" and "- 5" stay minus
+LIST_MARKER_RE = re.compile(r'^[-*•‣▪]\s+(?=\D)')
 
-    text = request.form.get('text')
-    language = request.form.get('language', 'asl')
-
-    print(f"\n{'='*50}")
-    print(f"Input: {text} | Language: {language}")
-    print(f"{'='*50}")
-
-    if not text or text.strip() == "":
-        return ""
 
+def analyze_input(text_clean):
+    """Formula/concept detection for one input. Returns the bypass gloss when
+    the LLM can be skipped, otherwise the preprocessed text to send to it."""
+    # A bullet is layout, not a minus or times sign
+    text_clean = LIST_MARKER_RE.sub('', text_clean)
     # Step 0: Check if input is a known chemical formula (bypass LLM)
-    text_clean = text.strip()
     text_key = text_clean.lower().replace(' ', '')
     is_formula = False
     formula_key = None
+    gloss_words = None
+    llm_text = None
     if text_key in CHEM_FORMULAS:
         expansion = CHEM_FORMULAS[text_key]
         gloss_words = [w.upper() for w in expansion.split() if w.strip()]
@@ -851,30 +1359,18 @@ def index():
     else:
         # Step 0b: Check if input is a known physics formula (bypass LLM)
         physics_matched = False
-        input_normalized = text_key.replace('^', '').replace('²', '2').replace('³', '3')
-        for formula, expansion in PHYSICS_FORMULAS.items():
-            formula_normalized = formula.replace('^', '').replace('²', '2').replace('³', '3').replace(' ', '')
-            if input_normalized == formula_normalized:
-                gloss_words = [w.upper() for w in expansion.split() if w.strip()]
-                print(f"[PHYSICS BYPASS] '{text_clean}' -> {gloss_words}")
-                physics_matched = True
-                is_formula = True
-                # Find canonical key for FORMULA_CONTEXT lookup
-                canon = formula.replace('^', '').replace('²', '2').replace('³', '3').replace(' ', '')
-                for ctx_key in FORMULA_CONTEXT:
-                    if ctx_key.replace(' ', '') == canon:
-                        formula_key = ctx_key
-                        break
-                break
+        physics = formula_index.physics_exact(text_key)
+        if physics:
+            expansion, formula_key = physics
+            gloss_words = [w.upper() for w in expansion.split() if w.strip()]
+            print(f"[PHYSICS BYPASS] '{text_clean}' -> {gloss_words}")
+            physics_matched = True
+            is_formula = True
 
         if not physics_matched:
             # Step 0c: Check if input contains complex STEM concepts or is a question
             text_lower = text_clean.lower().strip()
-            concept_found = None
-            for concept in STEM_CONCEPTS:
-                if concept in text_lower:
-                    concept_found = concept
-                    break
+            concept_found = concept_matcher.first(text_lower)
             
             # Step 0d: Heuristic for general STEM questions
             is_question = text_lower.startswith(('what', 'how', 'explain', 'tell me about', 'define'))
@@ -898,31 +1394,82 @@ def index():
                 print(f"[ALGEBRA BYPASS] '{text_clean}' -> {gloss_words}")
             else:
                 # Preprocess math characters before sending to LLM to preserve operators
-                text_to_llm = preprocess_math(text_clean)
-                gloss_words = llm_to_gloss(text_to_llm, language)
+                llm_text = preprocess_math(text_clean)
 
-    # Step 2: Match gloss words to SIGML files
-    sigml_sequence = match_to_sigml(gloss_words)
 
-    print(f"[SIGML] Sequence: {sigml_sequence}")
+    return {
+        "gloss_words": gloss_words,
+        "llm_text": llm_text,
+        "is_formula": is_formula,
+        "formula_key": formula_key,
+    }
 
-    # Build response dict
-    for i, word in enumerate(sigml_sequence, start=1):
-        final_words_dict[str(i)] = word
 
-    # NOTE: Do NOT uppercase single-letter words.
-    # SIGML files are stored lowercase (a.sigml, c.sigml, etc.)
-    # Uppercasing causes 404 errors on the browser side.
+def build_translations(items, memo=None):
+    """Match a batch of (gloss_words, text_clean, analysis) to SIGML and build
+    the response dicts used by the avatar, one per item. The batch is matched
+    together (build_sigml_dicts); pass the document's new_match_memo() to share
+    resolved words and signs across batches."""
+    # NOTE: Do NOT change the case of sign names. They are the real file
+    # stems (letters are A.sigml..Z.sigml); another case 404s in the browser.
+    words_dicts = build_sigml_dicts([gloss_words for gloss_words, _, _ in items], memo)
+
+    for (_, text_clean, analysis), words_dict in zip(items, words_dicts):
+        print(f"[SIGML] Sequence: {[v for k, v in words_dict.items() if not k.startswith('_')]}")
+
+        # Flag if input was a STEM formula (enables "Explain" button on frontend)
+        if analysis["is_formula"]:
+            words_dict['_is_formula'] = True
+            words_dict['_formula_input'] = text_clean
+            if analysis["formula_key"]:
+                words_dict['_formula_key'] = analysis["formula_key"]
+
+    return words_dicts
+
+
+def build_translation(gloss_words, text_clean, analysis, memo=None):
+    """build_translations for a single input"""
+    return build_translations([(gloss_words, text_clean, analysis)], memo)[0]
+
+
+# ============================================================
+# FLASK ROUTES
+# ============================================================
+
+final_words_dict = {}
 
-    # Add display text
-    display_parts = []
-    for word in gloss_words:
-        word_lower = word.lower()
-        if word_lower in VALID_WORDS:
-            display_parts.append(word.upper())
-        else:
-            display_parts.append('-'.join(word.upper()))
-    final_words_dict['_display'] = ' '.join(display_parts)
+
+def allowed_file(filename):
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+
+
+@app.route('/', methods=['GET', 'POST'])
+def index():
+    if request.method == 'GET':
+        return render_template('index.html')
+
+    # POST - translate text
+    global final_words_dict
+    final_words_dict = {}
+
+    text = request.form.get('text')
+    language = request.form.get('language', 'asl')
+
+    print(f"\n{'='*50}")
+    print(f"Input: {text} | Language: {language}")
+    print(f"{'='*50}")
+
+    if not text or text.strip() == "":
+        return ""
+
+    text_clean = text.strip()
+    analysis = analyze_input(text_clean)
+    gloss_words = analysis["gloss_words"]
+    if gloss_words is None:
+        gloss_words = gloss_text(text_clean, language, new_deadline())
+
+    # Step 2: Match gloss words to SIGML files
+    final_words_dict = build_translation(gloss_words, text_clean, analysis)
 
     print(f"[DISPLAY] {final_words_dict['_display']}")
     print(f"[OUTPUT] {final_words_dict}")
@@ -936,16 +1483,90 @@ def index():
         "timestamp": datetime.datetime.now().isoformat()
     })
 
-    # Flag if input was a STEM formula (enables "Explain" button on frontend)
-    if is_formula:
-        final_words_dict['_is_formula'] = True
-        final_words_dict['_formula_input'] = text_clean
-        if formula_key:
-            final_words_dict['_formula_key'] = formula_key
-
     return jsonify(final_words_dict)
 
 
+def stream_translations(sentences, language):
+    """Yield groups of (index, gloss_words, analysis), in sentence order, as soon
+    as each group is glossed. The first LLM sentence is glossed alone so signing
+    can start quickly; the rest are packed into batched gloss calls, and each
+    packed call's sentences come out as one group."""
+    analyses = [analyze_input(s) for s in sentences]
+    first_llm_done = False
+    i = 0
+    while i < len(sentences):
+        analysis = analyses[i]
+        if analysis["gloss_words"] is not None:
+            yield [(i, analysis["gloss_words"], analysis)]
+            i += 1
+            continue
+
+        if not first_llm_done:
+            first_llm_done = True
+            yield [(i, llm_to_gloss(analysis["llm_text"], language, new_deadline()), analysis)]
+            i += 1
+            continue
+
+        # Consecutive LLM-bound sentences starting at i, cut to one packed call
+        run = []
+        j = i
+        while j < len(sentences) and analyses[j]["gloss_words"] is None:
+            run.append(analyses[j]["llm_text"])
+            j += 1
+        batch = pack_sentence_batches(run)[0]
+        # Each packed call gets its own budget; a long stream is not one request
+        glosses = llm_to_gloss_batch(batch, language, new_deadline())
+        yield [(i + offset, gloss_words, analyses[i + offset]) for offset, gloss_words in enumerate(glosses)]
+        i += len(batch)
+
+
+@app.route('/stream', methods=['POST'])
+def stream_index():
+    """Streaming variant of index(): one NDJSON record per sentence.
+    Each record carries its sequence index so the client can start signing
+    sentence 0 while later sentences are still being glossed."""
+    text = request.form.get('text', '')
+    language = request.form.get('language', 'asl')
+    # The client's own sentence list (repeated "sentence" fields) keeps each
+    # record's seq aligned with what it shows; otherwise split the text here
+    sentences = request.form.getlist('sentence') or split_sentences(text)
+
+    print(f"\n{'='*50}")
+    print(f"[STREAM] {len(sentences)} sentences | Language: {language}")
+    print(f"{'='*50}")
+
+    def generate():
+        all_gloss = []
+        all_display = []
+        # Words and signs repeat across a document; resolve each one once per request
+        match_memo = new_match_memo()
+        for group in stream_translations(sentences, language):
+            translations = build_translations(
+                [(gloss_words, sentences[seq], analysis) for seq, gloss_words, analysis in group], match_memo)
+            for (seq, gloss_words, _), translation in zip(group, translations):
+                all_gloss.append(' '.join(gloss_words))
+                all_display.append(translation['_display'])
+                yield json.dumps({
+                    "seq": seq,
+                    "total": len(sentences),
+                    "input": sentences[seq],
+                    "translation": translation,
+                }) + '\n'
+
+        if sentences:
+            save_to_history({
+                "input": text,
+                "language": language,
+                "gloss": ' '.join(all_gloss),
+                "display": ' '.join(all_display),
+                "timestamp": datetime.datetime.now().isoformat()
+            })
+        yield json.dumps({"done": True, "total": len(sentences)}) + '\n'
+
+    return Response(generate(), mimetype='application/x-ndjson',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
 @app.route('/upload', methods=['POST'])
 def upload_file():
     """Handle file upload and extract text"""
@@ -993,7 +1614,7 @@ def structure_content():
     if not text.strip():
         return jsonify({"error": "No text provided"}), 400
 
-    result = structure_stem_content(text)
+    result = structure_stem_content(text, new_deadline())
     return jsonify(result)
 
 
@@ -1014,9 +1635,11 @@ def ask_doubt():
     print(f"[DOUBT] Question: {question} | Language: {language}")
     print(f"{'='*50}")
 
+    deadline = new_deadline()
     try:
         # Step 1: Get a simple answer using Groq
-        answer_response = groq_client.chat.completions.create(
+        answer_response = groq_chat(
+            deadline=deadline,
             model=GROQ_MODEL,
             messages=[
                 {"role": "system", "content": "You are a helpful STEM tutor. Give very short, simple answers in 1-2 sentences maximum. Use easy words. No jargon. Explain like you're talking to a 10 year old."},
@@ -1029,24 +1652,10 @@ def ask_doubt():
         print(f"[DOUBT] Answer: {answer_text}")
 
         # Step 2: Convert the answer to sign language gloss
-        gloss_words = llm_to_gloss(answer_text, language)
-
-        # Step 3: Match gloss to SIGML
-        sigml_sequence = match_to_sigml(gloss_words)
+        gloss_words = llm_to_gloss(answer_text, language, deadline)
 
-        # Build response dict for avatar playback
-        for i, word in enumerate(sigml_sequence, start=1):
-            final_words_dict[str(i)] = word
-
-        # Add display text
-        display_parts = []
-        for word in gloss_words:
-            word_lower = word.lower()
-            if word_lower in VALID_WORDS:
-                display_parts.append(word.upper())
-            else:
-                display_parts.append('-'.join(word.upper()))
-        final_words_dict['_display'] = ' '.join(display_parts)
+        # Step 3: Match gloss to SIGML (response dict for avatar playback)
+        final_words_dict = build_sigml_dict(gloss_words)
 
         print(f"[DOUBT] Gloss: {final_words_dict['_display']}")
 
@@ -1065,6 +1674,10 @@ def ask_doubt():
             "translation": final_words_dict
         })
 
+    except (CircuitOpenError, DeadlineExceeded, TimeoutError) as e:
+        # No local way to answer a free-form question; fail fast instead of hanging
+        print(f"[DOUBT UNAVAILABLE] {e}")
+        return jsonify({"error": "Answer service is temporarily unavailable, please try again shortly"}), 503
     except Exception as e:
         print(f"[DOUBT ERROR] {e}")
         return jsonify({"error": f"Failed to process question: {str(e)}"}), 500
@@ -1082,7 +1695,8 @@ def structure_topic_content():
     print(f"[TOPIC] Structuring content: {text[:50]}...")
 
     try:
-        response = groq_client.chat.completions.create(
+        response = groq_chat(
+            deadline=new_deadline(),
             model=GROQ_MODEL,
             messages=[
                 {"role": "system", "content": """You are a STEM content organizer. 
@@ -1130,6 +1744,110 @@ def export_lesson():
     return jsonify(lesson)
 
 
+# Bounded pool for per-step glossing in /explain
+EXPLAIN_WORKERS = int(os.getenv("EXPLAIN_WORKERS", "8"))
+explain_executor = ThreadPoolExecutor(max_workers=EXPLAIN_WORKERS, thread_name_prefix='explain')
+
+
+def translate_step(step, language, deadline=None):
+    """Gloss and match one explanation step. Errors stay local to the step."""
+    try:
+        gloss_words = llm_to_gloss(step['text'], language, deadline)
+
+        step['gloss'] = ' '.join(gloss_words)
+        step['sigml'] = build_sigml_dict(gloss_words)
+        step['status'] = 'ok'
+    except Exception as e:
+        print(f"[EXPLAIN STEP ERROR] {step.get('label')}: {e}")
+        step['gloss'] = ''
+        step['sigml'] = None
+        step['status'] = 'error'
+        step['error'] = str(e)
+    return step
+
+
+def context_steps(context):
+    """Explanation steps from a FORMULA_CONTEXT entry"""
+    steps = [{'label': '📌 What is this?', 'text': f"This is {context['name']}."}]
+    for var, meaning in context['variables'].items():
+        steps.append({'label': f'🔤 {var} means', 'text': meaning})
+    steps.append({'label': '🧠 Why?', 'text': context['meaning']})
+    steps.append({'label': '🌍 Real-world Example', 'text': context['example']})
+    return steps
+
+
+def find_formula_context(formula_input):
+    """FORMULA_CONTEXT key whose formula or name matches the input, ignoring case and spaces"""
+    return formula_index.context_key(formula_input)
+
+
+# ============================================================
+# PRECOMPILED EXPLANATION BUNDLES
+# ============================================================
+
+EXPLAIN_BUNDLES_PATH = os.getenv("EXPLAIN_BUNDLES_PATH", os.path.join(BASE_DIR, 'explain_bundles.json'))
+EXPLAIN_LANGUAGES = ("isl", "asl")
+
+# Everything besides the context text that shapes a bundle: gloss prompts,
+# model, and the vocabulary/synonyms/sign files/phrases the matcher resolves against.
+EXPLAIN_BUNDLE_VERSION = hashlib.sha1(json.dumps([
+    GLOSS_PROMPT_VERSION,
+    GROQ_MODEL,
+    sorted(VALID_WORDS),
+    SYNONYM_MAP,
+    sign_index.stems(),
+    INFLECTIONS_META,
+    PHRASE_MAP,
+    [FUZZY_MAX_DISTANCE, FUZZY_MIN_CONFIDENCE, FUZZY_MIN_LENGTH, len(DICTIONARY_WORDS)],
+]).encode('utf-8')).hexdigest()[:12]
+
+explain_bundles = ExplainBundles(EXPLAIN_BUNDLES_PATH, EXPLAIN_BUNDLE_VERSION)
+
+
+def bundle_gloss(text, language, deadline=None):
+    """Gloss for a bundle: cached or fresh LLM output only, never the rule engine,
+    so a bundle built while Groq is down doesn't pin a fallback gloss."""
+    cache_key = gloss_cache_key(text, language)
+    gloss_words = gloss_cache.get(cache_key)
+    if gloss_words is None:
+        gloss_words = groq_gloss(text, language, deadline)
+        if gloss_words:
+            gloss_cache.set(cache_key, gloss_words)
+    return gloss_words
+
+
+def build_explain_bundle(formula_key, language, deadline=None):
+    """Gloss and match every step of one FORMULA_CONTEXT entry and store it.
+    Returns the steps, or None if any step could not get an LLM gloss."""
+    context = FORMULA_CONTEXT[formula_key]
+    steps = context_steps(context)
+    glosses = list(explain_executor.map(lambda step: bundle_gloss(step['text'], language, deadline), steps))
+    if not all(glosses):
+        print(f"[BUNDLES] Not storing '{formula_key}' ({language}): LLM gloss unavailable")
+        return None
+
+    for step, gloss_words, sigml_dict in zip(steps, glosses, build_sigml_dicts(glosses)):
+        step['gloss'] = ' '.join(gloss_words)
+        step['sigml'] = sigml_dict
+        step['status'] = 'ok'
+        # Sign hashes and timings change when a sign file is edited; explain_bundle() adds fresh ones
+        del step['sigml']['_prefetch'], step['sigml']['_timeline']
+
+    explain_bundles.put(language, formula_key, context, steps)
+    print(f"[BUNDLES] Built '{formula_key}' ({language}), {len(steps)} steps")
+    return steps
+
+
+def explain_bundle(formula_key, language, deadline=None):
+    """Prebuilt steps for a FORMULA_CONTEXT entry, building them on first use"""
+    steps = explain_bundles.get(language, formula_key, FORMULA_CONTEXT[formula_key])
+    if steps is None:
+        steps = build_explain_bundle(formula_key, language, deadline)
+    if steps is None:
+        return None
+    return [dict(step, sigml=with_sign_metadata(step['sigml'])) if step.get('sigml') else step for step in steps]
+
+
 @app.route('/explain', methods=['POST'])
 def explain_formula():
     """Concept Understanding Mode: Explain a STEM formula step-by-step"""
@@ -1147,43 +1865,28 @@ def explain_formula():
 
     # Step 1: Look up pre-built context if available
     context = FORMULA_CONTEXT.get(formula_key, None)
+    deadline = new_deadline()
 
     steps = []
 
     if context:
         # Use pre-built context (fast, no LLM needed)
         print(f"[EXPLAIN] Using pre-built context for '{formula_key}'")
-
-        # Step A: Formula name
-        steps.append({
-            'label': '📌 What is this?',
-            'text': f"This is {context['name']}.",
-        })
-
-        # Step B: Each variable explained
-        for var, meaning in context['variables'].items():
-            steps.append({
-                'label': f'🔤 {var} means',
-                'text': meaning,
+        bundled = explain_bundle(formula_key, language, deadline)
+        if bundled is not None:
+            return jsonify({
+                'formula': formula_input,
+                'formula_name': context['name'],
+                'steps': bundled,
             })
-
-        # Step C: What it means
-        steps.append({
-            'label': '🧠 Why?',
-            'text': context['meaning'],
-        })
-
-        # Step D: Real-world example
-        steps.append({
-            'label': '🌍 Real-world Example',
-            'text': context['example'],
-        })
+        steps = context_steps(context)
 
     else:
         # LLM fallback for formulas not in FORMULA_CONTEXT
         print(f"[EXPLAIN] LLM fallback for '{formula_input}'")
         try:
-            response = groq_client.chat.completions.create(
+            response = groq_chat(
+                deadline=deadline,
                 model=GROQ_MODEL,
                 messages=[
                     {"role": "system", "content": "You are a STEM teacher for deaf students. Explain complex concepts or formulas in very simple language. Be concise. Break it down into clear steps."},
@@ -1222,32 +1925,24 @@ If it's a general concept (like Photosynthesis) rather than a math formula, use
 
         except Exception as e:
             print(f"[EXPLAIN ERROR] {e}")
-            return jsonify({"error": f"Failed to explain: {str(e)}"}), 500
-
-    # Step 2: Translate each explanation step to sign gloss
-    for step in steps:
-        gloss_words = llm_to_gloss(step['text'], language)
-        sigml_sequence = match_to_sigml(gloss_words)
-
-        # Build sigml dict for avatar playback
-        sigml_dict = {}
-        for i, word in enumerate(sigml_sequence, start=1):
-            sigml_dict[str(i)] = word
-
-        # Build display
-        display_parts = []
-        for word in gloss_words:
-            word_lower = word.lower()
-            if word_lower in VALID_WORDS:
-                display_parts.append(word.upper())
-            else:
-                display_parts.append('-'.join(word.upper()))
-        sigml_dict['_display'] = ' '.join(display_parts)
-
-        step['gloss'] = ' '.join(gloss_words)
-        step['sigml'] = sigml_dict
-
-    print(f"[EXPLAIN] Generated {len(steps)} explanation steps")
+            # Local fallback: the input may still name a formula we have context for
+            fallback_key = find_formula_context(formula_input)
+            if fallback_key is None:
+                status = 503 if isinstance(e, (CircuitOpenError, DeadlineExceeded, TimeoutError)) else 500
+                return jsonify({"error": f"Failed to explain: {str(e)}"}), status
+            context = FORMULA_CONTEXT[fallback_key]
+            print(f"[EXPLAIN] Falling back to pre-built context '{context['name']}'")
+            bundled = explain_bundles.get(language, fallback_key, context)
+            if bundled is not None:
+                return jsonify({'formula': formula_input, 'formula_name': context['name'], 'steps': bundled})
+            steps = context_steps(context)
+
+    # Step 2: Translate all explanation steps to sign gloss concurrently.
+    # map() keeps the original step order; each step carries its own status.
+    steps = list(explain_executor.map(lambda step: translate_step(step, language, deadline), steps))
+
+    failed = sum(1 for step in steps if step['status'] != 'ok')
+    print(f"[EXPLAIN] Generated {len(steps)} explanation steps ({failed} failed)")
 
     return jsonify({
         'formula': formula_input,
@@ -1307,7 +2002,7 @@ def get_learn_words():
     
     for word in words:
         # Build sigml dict for avatar playback
-        sigml_dict = {"1": word.lower()}
+        sigml_dict = with_sign_metadata({"1": word.lower()})
         result.append({
             "word": word,
             "sigml": sigml_dict
@@ -1338,7 +2033,7 @@ def get_learn_quiz():
     
     return jsonify({
         "question_word": correct_word,
-        "sigml": {"1": correct_word.lower()},
+        "sigml": with_sign_metadata({"1": correct_word.lower()}),
         "options": options,
         "correct_index": options.index(correct_word)
     })
@@ -1350,9 +2045,162 @@ def get_history():
     return jsonify(history)
 
 
+@app.route('/status', methods=['GET'])
+def get_status():
+    """Runtime counters for caches and upstream calls"""
+    return jsonify({
+        "model": GROQ_MODEL,
+        "prompt_version": GLOSS_PROMPT_VERSION,
+        "gloss_cache": gloss_cache.stats(),
+        "history": history_store.stats(),
+        "llm_coalescing": llm_flight.stats(),
+        "groq_breaker": groq_breaker.stats(),
+        "explain_bundles": explain_bundles.stats(),
+        "sign_index": dict(sign_index.stats(), phrases=phrase_matcher.size),
+        "sigml_bundles": sigml_bundler.stats(),
+        "sign_store": sign_store.stats(),
+        "sign_timing": sign_timings.stats(),
+        "static_assets": static_assets.stats(),
+        "fuzzy": dict(fuzzy_index.stats(), max_distance=FUZZY_MAX_DISTANCE,
+                      min_confidence=FUZZY_MIN_CONFIDENCE),
+        "formulas": formula_index.stats(),
+        "numbers": number_words.stats(),
+        "concepts": concept_matcher.stats(),
+        "math_gloss": dict(math_verbalizer.stats(), texts_cached=preprocess_math.cache_info().currsize,
+                           text_hits=preprocess_math.cache_info().hits),
+        "rule_gloss": dict(rule_gloss_stats, tagger=tagger_name(),
+                           min_confidence=RULE_GLOSS_MIN_CONFIDENCE),
+    })
+
+
+@app.route('/sigml/bundle', methods=['POST'])
+def sigml_bundle():
+    """One merged SIGML document for a sign sequence, so the avatar needs one
+    request per sentence instead of one per sign. Accepts {"signs": [...]} or
+    the numbered dict returned by index()/stream."""
+    data = request.get_json(silent=True) or {}
+    signs = data.get('signs')
+    if signs is None:
+        numbered = [k for k in data if str(k).isdigit()]
+        signs = [data[k] for k in sorted(numbered, key=int)]
+    if not isinstance(signs, list):
+        return jsonify({"error": "signs must be a list"}), 400
+    if len(signs) > SIGML_BUNDLE_MAX_SIGNS:
+        return jsonify({"error": f"At most {SIGML_BUNDLE_MAX_SIGNS} signs per bundle"}), 400
+
+    sign_index.refresh()
+    sign_store.refresh()
+    bundle = sigml_bundler.bundle(signs)
+    if bundle["missing"]:
+        print(f"[BUNDLE] No SIGML for {bundle['missing']}")
+    return jsonify(bundle)
+
+
+def common_sign_stems():
+    """Signs worth keeping offline, most useful first: fingerspelling letters and
+    digits (the fallback for any unknown word), the Learn vocabulary, then the
+    signs used most in the translation history"""
+    common = [s for s in sign_index.stems() if len(s) == 1 and s.isalnum()]
+    common += [w for words in SIGN_CATEGORIES.values() for w in words]
+    used = collections.Counter(
+        word for entry in load_history()
+        for word in re.split(r'[\s-]+', entry.get('display', '')) if word)
+    common += [word for word, _ in used.most_common()]
+    return [stem for stem in map(sign_index.file_for, common) if stem]
+
+
+@app.route('/sigml/prefetch', methods=['GET'])
+def sigml_prefetch():
+    """Prefetch manifest of the common signs; the service worker caches these
+    when it installs so the core vocabulary plays offline"""
+    sign_index.refresh()
+    sign_store.refresh()
+    limit = request.args.get('limit', type=int) or SIGN_PRECACHE_LIMIT
+    manifest = sign_prefetch_manifest(common_sign_stems())[:min(limit, SIGN_PRECACHE_LIMIT)]
+    return jsonify({"signs": manifest})
+
+
+@app.route('/sign-sw.js')
+def sign_service_worker():
+    """The sign cache service worker, served from the root so its scope covers /SignFiles/"""
+    return send_static_asset('js/sign-sw.js')
+
+
+# Precompressed static files from build_static_assets.py. URLs built with
+# url_for('static', ...) carry the content hash and are cached as immutable.
+STATIC_DIR = os.path.join(BASE_DIR, 'static')
+STATIC_BUILD_DIR = os.getenv("STATIC_BUILD_DIR", os.path.join(BASE_DIR, 'static_build'))
+STATIC_IMMUTABLE_MAX_AGE = int(os.getenv("STATIC_IMMUTABLE_MAX_AGE", str(365 * 24 * 3600)))
+static_assets = StaticAssets(STATIC_DIR, STATIC_BUILD_DIR)
+
+
+@app.url_defaults
+def fingerprint_static_urls(endpoint, values):
+    if endpoint == 'static' and 'filename' in values and 'v' not in values:
+        version = static_assets.version(values['filename'])
+        if version:
+            values['v'] = version
+
+
+def send_sign(path, sign):
+    """A minified sign file straight from the sign store, same caching rules as send_static_asset()"""
+    packed = sign.gzip if sign.gzip and 'gzip' in accepted_encodings(request.headers.get('Accept-Encoding')) else None
+    # An archive-backed body is a memoryview; WSGI servers only write bytes
+    response = Response(packed or bytes(sign.body), mimetype=mimetypes.guess_type(path)[0] or 'application/octet-stream')
+    response.set_etag(f"{sign.etag}-gzip" if packed else sign.etag)
+    if packed:
+        response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    if request.args.get('v') == sign.etag:
+        response.cache_control.public = True
+        response.cache_control.max_age = STATIC_IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
+def send_static_asset(path):
+    """A static file in the best encoding the client accepts, with a strong ETag
+    (304 on If-None-Match). Fingerprinted URLs (?v=<content hash>) are immutable;
+    everything else is revalidated. Files missing from the manifest are served as before.
+    Sign files come from the in-memory sign store."""
+    key = normalize_path(path) or ''
+    folder, _, name = key.partition('/')
+    if folder == 'SignFiles' and name.endswith(SIGML_EXT) and '/' not in name:
+        sign_store.refresh()
+        sign = sign_store.get(name[:-len(SIGML_EXT)])
+        if sign is not None:
+            return send_sign(path, sign)
+
+    selected = static_assets.select(path, request.headers.get('Accept-Encoding', ''))
+    if selected is None:
+        return send_from_directory(STATIC_DIR, path)
+    file_path, encoding, etag, version = selected
+    mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    fingerprinted = request.args.get('v') == version
+    # Without max_age, send_file marks the response no-cache (always revalidate)
+    response = send_file(file_path, mimetype=mimetype, etag=etag, conditional=True,
+                         max_age=STATIC_IMMUTABLE_MAX_AGE if fingerprinted else None)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    if fingerprinted:
+        response.cache_control.immutable = True
+    return response
+
+
+def static_file(filename):
+    return send_static_asset(filename)
+
+
+# Flask's own static route (static_url_path='') goes through the same path
+app.view_functions['static'] = static_file
+
+
 @app.route('/static/<path:path>')
 def serve_signfiles(path):
-    return send_from_directory('static', path)
+    return send_static_asset(path)
 
 
 @app.route('/jas-proxy/<path:path>')
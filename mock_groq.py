@@ -0,0 +1,303 @@
+"""
+Local stand-in for the Groq chat completions API, for load testing without quota.
+
+Point the app at it with GROQ_BASE_URL:
+    python mock_groq.py --port 8090 --latency 0.4 --jitter 0.2 --error-rate 0.02
+    GROQ_BASE_URL=http://127.0.0.1:8090 GROQ_API_KEY=mock python main.py
+
+Modes:
+    replay     answer from the cassette; misses get a synthetic answer (or 404 with --strict)
+    record     forward to the real Groq API (needs GROQ_API_KEY) and save answers to the cassette
+    synthetic  never read the cassette; answer every prompt locally
+
+Synthetic answers are shaped like the real ones for each prompt the app sends:
+single and numbered-batch gloss (via the offline rule engine), /structure JSON,
+/ask short answers and /explain JSON. GET /stats returns request counters.
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from utils.rule_gloss import rule_gloss
+
+CHAT_PATH = '/openai/v1/chat/completions'
+UPSTREAM_URL = 'https://api.groq.com' + CHAT_PATH
+DEFAULT_CASSETTE = os.path.join('cassettes', 'groq.json')
+
+# Fields that decide the answer; everything else (timeout, stream, ...) is ignored
+KEY_FIELDS = ('model', 'messages', 'temperature', 'max_tokens', 'response_format')
+
+BATCH_LINE_RE = re.compile(r'^\s*(\d+)\.\s+(.*)$')
+
+
+def request_key(body):
+    raw = json.dumps({k: body.get(k) for k in KEY_FIELDS}, sort_keys=True)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def classify(messages):
+    """Which app prompt this is: gloss, gloss_batch, structure, topic, ask or explain"""
+    system = next((m['content'] for m in messages if m.get('role') == 'system'), '')
+    user = next((m['content'] for m in reversed(messages) if m.get('role') == 'user'), '')
+    if 'Sign Language' in system:
+        return 'gloss_batch' if 'numbered' in user else 'gloss'
+    if 'content structurer' in system:
+        return 'structure'
+    if 'content organizer' in system:
+        return 'topic'
+    if 'STEM tutor' in system:
+        return 'ask'
+    if 'STEM teacher' in system:
+        return 'explain'
+    return 'other'
+
+
+# ============================================================
+# SYNTHETIC ANSWERS
+# ============================================================
+
+def _gloss_line(text, language):
+    words = rule_gloss(text, language)['gloss_words']
+    return ' '.join(words) or 'UNKNOWN'
+
+
+def synthesize(kind, messages):
+    system = next((m['content'] for m in messages if m.get('role') == 'system'), '')
+    user = next((m['content'] for m in reversed(messages) if m.get('role') == 'user'), '')
+    language = 'asl' if 'ASL' in system else 'isl'
+
+    if kind == 'gloss':
+        match = re.search(r'^Text: (.*)$', user, re.MULTILINE)
+        return _gloss_line(match.group(1) if match else user, language)
+
+    if kind == 'gloss_batch':
+        section = user.split('Sentences:', 1)[-1].split('Gloss:', 1)[0]
+        lines = []
+        for line in section.splitlines():
+            match = BATCH_LINE_RE.match(line)
+            if match:
+                lines.append(f"{match.group(1)}. {_gloss_line(match.group(2), language)}")
+        return '\n'.join(lines)
+
+    if kind in ('structure', 'topic'):
+        text = user.split('\n\n', 1)[-1] if kind == 'structure' else user
+        sentences = [s for s in re.split(r'(?<=[.!?])\s+', text.strip()) if s]
+        formula = next((s for s in sentences if '=' in s), '')
+        return json.dumps({
+            "definition": sentences[0] if sentences else text,
+            "formula": formula if kind == 'structure' else (formula or 'Not detected'),
+            "example": sentences[-1] if len(sentences) > 1 else 'Not detected',
+        })
+
+    if kind == 'ask':
+        topic = re.sub(r'[?.!]+$', '', user.strip())
+        return f"{topic} is a simple idea in science. We can see it in everyday life."
+
+    if kind == 'explain':
+        match = re.search(r'step by step: (.*)', user)
+        concept = match.group(1).strip() if match else 'this concept'
+        parts = [p for p in re.split(r'[=+\-*/^ ]+', concept) if p][:3] or [concept]
+        return json.dumps({
+            "name": concept,
+            "variables": {p: f"{p} is one part of {concept}" for p in parts},
+            "meaning": f"{concept} shows how its parts relate to each other.",
+            "example": f"Teachers use {concept} to solve problems in class.",
+        })
+
+    return "OK"
+
+
+def completion(model, content):
+    """OpenAI-compatible chat.completion body"""
+    prompt_tokens = 0
+    completion_tokens = max(1, len(content) // 4)
+    return {
+        "id": "chatcmpl-mock-" + hashlib.md5(content.encode('utf-8')).hexdigest()[:12],
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop",
+        }],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    }
+
+
+# ============================================================
+# CASSETTE
+# ============================================================
+
+class Cassette:
+    """Recorded answers keyed on the request fields that shape them."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.entries = {}
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+        print(f"[MOCK] Cassette {path}: {len(self.entries)} recorded answers")
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        return entry['content'] if entry else None
+
+    def put(self, key, kind, body, content):
+        user = next((m['content'] for m in reversed(body.get('messages', [])) if m.get('role') == 'user'), '')
+        with self._lock:
+            self.entries[key] = {"kind": kind, "prompt": user[-200:], "content": content}
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp = self.path + '.tmp'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, indent=1, ensure_ascii=False)
+            os.replace(tmp, self.path)
+
+
+# ============================================================
+# SERVER
+# ============================================================
+
+class MockState:
+    def __init__(self, args):
+        self.args = args
+        self.cassette = Cassette(None if args.mode == 'synthetic' else args.cassette)
+        self.random = random.Random(args.seed)
+        self._lock = threading.Lock()
+        self.counts = {"requests": 0, "replayed": 0, "synthetic": 0, "recorded": 0,
+                       "injected_errors": 0, "misses": 0, "by_kind": {}}
+
+    def count(self, field, kind=None):
+        with self._lock:
+            self.counts[field] += 1
+            if kind:
+                self.counts["by_kind"][kind] = self.counts["by_kind"].get(kind, 0) + 1
+
+    def roll(self):
+        """(delay seconds, inject an error?) for one request"""
+        with self._lock:
+            delay = max(0.0, self.args.latency + self.random.uniform(-self.args.jitter, self.args.jitter))
+            fail = self.random.random() < self.args.error_rate
+        return delay, fail
+
+
+def forward(body):
+    """Send the request to the real Groq API and return the answer text"""
+    req = urllib.request.Request(
+        UPSTREAM_URL, data=json.dumps(body).encode('utf-8'),
+        headers={"Content-Type": "application/json",
+                 "Authorization": f"Bearer {os.getenv('GROQ_API_KEY', '')}"},
+    )
+    with urllib.request.urlopen(req, timeout=60) as resp:
+        return json.loads(resp.read())['choices'][0]['message']['content']
+
+
+class Handler(BaseHTTPRequestHandler):
+    state = None
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, fmt, *args):
+        if self.state.args.verbose:
+            super().log_message(fmt, *args)
+
+    def _send(self, status, payload):
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == '/stats':
+            with self.state._lock:
+                counts = dict(self.state.counts, by_kind=dict(self.state.counts["by_kind"]))
+            return self._send(200, counts)
+        self._send(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        body = json.loads(self.rfile.read(length) or b'{}')
+        if self.path.rstrip('/') != CHAT_PATH:
+            return self._send(404, {"error": {"message": f"unknown path {self.path}"}})
+
+        state = self.state
+        args = state.args
+        kind = classify(body.get('messages', []))
+        key = request_key(body)
+        state.count("requests", kind)
+
+        delay, fail = state.roll()
+        if delay:
+            time.sleep(delay)
+        if fail:
+            state.count("injected_errors")
+            return self._send(args.error_status, {"error": {"message": "injected failure", "type": "mock_error"}})
+
+        content = state.cassette.get(key) if args.mode != 'synthetic' else None
+        if content is not None:
+            state.count("replayed")
+        elif args.mode == 'record':
+            try:
+                content = forward(body)
+            except (urllib.error.URLError, KeyError, ValueError) as e:
+                print(f"[MOCK ERROR] Upstream call failed: {e}")
+                return self._send(502, {"error": {"message": f"upstream failed: {e}"}})
+            state.cassette.put(key, kind, body, content)
+            state.count("recorded")
+        elif args.mode == 'replay' and args.strict:
+            state.count("misses")
+            return self._send(404, {"error": {"message": f"no recorded answer for {kind} prompt {key[:12]}"}})
+        else:
+            if args.mode == 'replay':
+                state.count("misses")
+            content = synthesize(kind, body.get('messages', []))
+            state.count("synthetic")
+
+        self._send(200, completion(body.get('model', 'mock'), content))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Groq-compatible mock server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--mode', choices=['replay', 'record', 'synthetic'], default='replay')
+    parser.add_argument('--cassette', default=DEFAULT_CASSETTE)
+    parser.add_argument('--strict', action='store_true', help="replay: 404 on cassette misses")
+    parser.add_argument('--latency', type=float, default=0.0, help="mean added latency in seconds")
+    parser.add_argument('--jitter', type=float, default=0.0, help="+/- uniform jitter in seconds")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of requests that fail")
+    parser.add_argument('--error-status', type=int, default=503, help="HTTP status for injected failures")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    Handler.state = MockState(args)
+    server = ThreadingHTTPServer((args.host, args.port), Handler)
+    server.daemon_threads = True
+    print(f"[MOCK] Groq stand-in on http://{args.host}:{args.port} "
+          f"(mode={args.mode}, latency={args.latency}s±{args.jitter}, errors={args.error_rate:.0%})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -6,7 +6,6 @@ var currentLanguage = 'asl';
 var wordArray = [];
 var playbackSpeed = 1;
 var isPaused = false;
-var playbackInterval = null;
 var currentWordIndex = 0;
 var topicModeEnabled = false;
 var structuredData = null;
@@ -36,6 +35,9 @@ var paragraphSentences = [];
 var paragraphResults = [];
 var currentSentenceIndex = 0;
 var autoplayEnabled = false;
+var paragraphStreamController = null;
+var paragraphStreamActive = false;
+var pendingSentenceIndex = -1;
 
 // ============================================
 // Voice Input (Web Speech API)
@@ -380,6 +382,10 @@ function submitTranslation(text) {
     }
 
     // Single sentence mode
+    if (paragraphStreamController) paragraphStreamController.abort();
+    paragraphStreamController = null;
+    paragraphStreamActive = false;
+    pendingSentenceIndex = -1;
     document.getElementById('sentence-nav').style.display = 'none';
     paragraphSentences = [];
     paragraphResults = [];
@@ -473,7 +479,11 @@ function explainConcept() {
                 html += '  <p class="step-text">' + step.text + '</p>';
                 html += '  <div class="step-gloss">';
                 html += '    <span class="gloss-label">Sign Gloss:</span> ';
-                html += '    <span class="gloss-words">' + (step.gloss || '') + '</span>';
+                if (step.status === 'error') {
+                    html += '    <span class="gloss-words">⚠️ Sign translation unavailable for this step</span>';
+                } else {
+                    html += '    <span class="gloss-words">' + (step.gloss || '') + '</span>';
+                }
                 html += '  </div>';
                 html += '</div>';
             });
@@ -627,18 +637,173 @@ function display_err_message() {
 // Word Array & Playback
 // ============================================
 
-function convert_json_to_arr(words) {
-    wordArray = [];
+// Numbered signs of a translation, in order; leaves the playback state alone
+function translationSigns(words) {
+    var signs = [];
     Object.keys(words).forEach(function (key) {
         if (!key.startsWith('_')) {
-            wordArray.push(words[key]);
+            signs.push(words[key]);
+        }
+    });
+    return signs;
+}
+
+// Make a translation the one that plays next
+function convert_json_to_arr(words) {
+    wordArray = translationSigns(words);
+    signTimeline = words['_timeline'] || null;
+    if (words['_prefetch']) prefetchSigns(words['_prefetch']);
+}
+
+// ============================================
+// Sign Prefetch & Offline Cache
+// ============================================
+
+// Hashed SignFiles URL per sign name, from the _prefetch manifests seen so far
+var signUrls = {};
+
+if ('serviceWorker' in navigator) {
+    window.addEventListener('load', function () {
+        navigator.serviceWorker.register('/sign-sw.js').catch(function (err) {
+            console.warn('[SignSW] Registration failed', err);
+        });
+    });
+}
+
+// Have the service worker cache a translation's signs while the bundle loads,
+// so a dropped connection mid-sentence (or a replay offline) still plays
+function prefetchSigns(manifest) {
+    manifest.forEach(function (entry) { signUrls[entry.sign] = entry.url; });
+    var worker = navigator.serviceWorker && navigator.serviceWorker.controller;
+    if (!worker || manifest.length === 0) return;
+    var channel = new MessageChannel();
+    channel.port1.onmessage = function (event) {
+        var r = event.data;
+        console.log('[SignSW] Prefetch: ' + r.cached + ' cached, ' + r.fetched + ' fetched, ' + r.failed + ' failed');
+    };
+    worker.postMessage({ type: 'prefetch', signs: manifest }, [channel.port2]);
+}
+
+// SIGML text per sign name, filled from /sigml/bundle so a sentence costs one
+// request instead of one SignFiles fetch per sign
+var sigmlTextCache = {};
+
+// Bundle unavailable: fetch each sign by its hashed URL, which the service
+// worker answers from its cache when the network is down
+function loadSignFiles(words, done) {
+    if (typeof fetch === 'undefined') {
+        done();
+        return;
+    }
+    Promise.all(words.map(function (word) {
+        if (!signUrls[word]) return Promise.resolve(null);
+        return fetch(signUrls[word]).then(function (response) {
+            return response.ok ? response.text() : null;
+        }).catch(function () {
+            return null;
+        });
+    })).then(function (texts) {
+        // Failures stay uncached so the next playback tries again
+        words.forEach(function (word, i) { if (texts[i]) sigmlTextCache[word] = texts[i]; });
+        done();
+    });
+}
+
+function loadSignBundle(words, done) {
+    var missing = [];
+    words.forEach(function (word) {
+        if (!(word in sigmlTextCache) && missing.indexOf(word) === -1) missing.push(word);
+    });
+    if (missing.length === 0) {
+        done();
+        return;
+    }
+
+    $.ajax({
+        url: '/sigml/bundle',
+        type: 'POST',
+        contentType: 'application/json',
+        data: JSON.stringify({ signs: missing }),
+        success: function (res) {
+            var elements = res.sigml.match(/<hns_sign\b[\s\S]*?<\/hns_sign>/g) || [];
+            res.offsets.forEach(function (entry) {
+                var signs = elements.slice(entry.start, entry.start + entry.count);
+                sigmlTextCache[entry.name] = '<sigml>\n' + signs.join('\n') + '\n</sigml>';
+            });
+            // Not requested again; playSign() falls back to the file URL
+            res.missing.forEach(function (word) { sigmlTextCache[word] = null; });
+            done();
+        },
+        error: function () {
+            console.warn('[Bundle] Falling back to one request per sign');
+            loadSignFiles(missing, done);
         }
     });
 }
 
-function play_each_word() {
+function playSign(word) {
+    if (sigmlTextCache[word]) {
+        playText(sigmlTextCache[word]);
+    } else {
+        // startPlayer() resolves against the page directory, so keep the URL relative
+        startPlayer(signUrls[word] ? signUrls[word].replace(/^\//, '') : 'SignFiles/' + word + '.sigml');
+    }
+}
+
+function play_each_word(startIndex) {
+    var words = wordArray;
+    document.getElementById('submit').disabled = true;
+    loadSignBundle(words.slice(startIndex || 0), function () {
+        // A newer translation replaced wordArray while the bundle loaded
+        if (words === wordArray) play_loaded_words(startIndex);
+    });
+}
+
+// Per-sign durations (ms at speed 1) of the loaded translation, from _timeline
+var signTimeline = null;
+var DEFAULT_SIGN_MS = 800;
+var DEFAULT_SIGN_GAP_MS = 150;
+// Frames are captured this far into a sign, near its peak pose
+var CAPTURE_AT = 0.6;
+// How long past its estimated end a sign may run before it is skipped
+var WATCHDOG_SLACK_MS = 1500;
+
+// Every (re)start bumps the session; timers of an older playback do nothing
+var playbackSession = 0;
+var playbackActive = false;
+var playbackTimer = null;
+var pendingAdvance = null;
+var avatarIdleCallback = null;
+var playbackDoneCallback = null;
+
+// Called by the CWASA animidle hook in index.html
+function onAvatarIdle() {
+    var callback = avatarIdleCallback;
+    avatarIdleCallback = null;
+    if (callback) callback();
+}
+
+function signDuration(index) {
+    var durations = signTimeline && signTimeline.durations;
+    if (durations && durations.length === wordArray.length) return durations[index];
+    return DEFAULT_SIGN_MS;
+}
+
+function stopPlayback() {
+    playbackSession++;
+    playbackActive = false;
+    if (playbackTimer) clearTimeout(playbackTimer);
+    playbackTimer = null;
+    pendingAdvance = null;
+    avatarIdleCallback = null;
+}
+
+function play_loaded_words(startIndex) {
+    stopPlayback();
+    var session = playbackSession;
     var totalWords = wordArray.length;
-    currentWordIndex = 0;
+    var gap = ((signTimeline && signTimeline.gap) || DEFAULT_SIGN_GAP_MS) / playbackSpeed;
+    currentWordIndex = startIndex || 0;
     isPaused = false;
     updatePauseButton();
     galleryCaptureCount = 0;
@@ -651,12 +816,6 @@ function play_each_word() {
 
     document.getElementById('submit').disabled = true;
 
-    // Clear any existing interval
-    if (playbackInterval) clearInterval(playbackInterval);
-
-    var baseInterval = 1200; // Increased to 1.2s for more natural breathing space at 1x
-    var interval = baseInterval / playbackSpeed;
-
     // Sync avatar speed with UI speed
     try {
         if (typeof CWASA !== 'undefined') {
@@ -664,69 +823,93 @@ function play_each_word() {
         }
     } catch (e) { console.warn("Could not set CWASA speed", e); }
 
-    var playbackWatchdog = null;
-
-    playbackInterval = setInterval(function () {
-        if (isPaused) return;
-
-        if (currentWordIndex == totalWords) {
-            // Wait for all animations to stop AND all captures to finish
-            if (playerAvailableToPlay && galleryCaptureCount === 0) {
-                clearInterval(playbackInterval);
-                if (playbackWatchdog) clearTimeout(playbackWatchdog);
-                playbackInterval = null;
-                document.getElementById('submit').disabled = false;
-                hide_curr_word();
-                // Build gallery after all signs have played and captured
-                buildGallery();
-            } else if (playerAvailableToPlay && galleryCaptureCount > 0) {
-                // Playback finished but captures pending - show status
-                document.querySelector('.curr_word_playing').textContent = "SAVING FRAMES...";
-            } else {
-                // Still waiting for player
-                if (currentWordIndex > 0) hide_curr_word();
-                display_err_message();
-                document.getElementById('submit').disabled = false;
-            }
-        } else if (playerAvailableToPlay) {
-            playerAvailableToPlay = false;
-
-            // Set a watchdog timer (3 seconds) to bail out if player gets stuck
-            if (playbackWatchdog) clearTimeout(playbackWatchdog);
-            playbackWatchdog = setTimeout(function () {
-                if (!playerAvailableToPlay) {
-                    console.warn('Watchdog triggered: forcing next word after stall at ' + wordArray[currentWordIndex - 1]);
-                    playerAvailableToPlay = true;
-                }
-            }, 3000);
-
-            try {
-                var currentWord = wordArray[currentWordIndex];
-                startPlayer('SignFiles/' + currentWord + '.sigml');
-                display_curr_word(currentWord);
-                highlightCurrentWord(currentWordIndex);
-
-                // Capture frame after a delay to let the sign animation reach peak pose
-                galleryCaptureCount++;
-                setTimeout(function () {
-                    captureFrame(currentWord);
-                }, 700);
-
-                currentWordIndex++;
-            } catch (err) {
-                console.error('Player start error:', err);
-                playerAvailableToPlay = true;
-                display_err_message();
-            }
-        } else {
-            var errtext = $('.statusExtra').val();
-            if (errtext && (errtext.indexOf('invalid') != -1 || errtext.indexOf('error') != -1)) {
-                console.warn('Player reported error status. Skipping...');
-                playerAvailableToPlay = true;
-                if (playbackWatchdog) clearTimeout(playbackWatchdog);
-            }
+    playbackActive = true;
+
+    function schedule(fn, delay) {
+        if (playbackTimer) clearTimeout(playbackTimer);
+        playbackTimer = setTimeout(function () {
+            playbackTimer = null;
+            if (session === playbackSession) fn();
+        }, delay);
+    }
+
+    // Run fn once the avatar reports idle, or after maxWait if it never does
+    function whenIdle(fn, maxWait) {
+        var done = false;
+        function go() {
+            if (done || session !== playbackSession) return;
+            done = true;
+            avatarIdleCallback = null;
+            fn();
+        }
+        if (playerAvailableToPlay) {
+            go();
+            return;
+        }
+        avatarIdleCallback = go;
+        schedule(function () {
+            console.warn('Watchdog triggered: forcing next word after stall at ' + wordArray[currentWordIndex - 1]);
+            playerAvailableToPlay = true;
+            go();
+        }, maxWait);
+    }
+
+    function finish() {
+        if (galleryCaptureCount > 0) {
+            // Playback finished but captures pending - show status
+            document.querySelector('.curr_word_playing').textContent = "SAVING FRAMES...";
+            schedule(finish, 100);
+            return;
+        }
+        playbackActive = false;
+        document.getElementById('submit').disabled = false;
+        hide_curr_word();
+        // Build gallery after all signs have played and captured
+        buildGallery();
+        var done = playbackDoneCallback;
+        playbackDoneCallback = null;
+        if (done) done();
+    }
+
+    function advance() {
+        if (session !== playbackSession) return;
+        if (isPaused) {
+            pendingAdvance = advance;
+            return;
+        }
+        if (currentWordIndex >= totalWords) {
+            finish();
+            return;
         }
-    }, interval);
+
+        var index = currentWordIndex++;
+        var currentWord = wordArray[index];
+        var duration = signDuration(index) / playbackSpeed;
+        playerAvailableToPlay = false;
+        try {
+            playSign(currentWord);
+        } catch (err) {
+            console.error('Player start error:', err);
+            playerAvailableToPlay = true;
+            display_err_message();
+            schedule(advance, gap);
+            return;
+        }
+        display_curr_word(currentWord);
+        highlightCurrentWord(index);
+
+        // Capture the frame near the sign's peak pose, from its estimated duration
+        galleryCaptureCount++;
+        setTimeout(function () {
+            captureFrame(currentWord);
+        }, duration * CAPTURE_AT);
+
+        // Next sign as soon as the avatar is done, after a short breathing gap
+        whenIdle(function () { schedule(advance, gap); }, duration + WATCHDOG_SLACK_MS);
+    }
+
+    // A sign cut short by a restart (e.g. a speed change) finishes first
+    whenIdle(advance, WATCHDOG_SLACK_MS);
 }
 
 // ============================================
@@ -941,21 +1124,20 @@ function setSpeed(speed) {
         }
     } catch (e) { console.warn("Error updating CWASA speed", e); }
 
-    // If currently playing, restart with new speed
-    if (playbackInterval && wordArray.length > 0) {
-        clearInterval(playbackInterval);
-        var remaining = wordArray.slice(currentWordIndex);
-        var tempArr = wordArray;
-        wordArray = remaining;
-        currentWordIndex = 0;
-        play_each_word();
-        wordArray = tempArr;
+    // If currently playing, continue from the next sign at the new speed
+    if (playbackActive && wordArray.length > 0) {
+        play_each_word(currentWordIndex);
     }
 }
 
 function togglePause() {
     isPaused = !isPaused;
     updatePauseButton();
+    if (!isPaused && pendingAdvance) {
+        var advance = pendingAdvance;
+        pendingAdvance = null;
+        advance();
+    }
 }
 
 function updatePauseButton() {
@@ -966,7 +1148,7 @@ function updatePauseButton() {
 
 function repeatAnimation() {
     if (wordArray.length > 0) {
-        if (playbackInterval) clearInterval(playbackInterval);
+        stopPlayback();
         currentWordIndex = 0;
         isPaused = false;
         updatePauseButton();
@@ -1630,10 +1812,106 @@ function startParagraphMode(sentences) {
     // Show first sentence info
     document.getElementById('isl_text').textContent = 'Translating sentence 1/' + sentences.length + '...';
 
+    // Stream all sentences; play the first one as soon as it arrives
+    if (streamParagraph(sentences)) {
+        pendingSentenceIndex = 0;
+        return;
+    }
+
     // Translate first sentence
     translateSentenceAt(0);
 }
 
+// Fetch all sentence translations from /stream (NDJSON, one record per line).
+// Returns false when the browser cannot read a streamed response body.
+function streamParagraph(sentences) {
+    if (!window.fetch || !window.ReadableStream || !window.TextDecoder || !window.AbortController) {
+        return false;
+    }
+
+    if (paragraphStreamController) paragraphStreamController.abort();
+    var controller = new AbortController();
+    paragraphStreamController = controller;
+    paragraphStreamActive = true;
+
+    var body = new URLSearchParams();
+    // The server translates exactly these sentences, so each record's seq
+    // indexes paragraphSentences; text is kept for the history entry
+    sentences.forEach(function (sentence) { body.append('sentence', sentence); });
+    body.append('text', sentences.join('\n'));
+    body.append('language', currentLanguage);
+
+    fetch('/stream', { method: 'POST', body: body, signal: controller.signal })
+        .then(function (resp) {
+            if (!resp.ok || !resp.body) throw new Error('Stream failed: ' + resp.status);
+            var reader = resp.body.getReader();
+            var decoder = new TextDecoder();
+            var buffer = '';
+
+            function pump() {
+                return reader.read().then(function (chunk) {
+                    if (chunk.done) {
+                        if (buffer.trim()) handleStreamRecord(buffer);
+                        return;
+                    }
+                    buffer += decoder.decode(chunk.value, { stream: true });
+                    var lines = buffer.split('\n');
+                    buffer = lines.pop();
+                    lines.forEach(function (line) {
+                        if (line.trim()) handleStreamRecord(line);
+                    });
+                    return pump();
+                });
+            }
+            return pump();
+        })
+        .then(function () {
+            finishParagraphStream(controller);
+        })
+        .catch(function (err) {
+            if (err.name === 'AbortError') return;
+            console.warn('Paragraph stream failed, falling back to per-sentence requests', err);
+            finishParagraphStream(controller);
+        });
+
+    return true;
+}
+
+function handleStreamRecord(line) {
+    var rec;
+    try {
+        rec = JSON.parse(line);
+    } catch (e) {
+        console.warn('Bad stream record', line);
+        return;
+    }
+    if (rec.done || rec.seq === undefined || rec.seq >= paragraphSentences.length) return;
+
+    // Another sentence may be loading or playing; only the sentence about to
+    // play becomes wordArray (in playSentence)
+    paragraphResults[rec.seq] = rec.translation;
+    trackTranslation(translationSigns(rec.translation));
+    if (rec.translation['_prefetch']) prefetchSigns(rec.translation['_prefetch']);
+
+    if (rec.seq === pendingSentenceIndex) {
+        pendingSentenceIndex = -1;
+        playSentence(rec.seq);
+    }
+}
+
+function finishParagraphStream(controller) {
+    if (paragraphStreamController !== controller) return;
+    paragraphStreamController = null;
+    paragraphStreamActive = false;
+
+    // Anything the stream did not deliver is fetched one sentence at a time
+    if (pendingSentenceIndex >= 0) {
+        var index = pendingSentenceIndex;
+        pendingSentenceIndex = -1;
+        translateSentenceAt(index);
+    }
+}
+
 function translateSentenceAt(index) {
     if (index < 0 || index >= paragraphSentences.length) return;
 
@@ -1646,6 +1924,13 @@ function translateSentenceAt(index) {
         return;
     }
 
+    // Still streaming in — play it when its record arrives
+    if (paragraphStreamActive) {
+        pendingSentenceIndex = index;
+        document.getElementById('isl_text').textContent = 'Translating sentence ' + (index + 1) + '/' + paragraphSentences.length + '...';
+        return;
+    }
+
     document.getElementById('isl_text').textContent = 'Translating sentence ' + (index + 1) + '/' + paragraphSentences.length + '...';
 
     $.ajax({
@@ -1658,9 +1943,6 @@ function translateSentenceAt(index) {
         success: function (res) {
             paragraphResults[index] = res;
             playSentence(index);
-
-            // Track
-            convert_json_to_arr(res);
             trackTranslation(wordArray);
         },
         error: function () {
@@ -1683,8 +1965,7 @@ function playSentence(index) {
 
     // Auto-advance after playback ends (if autoplay is on)
     if (autoplayEnabled) {
-        var totalDuration = wordArray.length * (800 / playbackSpeed) + 1500;
-        setTimeout(function () {
+        playbackDoneCallback = function () {
             if (autoplayEnabled && currentSentenceIndex < paragraphSentences.length - 1) {
                 nextSentence();
             } else {
@@ -1692,7 +1973,7 @@ function playSentence(index) {
                 document.getElementById('btn-autoplay').textContent = '▶ Auto';
                 document.getElementById('btn-autoplay').classList.remove('autoplay-active');
             }
-        }, totalDuration);
+        };
     }
 }
 
@@ -0,0 +1,136 @@
+// Sign cache service worker, served at /sign-sw.js so its scope covers /SignFiles/.
+//
+// - On install, caches the common signs listed by /sigml/prefetch (letters,
+//   digits, Learn vocabulary, most-used signs) so they play offline.
+// - On a {type: 'prefetch', signs: [...]} message from the page, fetches the
+//   signs of a translation that are not cached yet, in parallel, and replies
+//   with counts on the message port.
+// - Serves SignFiles requests: hashed URLs (?v=<hash>) from the cache first,
+//   anything else from the network with the cache as the offline fallback.
+//
+// Sign URLs carry their content hash, so a cached entry never goes stale; an
+// edited sign gets a new URL and replaces the old entry for that file.
+// Bump CACHE_VERSION when the way entries are stored changes.
+
+var CACHE_VERSION = 1;
+var CACHE_PREFIX = 'isl-signs-';
+var CACHE_NAME = CACHE_PREFIX + 'v' + CACHE_VERSION;
+var PREFETCH_CONCURRENCY = 6;
+
+function isSignRequest(url) {
+    return url.origin === self.location.origin &&
+        (url.pathname.indexOf('/SignFiles/') === 0 || url.pathname.indexOf('/static/SignFiles/') === 0);
+}
+
+// Store a response, dropping any other version of the same sign file
+function storeSign(cache, request, response) {
+    return cache.delete(request, { ignoreSearch: true }).then(function () {
+        return cache.put(request, response);
+    });
+}
+
+// Fetch every URL not cached yet, at most PREFETCH_CONCURRENCY at a time
+function prefetchSigns(urls) {
+    var result = { cached: 0, fetched: 0, failed: 0 };
+    return caches.open(CACHE_NAME).then(function (cache) {
+        var queue = urls.slice();
+
+        function next() {
+            var url = queue.shift();
+            if (url === undefined) return Promise.resolve();
+            return cache.match(url).then(function (hit) {
+                if (hit) {
+                    result.cached++;
+                    return;
+                }
+                return fetch(url).then(function (response) {
+                    if (!response.ok) throw new Error(response.status);
+                    result.fetched++;
+                    return storeSign(cache, url, response);
+                });
+            }).catch(function () {
+                result.failed++;
+            }).then(next);
+        }
+
+        var workers = [];
+        for (var i = 0; i < PREFETCH_CONCURRENCY; i++) workers.push(next());
+        return Promise.all(workers);
+    }).then(function () {
+        return result;
+    });
+}
+
+function manifestUrls(signs) {
+    return (signs || []).map(function (entry) { return entry.url; });
+}
+
+self.addEventListener('install', function (event) {
+    event.waitUntil(
+        fetch('/sigml/prefetch').then(function (response) {
+            return response.json();
+        }).then(function (manifest) {
+            return prefetchSigns(manifestUrls(manifest.signs));
+        }).then(function (result) {
+            console.log('[SignSW] Offline vocabulary: ' + (result.cached + result.fetched) + ' signs cached, ' +
+                result.failed + ' failed');
+        }).catch(function (err) {
+            // Installing without the common set still caches signs as they are used
+            console.warn('[SignSW] Could not cache the common signs', err);
+        }).then(function () {
+            return self.skipWaiting();
+        })
+    );
+});
+
+self.addEventListener('activate', function (event) {
+    event.waitUntil(
+        caches.keys().then(function (names) {
+            return Promise.all(names.filter(function (name) {
+                return name.indexOf(CACHE_PREFIX) === 0 && name !== CACHE_NAME;
+            }).map(function (name) {
+                return caches.delete(name);
+            }));
+        }).then(function () {
+            return self.clients.claim();
+        })
+    );
+});
+
+self.addEventListener('message', function (event) {
+    var data = event.data || {};
+    if (data.type !== 'prefetch') return;
+    var port = event.ports && event.ports[0];
+    event.waitUntil(prefetchSigns(manifestUrls(data.signs)).then(function (result) {
+        if (port) port.postMessage(result);
+    }));
+});
+
+self.addEventListener('fetch', function (event) {
+    var request = event.request;
+    if (request.method !== 'GET') return;
+    var url = new URL(request.url);
+    if (!isSignRequest(url)) return;
+
+    if (url.searchParams.has('v')) {
+        // Hashed URL: the cached copy is exactly what the server would send
+        event.respondWith(caches.open(CACHE_NAME).then(function (cache) {
+            return cache.match(request).then(function (hit) {
+                return hit || fetch(request).then(function (response) {
+                    if (response.ok) event.waitUntil(storeSign(cache, request, response.clone()));
+                    return response;
+                });
+            });
+        }));
+        return;
+    }
+
+    // Plain URL (the player's per-sign fallback): network first, any cached version offline
+    event.respondWith(fetch(request).catch(function () {
+        return caches.open(CACHE_NAME).then(function (cache) {
+            return cache.match(request, { ignoreSearch: true });
+        }).then(function (hit) {
+            return hit || Response.error();
+        });
+    }));
+});
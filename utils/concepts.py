@@ -0,0 +1,92 @@
+"""
+STEM concept detection over word tokens.
+All concepts are compiled at startup into one Aho-Corasick automaton whose
+alphabet is words, not characters, so "ion" never matches inside "question"
+and a whole chapter is scanned in a single linear pass however many concepts
+there are. Plural forms of a concept's last word ("cells", "galaxies") match
+the concept.
+"""
+import re
+
+WORD_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+
+def words(text):
+    return WORD_RE.findall(text.lower().replace('’', "'"))
+
+
+def plural(word):
+    if re.search(r'[^aeiou]y$', word):
+        return word[:-1] + 'ies'
+    if re.search(r'(s|x|z|ch|sh)$', word):
+        return word + 'es'
+    return word + 's'
+
+
+class ConceptMatcher:
+    """Word-level Aho-Corasick automaton over a set of concepts."""
+
+    def __init__(self, concepts):
+        self.concepts = sorted(concepts)
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for concept in self.concepts:
+            tokens = words(concept)
+            if not tokens:
+                continue
+            self._add(tokens, concept)
+            if not tokens[-1].endswith('s'):
+                self._add(tokens[:-1] + [plural(tokens[-1])], concept)
+        self._link()
+
+    def _add(self, tokens, concept):
+        node = 0
+        for token in tokens:
+            if token not in self._goto[node]:
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+                self._goto[node][token] = len(self._goto) - 1
+            node = self._goto[node][token]
+        self._out[node].append((concept, len(tokens)))
+
+    def _link(self):
+        """Breadth-first failure links; each node also inherits its fallback's outputs"""
+        queue = list(self._goto[0].values())
+        for node in queue:
+            for token, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and token not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(token, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def scan(self, text):
+        """Yield (position, concept, length in words) for every match, in text order"""
+        node = 0
+        for i, token in enumerate(words(text)):
+            while node and token not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(token, 0)
+            for concept, length in self._out[node]:
+                yield i - length + 1, concept, length
+
+    def find(self, text):
+        """Every concept in `text`, most specific first: more words, then the
+        earliest occurrence, then alphabetical. Deterministic for a given text."""
+        first = {}
+        for position, concept, length in self.scan(text):
+            key = (-length, position, concept)
+            if concept not in first or key < first[concept]:
+                first[concept] = key
+        return sorted(first, key=first.get)
+
+    def first(self, text):
+        found = self.find(text)
+        return found[0] if found else None
+
+    def stats(self):
+        return {"concepts": len(self.concepts), "states": len(self._goto)}
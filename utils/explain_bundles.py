@@ -0,0 +1,92 @@
+"""
+Precompiled /explain bundles for the canned FORMULA_CONTEXT entries.
+A bundle holds every explanation step already glossed and matched to SIGML,
+per language, so serving a canned explanation needs no LLM calls.
+
+The artifact is one JSON file. Its top-level version fingerprints the prompt,
+model and sign matcher, so changing any of them drops every bundle. Each bundle
+also stores a hash of its context text, so editing one entry drops only that one.
+"""
+import hashlib
+import json
+import os
+import threading
+
+
+def context_hash(context):
+    return hashlib.sha1(json.dumps(context, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+
+
+class ExplainBundles:
+    """Versioned on-disk store of prebuilt explanation steps."""
+
+    def __init__(self, path, version):
+        self.path = path
+        self.version = version
+        self._lock = threading.Lock()
+        self.bundles = {}
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.built = 0
+        self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[BUNDLES ERROR] Ignoring unreadable {self.path}: {e}")
+            return
+        if data.get("version") != self.version:
+            print(f"[BUNDLES] {self.path} is version {data.get('version')}, "
+                  f"expected {self.version}; rebuilding on demand")
+            return
+        self.bundles = data.get("bundles", {})
+        print(f"[BUNDLES] Loaded {sum(len(b) for b in self.bundles.values())} explanation bundles")
+
+    def get(self, language, key, context):
+        """Prebuilt steps for this entry, or None if missing or built from older text"""
+        bundle = self.bundles.get(language, {}).get(key)
+        with self._lock:
+            if bundle is None:
+                self.misses += 1
+                return None
+            if bundle["context_hash"] != context_hash(context):
+                self.stale += 1
+                return None
+            self.hits += 1
+        return bundle["steps"]
+
+    def put(self, language, key, context, steps):
+        with self._lock:
+            self.bundles.setdefault(language, {})[key] = {
+                "context_hash": context_hash(context),
+                "steps": steps,
+            }
+            self.built += 1
+            self._save()
+
+    def _save(self):
+        if not self.path:
+            return
+        tmp = self.path + '.tmp'
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({"version": self.version, "bundles": self.bundles}, f,
+                          indent=1, ensure_ascii=False, sort_keys=True)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"[BUNDLES ERROR] Could not write {self.path}: {e}")
+
+    def stats(self):
+        return {
+            "version": self.version,
+            "bundles": {lang: len(b) for lang, b in self.bundles.items()},
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "built": self.built,
+        }
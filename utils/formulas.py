@@ -0,0 +1,78 @@
+"""
+Startup-built lookup tables for the known physics and chemical formulas.
+preprocess_math() and analyze_input() used to re-normalize every formula and
+compile ~60 regexes on each call. Here the normalized keys are computed once:
+exact input hits are single dict lookups, and all chemical formulas are
+substituted by one combined word-boundary regex in a single pass.
+"""
+import re
+
+
+def fold(formula):
+    """Normalized key: no spaces or carets, superscript 2/3 as digits"""
+    return formula.replace(' ', '').replace('^', '').replace('²', '2').replace('³', '3')
+
+
+class FormulaIndex:
+    """Physics/chemistry formulas -> expansions and FORMULA_CONTEXT keys."""
+
+    def __init__(self, physics, chemistry, context):
+        self.chemistry = chemistry
+        # IGNORECASE also matches e.g. the Kelvin sign for "k"; casefold maps it back
+        self._chem_folded = {f.casefold(): expansion for f, expansion in chemistry.items()}
+
+        # Substring scan in preprocess_math: (clean form, pattern, expansion) in
+        # dict order, since the first formula found wins. Every one contains '='.
+        self._physics_scan = []
+        for formula, expansion in physics.items():
+            pattern = re.compile(re.escape(formula).replace(r'\^', r'\^?'), re.IGNORECASE)
+            self._physics_scan.append((formula.replace(' ', '').replace('^', ''), pattern, expansion))
+        self._physics_needs_equals = all('=' in f for f in physics)
+
+        # Exact match in analyze_input: folded input -> (expansion, context key)
+        context_by_key = {}
+        for key in context:
+            context_by_key.setdefault(key.replace(' ', ''), key)
+        self._physics_exact = {}
+        for formula, expansion in physics.items():
+            self._physics_exact.setdefault(fold(formula), (expansion, context_by_key.get(fold(formula))))
+
+        # /explain lookup: formula or name, case and whitespace folded
+        self._context_names = {}
+        for key, entry in context.items():
+            self._context_names.setdefault(re.sub(r'\s+', '', key).lower(), key)
+            self._context_names.setdefault(re.sub(r'\s+', '', entry['name']).lower(), key)
+
+        # Expansions are space-separated upper-case words, so no formula can match
+        # inside one and a single pass equals the old one-regex-per-formula loop.
+        # Longest first so "co2" is tried before "co" at the same position.
+        alternation = '|'.join(re.escape(f) for f in sorted(chemistry, key=len, reverse=True))
+        self._chem_re = re.compile(r'\b(?:' + alternation + r')\b', re.IGNORECASE)
+
+    def physics_in(self, text):
+        """(pattern, expansion) of the first known physics formula inside `text`, or None"""
+        if self._physics_needs_equals and '=' not in text:
+            return None
+        text_clean = text.lower().replace(' ', '').replace('^', '')
+        for clean, pattern, expansion in self._physics_scan:
+            if clean in text_clean:
+                return pattern, expansion
+        return None
+
+    def physics_exact(self, text_key):
+        """(expansion, FORMULA_CONTEXT key or None) if the whole input is a known physics formula"""
+        return self._physics_exact.get(fold(text_key))
+
+    def substitute_chemistry(self, text):
+        return self._chem_re.sub(lambda m: self._chem_folded[m.group(0).casefold()], text)
+
+    def context_key(self, formula_input):
+        return self._context_names.get(re.sub(r'\s+', '', formula_input).lower())
+
+    def stats(self):
+        return {
+            "physics": len(self._physics_scan),
+            "physics_keys": len(self._physics_exact),
+            "chemistry": len(self.chemistry),
+            "context_names": len(self._context_names),
+        }
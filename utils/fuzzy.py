@@ -0,0 +1,109 @@
+"""
+SymSpell-style fuzzy lookup for sign vocabulary.
+Every vocabulary word's deletions (up to max_distance characters, within a
+fixed-length prefix) are precomputed at startup. A lookup only generates the
+deletions of the query and checks candidates sharing one, so it costs a few
+dict hits and a handful of edit-distance checks instead of a scan of the
+whole vocabulary.
+"""
+import threading
+
+from utils.gloss_cache import LRUCache
+
+
+def edit_distance(a, b, max_distance):
+    """Optimal string alignment distance (Levenshtein + adjacent transpositions),
+    or max_distance + 1 once it is certain to exceed max_distance"""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    prev2 = None
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        row_min = cur[0]
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if prev2 is not None and i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+            row_min = min(row_min, cur[j])
+        if row_min > max_distance:
+            return max_distance + 1
+        prev2, prev = prev, cur
+    return prev[-1]
+
+
+class SymSpell:
+    """Precomputed-deletes index over a word list."""
+
+    def __init__(self, words, max_distance=2, prefix_length=7, cache_size=4096):
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.words = set()
+        self._deletes = {}
+        # Misses are the expensive case and the same typos recur across requests
+        self._cache = LRUCache(max_size=cache_size)
+        self._lock = threading.Lock()
+        self.lookups = 0
+        for word in words:
+            self.add(word)
+
+    def _edits(self, word, distance, out):
+        if distance == 0 or len(word) <= 1:
+            return
+        for i in range(len(word)):
+            deleted = word[:i] + word[i + 1:]
+            if deleted not in out:
+                out.add(deleted)
+                self._edits(deleted, distance - 1, out)
+
+    def _deletes_of(self, word):
+        prefix = word[:self.prefix_length]
+        out = {prefix}
+        self._edits(prefix, self.max_distance, out)
+        return out
+
+    def add(self, word):
+        if word in self.words:
+            return
+        self.words.add(word)
+        self._cache.clear()
+        for deleted in self._deletes_of(word):
+            self._deletes.setdefault(deleted, []).append(word)
+
+    def lookup(self, token, max_distance=None):
+        """(distance, [closest words]) for the smallest distance found,
+        or (None, []) if nothing is within max_distance"""
+        max_distance = self.max_distance if max_distance is None else min(max_distance, self.max_distance)
+        with self._lock:
+            self.lookups += 1
+        if token in self.words:
+            return 0, [token]
+        cached = self._cache.get((token, max_distance))
+        if cached is not None:
+            return cached
+        result = self._search(token, max_distance)
+        self._cache.set((token, max_distance), result)
+        return result
+
+    def _search(self, token, max_distance):
+        best_distance, best = max_distance + 1, []
+        seen = set()
+        for deleted in self._deletes_of(token):
+            for word in self._deletes.get(deleted, ()):
+                if word in seen:
+                    continue
+                seen.add(word)
+                distance = edit_distance(token, word, min(best_distance, max_distance))
+                if distance < best_distance:
+                    best_distance, best = distance, [word]
+                elif distance == best_distance and distance <= max_distance:
+                    best.append(word)
+        if best_distance > max_distance:
+            return None, []
+        return best_distance, sorted(best)
+
+    def stats(self):
+        cache = self._cache.stats()
+        return {"words": len(self.words), "deletes": len(self._deletes), "lookups": self.lookups,
+                "cache_hits": cache["hits"], "cache_size": cache["size"]}
@@ -0,0 +1,206 @@
+"""
+Two-tier cache for sign gloss results.
+Tier 1 is an in-process LRU with TTL eviction. Tier 2 is a SQLite table in WAL
+mode that every gunicorn worker on the box can read and write.
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Thread-safe LRU mapping with optional TTL (seconds) per entry."""
+
+    def __init__(self, max_size=1024, ttl=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+            value, expires_at = item
+            if expires_at is not None and expires_at < time.time():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        expires_at = time.time() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+def normalize_text(text):
+    """Fold case and whitespace so trivially different inputs share a key."""
+    return re.sub(r'\s+', ' ', text or '').strip().lower()
+
+
+class GlossCache:
+    """LRU in front of a shared SQLite store, keyed on text/language/model/prompt."""
+
+    def __init__(self, db_path=None, max_size=2048, ttl=24 * 3600, disk_ttl=30 * 24 * 3600):
+        self.memory = LRUCache(max_size=max_size, ttl=ttl)
+        self.db_path = db_path
+        self.disk_ttl = disk_ttl
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.disk_hits = 0
+        self.disk_misses = 0
+        self.disk_evictions = 0
+        self.disk_writes = 0
+        self.disk_errors = 0
+        if self.db_path:
+            self._init_db()
+
+    @staticmethod
+    def make_key(text, language, model, prompt_version):
+        raw = json.dumps([normalize_text(text), language, model, prompt_version])
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    # ---- SQLite tier ----
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self):
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            conn = self._conn()
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS gloss_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            cur = conn.execute("DELETE FROM gloss_cache WHERE created < ?",
+                               (time.time() - self.disk_ttl,))
+            self.disk_evictions += cur.rowcount
+            conn.commit()
+        except sqlite3.Error as e:
+            print(f"[CACHE ERROR] Disabling disk tier ({self.db_path}): {e}")
+            self.db_path = None
+
+    def _disk_get(self, key):
+        try:
+            row = self._conn().execute(
+                "SELECT value, created FROM gloss_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, created = row
+            if created < time.time() - self.disk_ttl:
+                conn = self._conn()
+                conn.execute("DELETE FROM gloss_cache WHERE key = ?", (key,))
+                conn.commit()
+                with self._lock:
+                    self.disk_evictions += 1
+                return None
+            return json.loads(value)
+        except (sqlite3.Error, ValueError) as e:
+            print(f"[CACHE ERROR] Read failed: {e}")
+            with self._lock:
+                self.disk_errors += 1
+            return None
+
+    def _disk_set(self, key, value):
+        try:
+            conn = self._conn()
+            conn.execute(
+                "INSERT OR REPLACE INTO gloss_cache (key, value, created) VALUES (?, ?, ?)",
+                (key, json.dumps(value), time.time()),
+            )
+            conn.commit()
+            with self._lock:
+                self.disk_writes += 1
+        except sqlite3.Error as e:
+            print(f"[CACHE ERROR] Write failed: {e}")
+            with self._lock:
+                self.disk_errors += 1
+
+    # ---- Public API ----
+
+    def get(self, key):
+        """Return a cached gloss word list, or None on a miss in both tiers."""
+        value = self.memory.get(key)
+        if value is not None:
+            return list(value)
+        if not self.db_path:
+            return None
+        value = self._disk_get(key)
+        with self._lock:
+            if value is None:
+                self.disk_misses += 1
+            else:
+                self.disk_hits += 1
+        if value is None:
+            return None
+        self.memory.set(key, tuple(value))
+        return list(value)
+
+    def set(self, key, gloss_words):
+        self.memory.set(key, tuple(gloss_words))
+        if self.db_path:
+            self._disk_set(key, list(gloss_words))
+
+    def stats(self):
+        memory = self.memory.stats()
+        misses = memory["misses"] if not self.db_path else self.disk_misses
+        total = memory["hits"] + self.disk_hits + misses
+        return {
+            "memory": memory,
+            "disk": {
+                "enabled": bool(self.db_path),
+                "hits": self.disk_hits,
+                "misses": self.disk_misses,
+                "evictions": self.disk_evictions,
+                "writes": self.disk_writes,
+                "errors": self.disk_errors,
+            },
+            "hits": memory["hits"] + self.disk_hits,
+            "misses": misses,
+            "evictions": memory["evictions"] + memory["expirations"] + self.disk_evictions,
+            "hit_rate": round((memory["hits"] + self.disk_hits) / total, 4) if total else 0.0,
+        }
@@ -0,0 +1,212 @@
+"""
+Translation history in SQLite (WAL mode), written behind the request.
+add() only appends the entry to an in-memory list and wakes a writer thread;
+the thread inserts everything pending in one transaction. Every gunicorn
+worker can write to the same database without losing the others' entries,
+which rewriting one JSON file could not guarantee.
+
+Rows are only ever inserted. Retention comes from compaction, which deletes
+all but the newest `keep` rows at most every `compact_interval` seconds;
+readers ask for the newest `keep` rows, so they never see the extra ones.
+Entries not yet written are merged into recent(), so a request sees its own
+translation at once.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+class HistoryStore:
+    """Newest-first translation history with a write-behind SQLite log."""
+
+    def __init__(self, db_path=None, keep=50, max_pending=1000, compact_interval=60.0,
+                 legacy_json=None):
+        self.db_path = db_path
+        self.keep = keep
+        self.max_pending = max_pending
+        self.compact_interval = compact_interval
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        # Held across a batch commit and its removal from _pending, so readers
+        # see each entry exactly once; add() never takes it
+        self._commit_lock = threading.Lock()
+        # Oldest first; the writer removes entries once they are committed
+        self._pending = []
+        # Memory-only history when there is no database
+        self._memory = []
+        self._compacted_at = time.monotonic()
+        self.written = 0
+        self.dropped = 0
+        self.compactions = 0
+        self.compacted_rows = 0
+        self.errors = 0
+        self.last_batch_ms = 0.0
+        self._writer_pid = None
+        if self.db_path:
+            self._init_db(legacy_json)
+
+    # ---- SQLite ----
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self, legacy_json):
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            conn = self._conn()
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS history ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, created REAL NOT NULL, entry TEXT NOT NULL)"
+            )
+            conn.commit()
+            if legacy_json:
+                self._import_legacy(conn, legacy_json)
+        except sqlite3.Error as e:
+            print(f"[HISTORY ERROR] Keeping history in memory only ({self.db_path}): {e}")
+            self.db_path = None
+
+    def _import_legacy(self, conn, path):
+        """Load an old newest-first history.json into an empty table"""
+        if not os.path.exists(path) or conn.execute("SELECT 1 FROM history LIMIT 1").fetchone():
+            return
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[HISTORY ERROR] Cannot import {path}: {e}")
+            return
+        now = time.time()
+        conn.executemany("INSERT INTO history (created, entry) VALUES (?, ?)",
+                         [(now, json.dumps(entry)) for entry in reversed(entries[:self.keep])])
+        conn.commit()
+        print(f"[HISTORY] Imported {min(len(entries), self.keep)} entries from {path}")
+
+    def _start_writer(self):
+        # Once per process: a worker forked after startup has no writer thread
+        self._writer_pid = os.getpid()
+        self._local = threading.local()
+        threading.Thread(target=self._writer, name='history-writer', daemon=True).start()
+
+    def _writer(self):
+        while True:
+            with self._wake:
+                while not self._pending:
+                    self._wake.wait()
+                batch = list(self._pending)
+            rows = [(created, json.dumps(entry)) for created, entry in batch]
+            start = time.perf_counter()
+            with self._commit_lock:
+                try:
+                    conn = self._conn()
+                    conn.executemany("INSERT INTO history (created, entry) VALUES (?, ?)", rows)
+                    conn.commit()
+                    written = True
+                except sqlite3.Error as e:
+                    print(f"[HISTORY ERROR] Write of {len(batch)} entries failed: {e}")
+                    written = False
+                with self._wake:
+                    if written:
+                        self.written += len(batch)
+                        self.last_batch_ms = round((time.perf_counter() - start) * 1000, 2)
+                    else:
+                        self.errors += 1
+                    # Dropped either way: a failing disk must not grow memory without bound
+                    del self._pending[:len(batch)]
+                    self._wake.notify_all()
+            if not written:
+                time.sleep(1)
+            elif time.monotonic() - self._compacted_at >= self.compact_interval:
+                self.compact()
+
+    def compact(self):
+        """Delete all but the newest `keep` rows. Returns the number deleted."""
+        if not self.db_path:
+            return 0
+        try:
+            conn = self._conn()
+            cur = conn.execute(
+                "DELETE FROM history WHERE id <= "
+                "(SELECT id FROM history ORDER BY id DESC LIMIT 1 OFFSET ?)", (self.keep,))
+            conn.commit()
+        except sqlite3.Error as e:
+            print(f"[HISTORY ERROR] Compaction failed: {e}")
+            with self._lock:
+                self.errors += 1
+            return 0
+        with self._lock:
+            self._compacted_at = time.monotonic()
+            self.compactions += 1
+            self.compacted_rows += cur.rowcount
+        return cur.rowcount
+
+    # ---- Public API ----
+
+    def add(self, entry):
+        """Queue an entry for writing; never touches the disk on the caller's thread"""
+        with self._wake:
+            if not self.db_path:
+                self._memory.insert(0, entry)
+                del self._memory[self.keep:]
+                return
+            if self._writer_pid != os.getpid():
+                self._start_writer()
+            if len(self._pending) >= self.max_pending:
+                self.dropped += 1
+                return
+            self._pending.append((time.time(), entry))
+            self._wake.notify()
+
+    def recent(self, limit=None):
+        """Newest-first entries, including any not written yet"""
+        limit = min(limit or self.keep, self.keep)
+        if not self.db_path:
+            with self._lock:
+                return list(self._memory[:limit])
+        rows = []
+        with self._commit_lock:
+            with self._lock:
+                pending = [entry for _, entry in reversed(self._pending)][:limit]
+            if len(pending) < limit:
+                try:
+                    rows = self._conn().execute(
+                        "SELECT entry FROM history ORDER BY id DESC LIMIT ?", (limit - len(pending),)
+                    ).fetchall()
+                except sqlite3.Error as e:
+                    print(f"[HISTORY ERROR] Read failed: {e}")
+                    with self._lock:
+                        self.errors += 1
+        return pending + [json.loads(entry) for (entry,) in rows]
+
+    def flush(self, timeout=5.0):
+        """Wait until every queued entry is written. Returns True if none are left."""
+        deadline = time.monotonic() + timeout
+        with self._wake:
+            while self._pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._wake.wait(remaining)
+        return True
+
+    def stats(self):
+        with self._lock:
+            return {
+                "backend": "sqlite" if self.db_path else "memory",
+                "keep": self.keep,
+                "pending": len(self._pending),
+                "written": self.written,
+                "dropped": self.dropped,
+                "compactions": self.compactions,
+                "compacted_rows": self.compacted_rows,
+                "errors": self.errors,
+                "last_batch_ms": self.last_batch_ms,
+            }
@@ -0,0 +1,272 @@
+"""
+Surface-form table for sign matching: inflected, irregular and synonym forms
+of every sign token, so "RUNNING", "STUDIES" or "WENT" resolve in one lookup
+instead of falling through to fingerspelling.
+
+The table is generated offline by build_inflections.py and stored as
+{base token: "space separated surface forms"}. Each surface form appears under
+exactly one base; conflicts are settled at build time. When NLTK's WordNet data
+is installed, a generated form is kept only if its base is the lemmatizer's
+only reading of it as the part of speech its rule is for (plurals as nouns,
+-ing/-ed as verbs, -er/-est as adjectives; -ly adverbs must name the base as
+their adjective), and WordNet's exception lists supply irregular forms. Without
+WordNet only the plural and verb endings without consonant doubling are
+generated, since nothing tells an adjective or verb base from a noun.
+
+The file also lists the English words (WordNet lemmas and their inflections)
+that are close enough to a vocabulary word for fuzzy correction to rewrite
+them. They are real words without a sign, not typos: "GENE" must be
+fingerspelled, not corrected to GONE.
+"""
+import hashlib
+import json
+import os
+import re
+from functools import lru_cache
+
+from utils.numbers import ONES, TENS
+
+# Same suffixes, in the same order, as the old strip-and-retry loop. Their
+# literal concatenations stand in for the spelling rules when WordNet is
+# missing; with WordNet the checked rule forms already cover the real words,
+# and what is left over is misreadings like "manes" -> MAN or "dos" -> DO.
+LEGACY_SUFFIXES = ["ing", "ed", "ly", "es", "s"]
+
+# Common irregular forms, used when WordNet's exception lists are unavailable
+IRREGULAR = {
+    'be': 'am is are was were been being', 'have': 'has had having', 'do': 'does did done doing',
+    'go': 'goes went gone going', 'eat': 'ate eaten', 'drink': 'drank drunk', 'see': 'saw seen',
+    'take': 'took taken', 'give': 'gave given', 'make': 'made', 'say': 'said', 'know': 'knew known',
+    'think': 'thought', 'write': 'wrote written', 'read': 'read', 'sleep': 'slept', 'run': 'ran',
+    'come': 'came', 'get': 'got gotten', 'find': 'found', 'tell': 'told', 'buy': 'bought',
+    'bring': 'brought', 'teach': 'taught', 'catch': 'caught', 'fight': 'fought', 'feel': 'felt',
+    'keep': 'kept', 'leave': 'left', 'meet': 'met', 'pay': 'paid', 'sell': 'sold', 'send': 'sent',
+    'sit': 'sat', 'stand': 'stood', 'understand': 'understood', 'swim': 'swam swum', 'sing': 'sang sung',
+    'begin': 'began begun', 'break': 'broke broken', 'choose': 'chose chosen', 'drive': 'drove driven',
+    'fall': 'fell fallen', 'fly': 'flew flown flies', 'forget': 'forgot forgotten', 'freeze': 'froze frozen',
+    'grow': 'grew grown', 'hide': 'hid hidden', 'hold': 'held', 'lose': 'lost', 'ride': 'rode ridden',
+    'ring': 'rang rung', 'rise': 'rose risen', 'shake': 'shook shaken', 'speak': 'spoke spoken',
+    'steal': 'stole stolen', 'throw': 'threw thrown', 'wake': 'woke woken', 'wear': 'wore worn',
+    'win': 'won', 'build': 'built', 'lend': 'lent', 'spend': 'spent', 'hear': 'heard', 'mean': 'meant',
+    'draw': 'drew drawn', 'blow': 'blew blown', 'dig': 'dug', 'feed': 'fed', 'lead': 'led',
+    'light': 'lit', 'shoot': 'shot', 'hang': 'hung', 'bite': 'bit bitten', 'tear': 'tore torn',
+    'become': 'became', 'forgive': 'forgave forgiven', 'lie': 'lay lain lying', 'die': 'dying',
+    'child': 'children', 'man': 'men', 'woman': 'women', 'foot': 'feet', 'tooth': 'teeth',
+    'mouse': 'mice', 'person': 'people', 'goose': 'geese', 'leaf': 'leaves', 'life': 'lives',
+    'knife': 'knives', 'wife': 'wives', 'half': 'halves', 'wolf': 'wolves', 'shelf': 'shelves',
+    'calf': 'calves', 'ox': 'oxen', 'datum': 'data', 'bacterium': 'bacteria', 'nucleus': 'nuclei',
+    'cactus': 'cacti', 'fungus': 'fungi', 'radius': 'radii', 'axis': 'axes', 'analysis': 'analyses',
+    'crisis': 'crises', 'phenomenon': 'phenomena', 'criterion': 'criteria', 'medium': 'media',
+    'good': 'better best', 'bad': 'worse worst', 'far': 'farther further farthest furthest',
+    'little': 'less least',
+}
+
+# Pronouns, determiners, modals and particles: never inflected and never an
+# inflection ("its" is not IT, "canned" is not CAN, "most" is not MANY)
+FUNCTION_WORDS = set('''
+    a an the i me my mine we us our ours you your yours he him his she her hers it its
+    they them their theirs this that these those who whom whose which what
+    can could will would may might must shall should
+    up down in on at of to for by with from off out over under into onto about
+    as or and but so if than then no not nor
+    all any some many much more most less least few each every
+'''.split())
+# Numbers take plurals ("the sixties") but no degrees ("fiver", "sixer")
+NUMBER_WORDS = {word.lower() for word in ONES + TENS if word}
+
+VOWELS = set('aeiou')
+CVC_RE = re.compile(r'(?:^|[^aeiou])[aeiou][bcdfgklmnprstvz]$')
+
+
+def _third_person(base):
+    if re.search(r'(s|x|z|ch|sh|o)$', base):
+        return base + 'es'
+    if len(base) > 1 and base.endswith('y') and base[-2] not in VOWELS:
+        return base[:-1] + 'ies'
+    return base + 's'
+
+
+def _stem_for_suffix(base):
+    """Stems that -ing/-ed/-er/-est attach to, most likely first"""
+    stems = []
+    if CVC_RE.search(base) and len(base) <= 6:
+        stems.append(base + base[-1])
+    if base.endswith('e') and not base.endswith(('ee', 'ye', 'oe')):
+        stems.append(base[:-1])
+    stems.append(base)
+    return stems
+
+
+def rule_forms(base, double=True, degrees=True):
+    """Regular inflections of an English word by spelling rules, as
+    (surface, part of speech) pairs: 'n' plural, 'v' verb, 'a' comparative or
+    superlative, 'r' adverb. Over-generates; build_table filters them."""
+    third = _third_person(base)
+    forms = [(third, 'n'), (third, 'v')]
+    stems = _stem_for_suffix(base)
+    if not double and CVC_RE.search(base) and len(base) <= 6:
+        stems = stems[1:]
+    for stem in stems:
+        if base.endswith('ie'):
+            forms.append((base[:-2] + 'ying', 'v'))
+        else:
+            forms.append((stem + 'ing', 'v'))
+        if base.endswith('e'):
+            forms.append((base + 'd', 'v'))
+        elif len(base) > 1 and base.endswith('y') and base[-2] not in VOWELS:
+            forms.append((base[:-1] + 'ied', 'v'))
+        else:
+            forms.append((stem + 'ed', 'v'))
+        if degrees:
+            y_stem = base.endswith('y') and base[-2:-1] not in VOWELS
+            forms.append(((base[:-1] + 'ier') if y_stem else stem + 'er', 'a'))
+            forms.append(((base[:-1] + 'iest') if y_stem else stem + 'est', 'a'))
+    if degrees:
+        if base.endswith('y') and len(base) > 1 and base[-2] not in VOWELS:
+            forms.append((base[:-1] + 'ily', 'r'))
+        elif base.endswith('le'):
+            forms.append((base[:-1] + 'y', 'r'))
+        elif base.endswith('ic'):
+            forms.append((base + 'ally', 'r'))
+        else:
+            forms.append((base + 'ly', 'r'))
+    seen = []
+    for form in forms:
+        if form[0] != base and form not in seen:
+            seen.append(form)
+    return seen
+
+
+@lru_cache(maxsize=1)
+def _wordnet():
+    """(morphy, exception map, adverb -> adjectives) when NLTK WordNet data is
+    installed, else None. morphy(form, pos) lists every lemma the lemmatizer
+    could return for form."""
+    try:
+        from nltk.corpus import wordnet
+        from nltk.stem import WordNetLemmatizer
+        lemmatizer = WordNetLemmatizer()
+        lemmatizer.lemmatize('tests', 'n')
+        wordnet.ensure_loaded()
+        adjectives = {}
+        for synset in wordnet.all_synsets('r'):
+            for lemma in synset.lemmas():
+                for pertainym in lemma.pertainyms():
+                    adjectives.setdefault(lemma.name().lower(), set()).add(pertainym.name().lower())
+        return wordnet._morphy, wordnet._exception_map, adjectives
+    except Exception as e:
+        print(f"[INFLECT] NLTK WordNet unavailable ({e.__class__.__name__}), using spelling rules only")
+        return None
+
+
+def _maps_back(wn, surface, pos, base):
+    """True if WordNet reads surface only as an inflection of base in that part
+    of speech ("taped" could be TAPE or TAP, so it is neither)"""
+    morphy, _, adjectives = wn
+    if pos == 'r':
+        return adjectives.get(surface) == {base}
+    if pos == 'a' and base in NUMBER_WORDS:
+        return False
+    # "days" is also a lemma of its own; that is not a second base
+    return set(morphy(surface, pos)) - {surface} == {base}
+
+
+def inputs_fingerprint(bases):
+    return hashlib.sha1(json.dumps(sorted(bases)).encode('utf-8')).hexdigest()[:12]
+
+
+def build_table(vocab_bases, synonym_bases):
+    """Map each surface form to one base. Priority: irregular, then rule forms
+    (vocabulary bases before synonyms), then, without WordNet, the legacy literal
+    suffixes in their old order. Returns (table, source)."""
+    # Single letters are fingerspelling signs, not words; "AS" must not become A
+    bases = [b for b in list(vocab_bases) + list(synonym_bases)
+             if b.isalpha() and len(b) > 1 and b not in FUNCTION_WORDS]
+    base_set = set(vocab_bases) | set(synonym_bases)
+    owner = {}
+
+    def claim(surface, base):
+        if surface not in base_set and surface not in FUNCTION_WORDS and surface not in owner:
+            owner[surface] = base
+
+    wn = _wordnet()
+    source = 'nltk-wordnet' if wn else 'rules'
+
+    # 1. Irregular forms
+    if wn:
+        for pos_map in wn[1].values():
+            for surface, lemmas in sorted(pos_map.items()):
+                for lemma in lemmas:
+                    if lemma in base_set and lemma not in FUNCTION_WORDS and surface.isalpha():
+                        claim(surface, lemma)
+                        break
+    for base, forms in IRREGULAR.items():
+        if base in base_set:
+            for surface in forms.split():
+                claim(surface, base)
+
+    # 2. Spelling-rule forms, each checked as its own part of speech
+    for base in bases:
+        for surface, pos in rule_forms(base, double=bool(wn), degrees=bool(wn)):
+            if not wn or _maps_back(wn, surface, pos, base):
+                claim(surface, base)
+
+    # 3. Literal suffixes, exactly what the old loop could strip
+    if not wn:
+        for suffix in LEGACY_SUFFIXES:
+            for base in bases:
+                claim(base + suffix, base)
+
+    table = {}
+    for surface, base in owner.items():
+        table.setdefault(base, []).append(surface)
+    return {base: ' '.join(sorted(forms)) for base, forms in sorted(table.items())}, source
+
+
+def dictionary_words(is_near):
+    """English words for which is_near(word) is true: WordNet lemmas, their
+    exception forms and the rule forms WordNet reads back to them. Empty
+    without WordNet."""
+    wn = _wordnet()
+    if not wn:
+        return []
+    from nltk.corpus import wordnet
+    lemmas = {name.lower() for name in wordnet.all_lemma_names() if name.isalpha()}
+    words = set(lemmas)
+    for lemma in lemmas:
+        words.update(surface for surface, pos in rule_forms(lemma) if _maps_back(wn, surface, pos, lemma))
+    for pos_map in wn[1].values():
+        words.update(surface for surface in pos_map if surface.isalpha())
+    return sorted(word for word in words if is_near(word))
+
+
+def save_table(path, table, source, fingerprint, dictionary=()):
+    """One base per line (and one dictionary line per initial letter) keeps the
+    file small and diffs readable"""
+    lines = [f"  {json.dumps(base)}: {json.dumps(forms)}" for base, forms in table.items()]
+    by_letter = {}
+    for word in dictionary:
+        by_letter.setdefault(word[0], []).append(word)
+    words = [f"  {json.dumps(letter)}: {json.dumps(' '.join(group))}" for letter, group in sorted(by_letter.items())]
+    header = json.dumps({"source": source, "inputs": fingerprint})[1:-1]
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("{" + header + ', "forms": {\n' + ',\n'.join(lines) + "\n},\n"
+                '"dictionary": {\n' + ',\n'.join(words) + "\n}}\n")
+
+
+def load_table(path):
+    """({surface form: base token}, set of dictionary words, file metadata);
+    empty if missing"""
+    if not os.path.exists(path):
+        print(f"[INFLECT] {path} not found; run build_inflections.py")
+        return {}, set(), {}
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    surfaces = {}
+    for base, forms in data.get("forms", {}).items():
+        for surface in forms.split():
+            surfaces[surface] = base
+    dictionary = set()
+    for words in data.get("dictionary", {}).values():
+        dictionary.update(words.split())
+    return surfaces, dictionary, {"source": data.get("source"), "inputs": data.get("inputs")}
@@ -0,0 +1,188 @@
+"""
+Single-pass math verbalizer for sign gloss.
+One compiled tokenizer splits the text into numbers, words, operators, Greek
+letters, sub/superscripts and punctuation; a reader with one token of
+lookahead then emits gloss words left to right:
+
+    2ab      -> TWO A B            coefficient: letters after a number are variables
+    x2, x^2  -> X SQUARE           a number right after a variable or ")" is a power
+    x²y³     -> X SQUARE Y CUBE    superscripts are powers, x^n / xⁿ -> POWER n
+    x₁       -> X ONE              subscripts are indices, not powers
+    (a+b)^2  -> OPEN BRACKET A PLUS B CLOSE BRACKET SQUARE
+    sin2x    -> SIN TWO X          function names stay whole
+    1,000    -> 1 THOUSAND         thousands separators belong to the number
+    10 kg    -> 10 KILOGRAM        units after a number (see utils/numbers.py)
+    2H2O     -> TWO H TWO O        digits inside a chemical formula are counts
+
+Words not touching a digit keep their spelling (prose passes through for the
+LLM); single letters become upper-case variables. Tokens never span
+whitespace, so each whitespace-separated chunk is verbalized on its own: plain
+words skip the tokenizer and other chunks ("x^2", "2x", "=") are memoized,
+since the same expressions recur across sentences and requests.
+"""
+import re
+from functools import lru_cache
+
+SUPERSCRIPTS = '⁰¹²³⁴⁵⁶⁷⁸⁹'
+SUBSCRIPTS = '₀₁₂₃₄₅₆₇₈₉'
+SUPERSCRIPT_DIGITS = str.maketrans(SUPERSCRIPTS, '0123456789')
+SUBSCRIPT_DIGITS = str.maketrans(SUBSCRIPTS, '0123456789')
+FUNCTIONS = {'sin', 'cos', 'tan', 'cot', 'sec', 'csc', 'log', 'ln', 'exp', 'sqrt', 'lim', 'max', 'min'}
+
+ELEMENTS = set("""
+H He Li Be B C N O F Ne Na Mg Al Si P S Cl Ar K Ca Sc Ti V Cr Mn Fe Co Ni Cu Zn
+Ga Ge As Se Br Kr Rb Sr Y Zr Nb Mo Tc Ru Rh Pd Ag Cd In Sn Sb Te I Xe Cs Ba La
+Ce Pr Nd Pm Sm Eu Gd Tb Dy Ho Er Tm Yb Lu Hf Ta W Re Os Ir Pt Au Hg Tl Pb Bi Po
+At Rn Fr Ra Ac Th Pa U Np Pu Am Cm Bk Cf Es Fm Md No Lr
+""".split())
+ELEMENT_RE = re.compile(r'([A-Z][a-z]?)(\d*)')
+
+# Attach to the previous word instead of standing alone
+GLUE = set('.,;:!?\'"')
+# A chunk the tokenizer would return unchanged: a word, maybe with trailing punctuation
+PLAIN_RE = re.compile(r"[A-Za-z]{2,}(?:'[A-Za-z]+)*[.,;:!?'\"]*")
+
+
+class MathVerbalizer:
+    """Text with math notation -> sign-friendly words, in one pass."""
+
+    def __init__(self, operators, greek, number_words, units=None, cache_size=4096):
+        self.number_words = lru_cache(maxsize=1024)(number_words)
+        self.greek = dict(greek)
+        # ^ and the superscripts are handled as powers, not as plain operators
+        self.operators = {op: word.split() for op, word in operators.items()
+                          if op != '^' and not any(c in SUPERSCRIPTS for c in op)}
+        symbols = set(self.greek) | {c for op in self.operators for c in op}
+        symbols |= set(SUPERSCRIPTS + SUBSCRIPTS)
+        letter = r"[^\W\d_" + re.escape(''.join(sorted(symbols))) + r"]"
+        # Single-letter units (A, N, V...) would swallow variables; only longer ones
+        self.units = {key.lower(): words for key, words in (units or {}).items() if len(key) > 1}
+        unit = "(?i:" + '|'.join(re.escape(u) for u in sorted(self.units, key=len, reverse=True)) + r")(?![^\W\d_])"
+        self._unit_gap_re = re.compile(r"(\d)\s+(?=" + unit + ")") if self.units else None
+        patterns = [
+            r"(?P<space>\s+)",
+            r"(?P<ordinal>\d+(?:st|nd|rd|th)(?![^\W\d_]))",
+            r"(?P<number>(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?(?:[eE][+-]?\d+)?)",
+            rf"(?P<unit>(?<=\d){unit})" if self.units else r"(?P<unit>(?!))",
+            rf"(?P<word>{letter}+(?:'{letter}+)*)",
+            rf"(?P<sup>[{SUPERSCRIPTS}]+)",
+            rf"(?P<sub>[{SUBSCRIPTS}]+)",
+            r"(?P<caret>\^)",
+            "(?P<greek>" + '|'.join(re.escape(g) for g in self.greek) + ")",
+            "(?P<op>" + '|'.join(re.escape(op) for op in sorted(self.operators, key=len, reverse=True)) + ")",
+            r"(?P<other>.)",
+        ]
+        self._plain_re = re.compile('|'.join(patterns), re.DOTALL)
+        # Element symbols with counts, e.g. H2O or C6H12O6; checked in tokenize()
+        chem = r"(?P<chem>(?:[A-Z][a-z]?\d*){2,}(?![^\W_]))"
+        self._token_re = re.compile('|'.join(patterns[:2] + [chem] + patterns[2:]), re.DOTALL)
+        self._chunk = lru_cache(maxsize=cache_size)(self._gloss_chunk)
+
+    def tokenize(self, chunk):
+        """[(kind, text)] for one whitespace-free chunk; every token touches the next"""
+        tokens = []
+        for m in self._token_re.finditer(chunk):
+            kind = m.lastgroup
+            if kind == 'chem' and not self._is_chemical(m.group()):
+                # Upper-case words and variables such as DNA or AB2
+                tokens.extend((part.lastgroup, part.group()) for part in self._plain_re.finditer(m.group()))
+            else:
+                tokens.append((kind, m.group()))
+        return tokens
+
+    @staticmethod
+    def _is_chemical(value):
+        groups = ELEMENT_RE.findall(value)
+        return any(count for _, count in groups) and all(symbol in ELEMENTS for symbol, _ in groups)
+
+    def power(self, digits):
+        if digits == '2':
+            return ['SQUARE']
+        if digits == '3':
+            return ['CUBE']
+        return ['POWER', self.number_words(digits)]
+
+    def gloss(self, text):
+        """Verbalized text as one space-separated string"""
+        if self._unit_gap_re:
+            # "10 kg" is read like "10kg"
+            text = self._unit_gap_re.sub(r"\1", text)
+        return ' '.join(map(self._chunk, text.split()))
+
+    def _gloss_chunk(self, chunk):
+        if PLAIN_RE.fullmatch(chunk) and chunk.rstrip('.,;:!?\'"').lower() not in FUNCTIONS:
+            return chunk
+        tokens = self.tokenize(chunk)
+        kinds = [kind for kind, _ in tokens] + [None, None]
+        out = []
+        i, n = 0, len(tokens)
+        while i < n:
+            kind, value = tokens[i]
+            following = kinds[i + 1]
+            if kind == 'number':
+                out.append(self.number_words(value))
+                if following == 'word':
+                    word = tokens[i + 1][1]
+                    # Coefficient: 2ab -> TWO A B, 2H2 -> TWO H TWO
+                    if word in ELEMENTS and kinds[i + 2] == 'number':
+                        out.extend(word.upper())
+                        out.append(self.number_words(tokens[i + 2][1]))
+                        i += 2
+                    elif word.lower() not in FUNCTIONS:
+                        i = self._variables(tokens, kinds, i + 1, out)
+            elif kind == 'word':
+                if value.lower() in FUNCTIONS:
+                    out.append(value.upper())
+                elif following == 'number' or len(value) == 1:
+                    i = self._variables(tokens, kinds, i, out)
+                else:
+                    out.append(value)
+            elif kind == 'unit':
+                out.extend(self.units[value.lower()])
+            elif kind == 'ordinal':
+                out.append(self.number_words(value))
+            elif kind == 'op':
+                out.extend(self.operators[value])
+                # (a+b)2 -> ... CLOSE BRACKET SQUARE
+                if value == ')' and following == 'number':
+                    i += 1
+                    out.extend(self.power(tokens[i][1]))
+            elif kind == 'greek':
+                out.append(self.greek[value])
+            elif kind == 'caret':
+                if following == 'number':
+                    i += 1
+                    out.extend(self.power(tokens[i][1]))
+                else:
+                    out.append('POWER')
+            elif kind == 'sup':
+                out.extend(self.power(value.translate(SUPERSCRIPT_DIGITS)))
+            elif kind == 'sub':
+                out.append(self.number_words(value.translate(SUBSCRIPT_DIGITS)))
+            elif kind == 'chem':
+                for symbol, count in ELEMENT_RE.findall(value):
+                    out.extend(symbol.upper())
+                    if count:
+                        out.append(self.number_words(count))
+            elif value in GLUE and out:
+                out[-1] += value
+            else:
+                out.append(value)
+            i += 1
+        return ' '.join(out)
+
+    def _variables(self, tokens, kinds, i, out):
+        """Emit the word at tokens[i] as single-letter variables, plus a power if
+        a number touches it. Returns the index of the last token consumed."""
+        out.extend(c for c in tokens[i][1].upper() if c != "'")
+        if kinds[i + 1] == 'number':
+            i += 1
+            out.extend(self.power(tokens[i][1]))
+        return i
+
+    def clear(self):
+        self._chunk.cache_clear()
+
+    def stats(self):
+        chunks = self._chunk.cache_info()
+        return {"chunk_hits": chunks.hits, "chunk_misses": chunks.misses, "chunks_cached": chunks.currsize}
@@ -0,0 +1,180 @@
+"""
+Table-driven number verbalizer for sign gloss.
+The words for 0-99 and the unit readings are generated once at startup.
+Where several readings with the same meaning exist, the one with the fewest
+signs wins. A word without a sign file is fingerspelled, so it costs one sign
+per letter. In practice that means:
+- numerals with their own sign file ("13", "100") are used over number words;
+- hundreds are read TWO HUNDRED when the pair has one phrase sign
+  (twohundred), and 2 HUNDRED otherwise;
+- a bare four-digit number may be read in pairs like a year; one written
+  with a thousands separator ("1,905") is a quantity and keeps THOUSAND;
+- larger numbers always keep their scale words (THOUSAND, MILLION), which
+  digit-by-digit reading would lose;
+- ordinals always carry an ordinal marker: the ordinal word, or the cardinal
+  followed by its fingerspelled suffix;
+- units are read by their name (METER PER SECOND), never as their symbol.
+Results are memoized.
+
+    2024        -> TWENTY TWENTY 4
+    1905        -> NINETEEN 0 5
+    1,905       -> 1 THOUSAND NINE HUNDRED 5
+    1000, 2000  -> 1 THOUSAND, 2 THOUSAND
+    -3.75       -> MINUS 3 DECIMAL 7 5     (here DECIMAL has a sign, POINT does not)
+    6.02e23     -> 6 DECIMAL 0 2 TIMES 10 POWER TWENTY 3
+    1,000,000   -> 1 MILLION
+    1st, 21st   -> FIRST, TWENTY FIRST     (FIRST has a sign)
+    3rd, 5th    -> 3 R D, 5 T H            (THIRD and FIFTH do not)
+"""
+import re
+from functools import lru_cache
+
+ONES = ['ZERO', 'ONE', 'TWO', 'THREE', 'FOUR', 'FIVE', 'SIX', 'SEVEN', 'EIGHT', 'NINE', 'TEN',
+        'ELEVEN', 'TWELVE', 'THIRTEEN', 'FOURTEEN', 'FIFTEEN', 'SIXTEEN', 'SEVENTEEN', 'EIGHTEEN', 'NINETEEN']
+TENS = ['', '', 'TWENTY', 'THIRTY', 'FORTY', 'FIFTY', 'SIXTY', 'SEVENTY', 'EIGHTY', 'NINETY']
+SCALES = [(10 ** 12, 'TRILLION'), (10 ** 9, 'BILLION'), (10 ** 6, 'MILLION'), (1000, 'THOUSAND')]
+ORDINALS = ['', 'FIRST', 'SECOND', 'THIRD', 'FOURTH', 'FIFTH', 'SIXTH', 'SEVENTH', 'EIGHTH',
+            'NINTH', 'TENTH', 'ELEVENTH', 'TWELFTH']
+
+NUMBER_RE = re.compile(
+    r'(?P<sign>[-−])?(?P<whole>\d{1,3}(?:,\d{3})+|\d+)?(?:\.(?P<fraction>\d+))?'
+    r'(?:[eE](?P<exponent>[+-]?\d+))?')
+ORDINAL_RE = re.compile(r'(?P<number>\d+)(?P<suffix>st|nd|rd|th)', re.IGNORECASE)
+# Past this the scale words run out; such strings are codes, read digit by digit
+MAX_CARDINAL = 10 ** 15
+
+
+class NumberWords:
+    """Number strings -> gloss words, from tables built once."""
+
+    def __init__(self, has_sign=None, units=None, cache_size=4096):
+        has_sign = has_sign or (lambda word: False)
+        self._has_sign = has_sign
+        # Word pairs the matcher signs as one phrase
+        self._pairs = set()
+        self._small = []
+        for n in range(100):
+            self._small.append(self._build_small(n, has_sign))
+        self._hundreds = [None] + [self._build_hundreds(h, has_sign) for h in range(1, 10)]
+        self.hundred = ['100'] if has_sign('100') else self._hundreds[1]
+        self.point = self._cheapest(['POINT'], ['DECIMAL'])[0]
+        self.units = {key: self._build_unit(key, words) for key, words in (units or {}).items()}
+        self.say = lru_cache(maxsize=cache_size)(self._say)
+
+    def _build_small(self, n, has_sign):
+        if has_sign(str(n)):
+            return [str(n)]
+        if n < 20:
+            return [ONES[n]]
+        tens, ones = divmod(n, 10)
+        return [TENS[tens]] + (self._small[ones] if ones else [])
+
+    def _build_hundreds(self, h, has_sign):
+        """h HUNDRED; a sign file named like "twohundred" is matched from the
+        phrase TWO HUNDRED, so the number word is used then"""
+        if has_sign(ONES[h] + 'HUNDRED'):
+            self._pairs.add((ONES[h], 'HUNDRED'))
+            return [ONES[h], 'HUNDRED']
+        return self._small[h] + ['HUNDRED']
+
+    def cost(self, words):
+        """Signs needed: one per phrase pair or word with a sign file, one per
+        letter otherwise"""
+        total, i = 0, 0
+        while i < len(words):
+            if tuple(words[i:i + 2]) in self._pairs:
+                total += 1
+                i += 2
+                continue
+            total += 1 if self._has_sign(words[i]) else len(words[i])
+            i += 1
+        return total
+
+    def _cheapest(self, *readings):
+        """The reading with the fewest signs; the first one wins ties"""
+        return min(readings, key=self.cost)
+
+    def _build_unit(self, key, words):
+        """The unit's name: M DIVIDE S would read as a division of variables"""
+        return words.split()
+
+    def integer(self, n):
+        """Words for a non-negative int"""
+        if n < 100:
+            return list(self._small[n])
+        words = []
+        for value, scale in SCALES:
+            if n >= value:
+                words += self.integer(n // value) + [scale]
+                n %= value
+        if n >= 100:
+            hundreds, n = divmod(n, 100)
+            words += self.hundred if hundreds == 1 and n == 0 else self._hundreds[hundreds]
+        if n:
+            words += self._small[n]
+        return words
+
+    def whole_number(self, text):
+        """Reading of a digit string, with or without thousands separators: the
+        full cardinal, or for four bare digits in pairs like a year
+        (1905 -> NINETEEN 0 5, 1200 -> 12 HUNDRED) when that takes fewer signs.
+        Leading zeros ("007") and numbers past the scale words are read digit
+        by digit."""
+        grouped = ',' in text
+        text = text.replace(',', '')
+        if len(text) > 1 and text[0] == '0':
+            return self.digits(text)
+        n = int(text)
+        if n >= MAX_CARDINAL:
+            return self.digits(text)
+        if n < 1000 or len(text) > 4 or grouped:
+            return self.integer(n)
+        readings = [self.integer(n)]
+        if len(text) == 4:
+            high, low = divmod(n, 100)
+            if low == 0:
+                readings.append(self._small[high] + ['HUNDRED'])
+            elif low < 10:
+                readings.append(self._small[high] + self._small[0] + self._small[low])
+            else:
+                readings.append(self._small[high] + self._small[low])
+        return self._cheapest(*readings)
+
+    def digits(self, text):
+        return [w for d in text for w in self._small[int(d)]]
+
+    def ordinal(self, n, suffix='th'):
+        """Ordinal reading that keeps its marker: the ordinal word, tens plus the
+        ordinal word (TWENTY FIRST), or the cardinal plus the fingerspelled
+        suffix (3 R D), whichever takes fewest signs"""
+        readings = []
+        if 0 < n < len(ORDINALS):
+            readings.append([ORDINALS[n]])
+        elif 20 < n < 100 and n % 10:
+            readings.append(self._small[n - n % 10] + [ORDINALS[n % 10]])
+        readings.append(self.integer(n) + list(suffix.upper()))
+        return self._cheapest(*readings)
+
+    def _say(self, text):
+        """Space-separated words for a number string; unparseable input is read digit by digit"""
+        ordinal = ORDINAL_RE.fullmatch(text)
+        if ordinal:
+            return ' '.join(self.ordinal(int(ordinal.group('number')), ordinal.group('suffix')))
+        m = NUMBER_RE.fullmatch(text.strip())
+        if not m or not (m.group('whole') or m.group('fraction')):
+            return ' '.join(w for d in text for w in (self._small[int(d)] if d in '0123456789' else [d]))
+        words = ['MINUS'] if m.group('sign') else []
+        words += self.whole_number(m.group('whole') or '0')
+        if m.group('fraction'):
+            words += [self.point] + self.digits(m.group('fraction'))
+        if m.group('exponent'):
+            exponent = m.group('exponent')
+            words += ['TIMES'] + self.integer(10) + ['POWER']
+            if exponent[0] == '-':
+                words.append('MINUS')
+            words += self.integer(int(exponent.lstrip('+-')))
+        return ' '.join(words)
+
+    def stats(self):
+        info = self.say.cache_info()
+        return {"hits": info.hits, "misses": info.misses, "cached": info.currsize}
@@ -0,0 +1,73 @@
+"""
+Multi-word phrase matching over gloss token streams.
+A token trie finds the longest phrase starting at each position, so a
+sentence is scanned once, greedily and left to right. Each phrase is at most a
+handful of tokens, so the scan is linear in the number of tokens.
+"""
+from functools import lru_cache
+
+_END = object()
+
+
+def derive_compounds(sign_words, dictionary, min_part=3, exclude=()):
+    """Split concatenated sign names ("thankyou", "schoolbus") into their words.
+    Returns {("THANK", "YOU"): "thankyou", ...}. The split uses the fewest
+    parts, each at least `min_part` letters and present in `dictionary`."""
+    phrases = {}
+    for word in sorted(sign_words):
+        if not word.isalpha() or word in exclude:
+            continue
+
+        @lru_cache(maxsize=None)
+        def split(i):
+            if i == len(word):
+                return ()
+            best = None
+            for j in range(i + min_part, len(word) + 1):
+                if i == 0 and j == len(word):
+                    continue
+                if word[i:j] in dictionary:
+                    rest = split(j)
+                    if rest is not None and (best is None or len(rest) + 1 < len(best)):
+                        best = (word[i:j],) + rest
+            return best
+
+        parts = split(0)
+        if parts:
+            phrases[tuple(p.upper() for p in parts)] = word
+    return phrases
+
+
+class PhraseMatcher:
+    """Greedy longest-match of token sequences against a phrase table."""
+
+    def __init__(self, phrases):
+        self._trie = {}
+        self.max_len = 0
+        for tokens, target in phrases.items():
+            node = self._trie
+            for token in tokens:
+                node = node.setdefault(token.upper(), {})
+            node[_END] = target
+            self.max_len = max(self.max_len, len(tokens))
+        self.size = len(phrases)
+
+    def scan(self, tokens):
+        """Yield (tokens, target) runs covering `tokens` in order. target is the
+        phrase's sign for a phrase match, None for a lone token."""
+        upper = [t.upper() for t in tokens]
+        i, n = 0, len(upper)
+        while i < n:
+            node, j = self._trie, i
+            best_end, best_target = None, None
+            while j < n and upper[j] in node:
+                node = node[upper[j]]
+                j += 1
+                if _END in node:
+                    best_end, best_target = j, node[_END]
+            if best_end is not None and best_end - i > 1:
+                yield tuple(tokens[i:best_end]), best_target
+                i = best_end
+            else:
+                yield (tokens[i],), None
+                i += 1
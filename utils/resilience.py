@@ -0,0 +1,132 @@
+"""
+Deadline budgets and a circuit breaker for upstream (Groq) calls.
+A Deadline is created once per request and passed through every LLM stage;
+each call gets only the time that is left. The CircuitBreaker opens after
+consecutive failures or slow calls so requests go straight to local fallbacks.
+"""
+import threading
+import time
+
+
+class DeadlineExceeded(Exception):
+    """The request's time budget ran out before the upstream call could start."""
+
+
+class CircuitOpenError(Exception):
+    """The breaker is open; the upstream call was not attempted."""
+
+
+class Deadline:
+    """Absolute time budget for one request."""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self):
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self):
+        return self.remaining() <= 0
+
+    def timeout(self, cap=None, minimum=0.5):
+        """Seconds to allow the next call, capped; raises if too little is left."""
+        left = self.remaining()
+        if left < minimum:
+            raise DeadlineExceeded(f"{self.seconds}s request budget exhausted")
+        return min(left, cap) if cap else left
+
+
+class CircuitBreaker:
+    """Closed -> open after N consecutive failures or latency breaches.
+    After open_seconds the breaker goes half-open and lets a few probe calls
+    through; enough probe successes close it, any probe failure re-opens it."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, latency_threshold=20.0, open_seconds=30.0,
+                 half_open_probes=2):
+        self.failure_threshold = failure_threshold
+        self.latency_threshold = latency_threshold
+        self.open_seconds = open_seconds
+        self.half_open_probes = half_open_probes
+        self._lock = threading.Lock()
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self.total_failures = 0
+        self.total_slow = 0
+        self.total_rejected = 0
+        self.times_opened = 0
+
+    def _open(self):
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+        self.times_opened += 1
+        print(f"[BREAKER] Open after {self.consecutive_failures} consecutive failures")
+
+    def allow(self):
+        """Whether a call may go upstream now. Rejections are counted."""
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at >= self.open_seconds:
+                    self.state = self.HALF_OPEN
+                    print("[BREAKER] Half-open, probing upstream")
+                else:
+                    self.total_rejected += 1
+                    return False
+            if self.state == self.HALF_OPEN:
+                if self._probes_in_flight >= self.half_open_probes:
+                    self.total_rejected += 1
+                    return False
+                self._probes_in_flight += 1
+            return True
+
+    def record_success(self, latency):
+        if latency > self.latency_threshold:
+            with self._lock:
+                self.total_slow += 1
+            self.record_failure(slow=True)
+            return
+        with self._lock:
+            self.consecutive_failures = 0
+            if self.state == self.HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+                self._probe_successes += 1
+                if self._probe_successes >= self.half_open_probes:
+                    self.state = self.CLOSED
+                    self.opened_at = None
+                    print("[BREAKER] Closed, upstream healthy again")
+
+    def record_failure(self, slow=False):
+        with self._lock:
+            if not slow:
+                self.total_failures += 1
+            self.consecutive_failures += 1
+            if self.state == self.HALF_OPEN:
+                self._open()
+            elif self.state == self.CLOSED and self.consecutive_failures >= self.failure_threshold:
+                self._open()
+
+    def stats(self):
+        with self._lock:
+            retry_in = None
+            if self.state == self.OPEN:
+                retry_in = round(max(0.0, self.open_seconds - (time.monotonic() - self.opened_at)), 1)
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "failure_threshold": self.failure_threshold,
+                "latency_threshold": self.latency_threshold,
+                "retry_in": retry_in,
+                "times_opened": self.times_opened,
+                "total_failures": self.total_failures,
+                "total_slow": self.total_slow,
+                "total_rejected": self.total_rejected,
+            }
@@ -0,0 +1,221 @@
+"""
+Offline rule-based sign gloss engine.
+Used as a fast path for short, simple sentences and as the fallback when the
+LLM is unavailable. POS tags come from stanza when its English models are
+installed, then NLTK's perceptron tagger, then a small built-in lexicon.
+The tagger is loaded once per process.
+"""
+import re
+import threading
+
+ARTICLES = {'a', 'an', 'the'}
+BE_FORMS = {'is', 'am', 'are', 'was', 'were', 'be', 'been', 'being'}
+DO_FORMS = {'do', 'does', 'did'}
+NEGATIONS = {'not', "n't", 'no', 'never'}
+WH_WORDS = {'what', 'why', 'how', 'when', 'where', 'who', 'which', 'whom', 'whose'}
+CLAUSE_MARKERS = {'and', 'or', 'but', 'because', 'although', 'while', 'if', 'that',
+                  'which', 'who', 'whom', 'whose', 'when', 'where', 'so', 'since', 'unless'}
+
+# Fillers dropped by both grammars (mirrors the rules given to the LLM)
+FILLERS = ARTICLES | BE_FORMS
+
+# Built-in lexicon for the last-resort tagger
+PRONOUNS = {'i', 'you', 'he', 'she', 'it', 'we', 'they', 'me', 'him', 'her', 'us', 'them',
+            'my', 'your', 'his', 'its', 'our', 'their', 'this', 'that', 'these', 'those'}
+PREPOSITIONS = {'in', 'on', 'at', 'to', 'from', 'with', 'by', 'for', 'of', 'into', 'onto',
+                'over', 'under', 'about', 'after', 'before', 'between', 'through', 'during',
+                'without', 'above', 'below', 'near', 'across', 'per'}
+MODALS = {'can', 'could', 'will', 'would', 'shall', 'should', 'may', 'might', 'must'}
+COMMON_VERBS = {
+    'eat', 'drink', 'go', 'come', 'see', 'look', 'watch', 'read', 'write', 'learn', 'teach',
+    'know', 'understand', 'think', 'want', 'need', 'like', 'love', 'have', 'has', 'had',
+    'make', 'take', 'give', 'get', 'put', 'use', 'work', 'play', 'run', 'walk', 'sleep',
+    'help', 'ask', 'answer', 'tell', 'say', 'speak', 'sign', 'show', 'find', 'move', 'push',
+    'pull', 'open', 'close', 'start', 'stop', 'finish', 'buy', 'sell', 'pay',
+    'study', 'measure', 'mix', 'heat', 'boil', 'melt', 'freeze', 'grow', 'change', 'add',
+    'divide', 'multiply', 'subtract', 'equal', 'equals', 'contain', 'contains', 'produce',
+    'produces', 'absorb', 'absorbs', 'release', 'releases', 'convert', 'converts', 'form',
+    'forms', 'react', 'reacts', 'flow', 'flows', 'fall', 'falls', 'rise', 'rises', 'kick',
+    'cook', 'swim', 'dance', 'jump', 'sit', 'stand', 'cry', 'laugh', 'live', 'die', 'keep',
+    'become', 'becomes', 'increase', 'increases', 'decrease', 'decreases', 'needs',
+}
+NON_VERB_ED_ING = {'red', 'bed', 'need', 'speed', 'seed', 'feed', 'hundred', 'thing',
+                   'something', 'nothing', 'everything', 'morning', 'evening', 'ring',
+                   'king', 'spring', 'string', 'ceiling', 'building', 'during'}
+
+# Penn Treebank -> Universal POS, for the NLTK tagger
+PENN_TO_UPOS = {
+    'NN': 'NOUN', 'NNS': 'NOUN', 'NNP': 'PROPN', 'NNPS': 'PROPN',
+    'VB': 'VERB', 'VBD': 'VERB', 'VBG': 'VERB', 'VBN': 'VERB', 'VBP': 'VERB', 'VBZ': 'VERB',
+    'MD': 'AUX', 'JJ': 'ADJ', 'JJR': 'ADJ', 'JJS': 'ADJ',
+    'RB': 'ADV', 'RBR': 'ADV', 'RBS': 'ADV', 'WRB': 'ADV',
+    'PRP': 'PRON', 'PRP$': 'PRON', 'WP': 'PRON', 'WP$': 'PRON',
+    'DT': 'DET', 'PDT': 'DET', 'WDT': 'DET', 'IN': 'ADP', 'TO': 'PART', 'RP': 'PART',
+    'CC': 'CCONJ', 'CD': 'NUM', 'EX': 'PRON', 'UH': 'INTJ',
+}
+
+# Starting confidence per tagger; rules then subtract penalties
+TAGGER_CONFIDENCE = {'stanza': 0.95, 'nltk': 0.9, 'lexicon': 0.75}
+
+TOKEN_RE = re.compile(r"n't|[A-Za-z0-9]+(?:'[A-Za-z]+)?|[^\sA-Za-z0-9]")
+
+_tagger = None
+_tagger_name = None
+_tagger_lock = threading.Lock()
+
+
+def _load_tagger():
+    """Pick the best available tagger once per process"""
+    global _tagger, _tagger_name
+    if _tagger_name is not None:
+        return _tagger_name
+    with _tagger_lock:
+        if _tagger_name is not None:
+            return _tagger_name
+        try:
+            import stanza
+            _tagger = stanza.Pipeline('en', processors='tokenize,pos,lemma',
+                                      download_method=None, verbose=False)
+            _tagger_name = 'stanza'
+        except Exception as e:
+            print(f"[RULES] stanza unavailable ({e.__class__.__name__}), trying NLTK")
+            try:
+                import nltk
+                nltk.pos_tag(['test'])
+                _tagger = nltk
+                _tagger_name = 'nltk'
+            except Exception as e2:
+                print(f"[RULES] NLTK tagger unavailable ({e2.__class__.__name__}), using built-in lexicon")
+                _tagger = None
+                _tagger_name = 'lexicon'
+        print(f"[RULES] Rule gloss engine using '{_tagger_name}' tagger")
+    return _tagger_name
+
+
+def tokenize(text):
+    """Split text into words, splitting n't contractions off their verb"""
+    text = re.sub(r"(?i)\b(can)'t\b", r"\1 n't", text)
+    text = re.sub(r"(?i)\bwon't\b", "will n't", text)
+    text = re.sub(r"(?i)(\w)n't\b", r"\1 n't", text)
+    return TOKEN_RE.findall(text)
+
+
+def _lexicon_tag(word):
+    w = word.lower()
+    if not re.search(r'[a-z0-9]', w):
+        return 'PUNCT'
+    if w.isdigit():
+        return 'NUM'
+    if w in ARTICLES:
+        return 'DET'
+    if w in BE_FORMS or w in DO_FORMS or w in MODALS:
+        return 'AUX'
+    if w in NEGATIONS:
+        return 'PART'
+    if w in PRONOUNS or w in WH_WORDS:
+        return 'PRON'
+    if w in PREPOSITIONS:
+        return 'ADP'
+    if w in CLAUSE_MARKERS:
+        return 'CCONJ'
+    if w in COMMON_VERBS:
+        return 'VERB'
+    if w not in NON_VERB_ED_ING and len(w) > 4 and (w.endswith('ed') or w.endswith('ing')):
+        return 'VERB'
+    if w.endswith('ly'):
+        return 'ADV'
+    return 'X'
+
+
+def tag(text):
+    """Return (tokens, tagger_name); tokens are (word, upos, lemma) tuples"""
+    name = _load_tagger()
+    if name == 'stanza':
+        doc = _tagger(text)
+        return [(w.text, w.upos, w.lemma or w.text) for s in doc.sentences for w in s.words], name
+    words = tokenize(text)
+    if name == 'nltk':
+        tagged = _tagger.pos_tag(words)
+        return [(w, PENN_TO_UPOS.get(t, 'X'), w) for w, t in tagged], name
+    return [(w, _lexicon_tag(w), w) for w in words], name
+
+
+def _is_verb(word, upos):
+    w = word.lower()
+    return upos == 'VERB' and w not in BE_FORMS and w not in DO_FORMS
+
+
+def rule_gloss(text, language="isl"):
+    """Gloss text with local grammar rules.
+    Returns {"gloss_words": [...], "confidence": 0..1, "tagger": name}.
+    ISL: drop fillers, move verbs to the end, negation after the verb.
+    ASL: keep English order, drop fillers only."""
+    tokens, tagger_name = tag(text)
+    confidence = TAGGER_CONFIDENCE[tagger_name]
+
+    words = [(w, upos, lemma) for w, upos, lemma in tokens if upos != 'PUNCT' and re.search(r'\w', w)]
+    lower = [w.lower() for w, _, _ in words]
+
+    negated = any(w in NEGATIONS for w in lower)
+    is_question = '?' in text or (lower and lower[0] in WH_WORDS)
+    clause_count = sum(1 for w in lower if w in CLAUSE_MARKERS) + text.count(',') + text.count(';')
+    unknown = sum(1 for _, upos, _ in words if upos == 'X')
+
+    if language == "asl":
+        gloss = []
+        for i, (w, upos, _) in enumerate(words):
+            wl = w.lower()
+            if wl in FILLERS:
+                continue
+            # "don't" -> NOT, keeping English order
+            if wl in DO_FORMS and i + 1 < len(lower) and lower[i + 1] in NEGATIONS:
+                continue
+            gloss.append('NOT' if wl == "n't" else w.upper())
+        if is_question:
+            confidence -= 0.1
+    else:
+        front, verbs = [], []
+        for w, upos, lemma in words:
+            wl = w.lower()
+            if wl in FILLERS or wl in NEGATIONS:
+                continue
+            # do-support carries no sign in ISL ("I don't understand" -> I UNDERSTAND NOT)
+            if wl in DO_FORMS and upos == 'AUX':
+                continue
+            if upos == 'PART' and wl == 'to':
+                continue
+            if _is_verb(w, upos):
+                verbs.append((lemma if tagger_name == 'stanza' else w).upper())
+            else:
+                front.append(w.upper())
+        gloss = front + verbs
+        if negated:
+            gloss.append('NOT')
+
+        if len(verbs) > 1:
+            confidence -= 0.15 * (len(verbs) - 1)
+        if is_question:
+            confidence -= 0.25
+        if clause_count:
+            confidence -= 0.2 * clause_count
+        if not verbs and len(words) >= 3:
+            # Probably a verb the tagger missed, so word order is a guess
+            confidence -= 0.15
+
+    if unknown and tagger_name == 'lexicon':
+        confidence -= 0.05 * unknown
+    if len(words) > 8:
+        confidence -= 0.03 * (len(words) - 8)
+
+    # Same character rule as LLM output parsing: letters and digits only
+    gloss = [re.sub(r'[^A-Z0-9]', '', w.upper()) for w in gloss]
+    return {
+        "gloss_words": [w for w in gloss if w],
+        "confidence": round(max(0.0, min(1.0, confidence)), 3),
+        "tagger": tagger_name,
+    }
+
+
+def tagger_name():
+    """Name of the tagger in use ('stanza', 'nltk' or 'lexicon')"""
+    return _load_tagger()
@@ -0,0 +1,54 @@
+"""
+Merged SIGML documents for whole sign sequences.
+The avatar used to fetch one SignFiles/<sign>.sigml per sign; a bundle is one
+<sigml> document with every <hns_sign> of the sequence in order, plus the
+offset of each sequence entry's first <hns_sign>, so the player can still tell
+which word it is signing. A few sign files hold several <hns_sign> elements
+("anothertime"), hence offsets rather than positions.
+
+Signs come from the memory-resident SignStore. Whole bundles of recurring
+sequences are kept in an LRU keyed by the signs' ETags, so an edited sign file
+never serves a stale bundle.
+"""
+from utils.gloss_cache import LRUCache
+
+
+class SigmlBundler:
+    """Sign stems -> one merged SIGML document with per-sign offsets."""
+
+    def __init__(self, store, resolve=None, cache_size=256):
+        self.store = store
+        # Maps a requested name to a real file stem, or None
+        self.resolve = resolve or (lambda name: name)
+        self._bundles = LRUCache(max_size=cache_size)
+
+    def bundle(self, names):
+        """{"sigml", "offsets", "missing"} for a sequence of sign names.
+        offsets has one {"name", "sign", "start", "count"} per name found, in
+        order: that name is played as <hns_sign> number start .. start + count - 1
+        of the merged document. Names without a sign file are listed in missing."""
+        found = []
+        missing = []
+        for name in map(str, names):
+            stem = self.resolve(name)
+            sign = self.store.get(stem) if stem else None
+            if sign is None:
+                missing.append(name)
+            else:
+                found.append((name, stem, sign))
+
+        key = tuple((name, stem, sign.etag) for name, stem, sign in found)
+        result = self._bundles.get(key)
+        if result is None:
+            parts = []
+            offsets = []
+            for name, stem, sign in found:
+                offsets.append({"name": name, "sign": stem, "start": len(parts), "count": len(sign.elements)})
+                parts.extend(sign.elements)
+            sigml = '<sigml>' + ''.join(parts) + '</sigml>'
+            result = {"sigml": sigml, "offsets": offsets, "signs": len(parts)}
+            self._bundles.set(key, result)
+        return dict(result, missing=missing)
+
+    def stats(self):
+        return self._bundles.stats()
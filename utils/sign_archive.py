@@ -0,0 +1,101 @@
+"""
+Single-file archive of the SIGML sign files, read through mmap.
+Layout, little-endian:
+
+    header   magic "SIGNPACK", version u16, 2 pad bytes, entry count u32,
+             table offset u64, table length u64
+    table    one entry per sign, sorted by name:
+             payload offset u64, payload length u32, sha256 (32 bytes),
+             name length u16, name (UTF-8, without ".sigml")
+    payloads the (minified) sign files, concatenated
+
+Opening an archive reads the header and table only; a payload is a memoryview
+slice of the mapping, so serving it copies nothing. build_sign_archive.py
+writes and verifies archives.
+"""
+import hashlib
+import mmap
+import os
+import struct
+
+MAGIC = b'SIGNPACK'
+VERSION = 1
+HEADER = struct.Struct('<8sH2xIQQ')
+ENTRY = struct.Struct('<QI32sH')
+
+
+class ArchiveError(Exception):
+    pass
+
+
+def write_archive(path, files):
+    """Write {name: bytes} as an archive, atomically. Returns the number of signs."""
+    names = sorted(files, key=lambda n: n.encode('utf-8'))
+    encoded = [name.encode('utf-8') for name in names]
+    table_length = sum(ENTRY.size + len(e) for e in encoded)
+    offset = HEADER.size + table_length
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(names), HEADER.size, table_length))
+        for name, name_bytes in zip(names, encoded):
+            data = files[name]
+            f.write(ENTRY.pack(offset, len(data), hashlib.sha256(data).digest(), len(name_bytes)))
+            f.write(name_bytes)
+            offset += len(data)
+        for name in names:
+            f.write(files[name])
+    os.replace(tmp, path)
+    return len(names)
+
+
+class SignArchive:
+    """Read-only view of a sign archive: name -> zero-copy payload."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.mtime_ns = os.fstat(f.fileno()).st_mtime_ns
+            self.size = os.fstat(f.fileno()).st_size
+            if self.size < HEADER.size:
+                raise ArchiveError(f"{path} is too short to be a sign archive")
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count, table_offset, table_length = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ArchiveError(f"{path} is not a version {VERSION} sign archive")
+        if table_offset + table_length > self.size:
+            raise ArchiveError(f"{path} is truncated")
+
+        self._view = memoryview(self._map)
+        self._entries = {}
+        pos = table_offset
+        for _ in range(count):
+            offset, length, digest, name_len = ENTRY.unpack_from(self._map, pos)
+            pos += ENTRY.size
+            name = bytes(self._map[pos:pos + name_len]).decode('utf-8')
+            pos += name_len
+            if offset + length > self.size:
+                raise ArchiveError(f"{path}: payload of {name} runs past the end of the file")
+            self._entries[name] = (offset, length, digest)
+        self.names = sorted(self._entries)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, name):
+        return name in self._entries
+
+    def get(self, name):
+        """Payload as a memoryview into the mapping, or None"""
+        entry = self._entries.get(name)
+        if entry is None:
+            return None
+        offset, length, _ = entry
+        return self._view[offset:offset + length]
+
+    def digest(self, name):
+        return self._entries[name][2]
+
+    def verify(self):
+        """Names whose payload no longer matches its sha256"""
+        return [name for name, (offset, length, digest) in sorted(self._entries.items())
+                if hashlib.sha256(self._view[offset:offset + length]).digest() != digest]
@@ -0,0 +1,131 @@
+"""
+In-memory index of available SIGML sign files.
+Joins the vocabulary, the SignFiles directory listing and the synonym map into
+one token -> file stem map, so matching is dictionary lookups instead of a
+stat() per candidate word. Tokens are looked up case-insensitively and resolve
+to the file's real stem (the letter files are upper case, e.g. "A.sigml").
+Inflected forms ("RUNNING", "WENT") map to their base token through the
+surface-form table from utils/inflections.py.
+The directory mtime is checked at most every `check_interval` seconds and only
+the added or removed files are re-resolved. With `list_files`, names come
+from that callable instead of a directory listing, and `sign_dir` may be the
+packed sign archive whose mtime is watched.
+"""
+import os
+import threading
+import time
+
+SIGML_EXT = '.sigml'
+
+
+class SignIndex:
+    """token -> SIGML file stem, built from vocabulary, directory and synonyms."""
+
+    def __init__(self, sign_dir, valid_words, synonyms, inflections=None, check_interval=2.0,
+                 list_files=None):
+        self.sign_dir = sign_dir
+        self.list_files = list_files or (lambda: os.listdir(self.sign_dir))
+        self.valid_words = valid_words
+        self.inflections = inflections or {}
+        self.check_interval = check_interval
+        # Only upper-case synonym keys can match (lookups use word.upper())
+        self.synonyms = {k.lower(): v.lower() for k, v in synonyms.items() if k == k.upper()}
+        self._synonyms_to = {}
+        for source, target in self.synonyms.items():
+            self._synonyms_to.setdefault(target, set()).add(source)
+
+        self._lock = threading.Lock()
+        self._files = {}      # lower-case stem -> real stem, for every file on disk
+        self._resolved = {}   # lower-case token -> real stem (direct vocab or synonym)
+        self._mtime = None
+        self._checked_at = 0.0
+        self.refreshes = 0
+        self.refresh(force=True)
+
+    def _scan(self):
+        files = {}
+        for name in self.list_files():
+            if not name.endswith(SIGML_EXT):
+                continue
+            stem = name[:-len(SIGML_EXT)]
+            key = stem.lower()
+            # Prefer an exact lower-case file when both spellings exist
+            if key not in files or stem == key:
+                files[key] = stem
+        return files
+
+    def _resolve(self, token, files):
+        """Original rule: the word itself if it is vocabulary with a file,
+        otherwise its synonym if that is vocabulary with a file."""
+        if token in self.valid_words and token in files:
+            return files[token]
+        syn = self.synonyms.get(token)
+        if syn and syn in self.valid_words and syn in files:
+            return files[syn]
+        return None
+
+    def refresh(self, force=False):
+        """Re-read the directory if its mtime changed. Returns True if it did."""
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.check_interval:
+            return False
+        with self._lock:
+            self._checked_at = now
+            try:
+                mtime = os.stat(self.sign_dir).st_mtime_ns
+            except OSError as e:
+                print(f"[SIGNS ERROR] Cannot stat {self.sign_dir}: {e}")
+                return False
+            if not force and mtime == self._mtime:
+                return False
+
+            files = self._scan()
+            if self._mtime is None or force:
+                candidates = set(self.valid_words) | set(self.synonyms)
+                resolved = {}
+            else:
+                changed = set(files) ^ set(self._files)
+                changed |= {k for k in files if files[k] != self._files.get(k)}
+                candidates = set(changed)
+                for key in changed:
+                    candidates |= self._synonyms_to.get(key, set())
+                resolved = dict(self._resolved)
+                if changed:
+                    print(f"[SIGNS] {len(changed)} sign files changed, re-resolving {len(candidates)} tokens")
+
+            for token in candidates:
+                stem = self._resolve(token, files)
+                if stem is None:
+                    resolved.pop(token, None)
+                else:
+                    resolved[token] = stem
+
+            # Swap whole dicts so readers never see a half-built index
+            self._files = files
+            self._resolved = resolved
+            self._mtime = mtime
+            self.refreshes += 1
+            return True
+
+    def lookup(self, word):
+        """Sign file stem for a vocabulary word, synonym or an inflection of either, or None"""
+        token = word.lower()
+        stem = self._resolved.get(token)
+        if stem is None and token in self.inflections:
+            stem = self._resolved.get(self.inflections[token])
+        return stem
+
+    def file_for(self, name):
+        """Stem of any sign file with this name (case-insensitive), e.g. letters and digits"""
+        return self._files.get(name.lower())
+
+    def stems(self):
+        return sorted(self._files.values())
+
+    def stats(self):
+        return {
+            "files": len(self._files),
+            "resolved_tokens": len(self._resolved),
+            "inflected_forms": len(self.inflections),
+            "refreshes": self.refreshes,
+        }
@@ -0,0 +1,208 @@
+"""
+Memory-resident store of the SIGML sign files.
+Every file in SignFiles is loaded once, minified and kept as immutable bytes
+with a precomputed ETag, so serving a sign or building a bundle never touches
+the disk. Minifying keeps the meaning of the document:
+- whitespace between tags is dropped (SIGML has no mixed text content);
+- <x></x> becomes <x/>;
+- empty <hamnosys_nonmanual> blocks are dropped, since they mean the same as
+  no block.
+
+With a packed archive (build_sign_archive.py) the store maps that one file
+instead: payloads are already minified and hashed, so startup reads only the
+archive's table and each sign body is a zero-copy slice of the mapping.
+
+The source is rechecked at most every `check_interval` seconds. Changed
+files, or a rebuilt archive, are loaded into a new table that replaces the
+old one in a single assignment, so readers see either the old set or the new
+one, never a mix.
+"""
+import gzip
+import hashlib
+import os
+import re
+import threading
+import time
+
+from utils.sign_archive import ArchiveError, SignArchive
+from utils.sign_index import SIGML_EXT
+
+HNS_SIGN_RE = re.compile(r'<hns_sign\b.*?</hns_sign>', re.DOTALL)
+BETWEEN_TAGS_RE = re.compile(r'>\s+<')
+EMPTY_PAIR_RE = re.compile(r'<([\w:.-]+)((?:\s[^<>]*?)?)\s*></\1>')
+# Optional blocks that carry nothing when empty
+EMPTY_OPTIONAL_RE = re.compile(r'<hamnosys_nonmanual\s*/>')
+MIN_GZIP_SAVING = 0.05
+
+
+def minify(text):
+    text = BETWEEN_TAGS_RE.sub('><', text.strip())
+    text = EMPTY_PAIR_RE.sub(r'<\1\2/>', text)
+    return EMPTY_OPTIONAL_RE.sub('', text)
+
+
+def minify_file(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return minify(f.read()).encode('utf-8')
+
+
+def archive_is_current(archive_path, sign_dir):
+    """True if the archive exists and nothing in sign_dir is newer than it"""
+    try:
+        built = os.stat(archive_path).st_mtime_ns
+    except OSError:
+        return False
+    try:
+        if os.stat(sign_dir).st_mtime_ns > built:
+            return False
+        return all(e.stat().st_mtime_ns <= built for e in os.scandir(sign_dir) if e.name.endswith(SIGML_EXT))
+    except OSError:
+        # No directory to compare against: the archive is all there is
+        return True
+
+
+class Sign:
+    """One minified sign. The gzip body and <hns_sign> elements are derived on first use."""
+    __slots__ = ('body', 'etag', 'mtime_ns', 'size', '_gzip', '_elements')
+
+    def __init__(self, body, etag, mtime_ns=None, size=None):
+        self.body = body
+        self.etag = etag
+        self.mtime_ns = mtime_ns
+        self.size = size if size is not None else len(body)
+        self._gzip = None
+        self._elements = None
+
+    @classmethod
+    def from_bytes(cls, body, mtime_ns=None, size=None):
+        return cls(body, hashlib.sha256(body).hexdigest()[:16], mtime_ns, size)
+
+    @property
+    def gzip(self):
+        """Compressed body, or None when gzip does not pay off"""
+        if self._gzip is None:
+            packed = gzip.compress(self.body, compresslevel=9, mtime=0)
+            self._gzip = packed if len(packed) <= len(self.body) * (1 - MIN_GZIP_SAVING) else b''
+        return self._gzip or None
+
+    @property
+    def elements(self):
+        if self._elements is None:
+            self._elements = tuple(HNS_SIGN_RE.findall(bytes(self.body).decode('utf-8')))
+        return self._elements
+
+
+class SignStore:
+    """file stem -> Sign for every SIGML file, loaded once and reloaded on change."""
+
+    def __init__(self, sign_dir, archive_path=None, check_interval=2.0):
+        self.sign_dir = sign_dir
+        self.archive_path = archive_path
+        self.check_interval = check_interval
+        self.archive = None
+        self._signs = {}
+        self._lock = threading.Lock()
+        self._checked_at = 0.0
+        self.reloads = 0
+        self.files_loaded = 0
+        self.refresh(force=True)
+
+    def _load(self, stem, mtime_ns, size):
+        path = os.path.join(self.sign_dir, stem + SIGML_EXT)
+        try:
+            return Sign.from_bytes(minify_file(path), mtime_ns, size)
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"[SIGNSTORE ERROR] Cannot read {path}: {e}")
+            return None
+
+    def refresh(self, force=False):
+        """Reload added, edited and removed files. Returns True if anything changed."""
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.check_interval:
+            return False
+        with self._lock:
+            self._checked_at = now
+            if self.archive_path:
+                return self._refresh_archive()
+            return self._refresh_directory()
+
+    def _refresh_archive(self):
+        try:
+            mtime = os.stat(self.archive_path).st_mtime_ns
+        except OSError as e:
+            print(f"[SIGNSTORE ERROR] Cannot stat {self.archive_path}: {e}")
+            return False
+        if self.archive is not None and mtime == self.archive.mtime_ns:
+            return False
+        try:
+            archive = SignArchive(self.archive_path)
+        except (OSError, ArchiveError) as e:
+            print(f"[SIGNSTORE ERROR] Cannot open {self.archive_path}: {e}")
+            return False
+        # The old mapping stays alive for as long as a response still holds a slice of it
+        self._signs = {name: Sign(archive.get(name), archive.digest(name).hex()[:16], mtime)
+                       for name in archive.names}
+        self.archive = archive
+        self.files_loaded += len(archive)
+        self.reloads += 1
+        if self.reloads > 1:
+            print(f"[SIGNSTORE] Reopened {self.archive_path}: {len(archive)} signs")
+        return True
+
+    def _refresh_directory(self):
+        try:
+            entries = [e for e in os.scandir(self.sign_dir) if e.name.endswith(SIGML_EXT)]
+        except OSError as e:
+            print(f"[SIGNSTORE ERROR] Cannot list {self.sign_dir}: {e}")
+            return False
+
+        current = self._signs
+        signs = {}
+        loaded = 0
+        for entry in entries:
+            stem = entry.name[:-len(SIGML_EXT)]
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            sign = current.get(stem)
+            if sign is None or sign.mtime_ns != st.st_mtime_ns or sign.size != st.st_size:
+                sign = self._load(stem, st.st_mtime_ns, st.st_size)
+                loaded += 1
+            if sign is not None:
+                signs[stem] = sign
+
+        if not loaded and len(signs) == len(current):
+            return False
+        if current:
+            print(f"[SIGNSTORE] Reloaded {loaded} changed sign files, {len(signs)} in store")
+        self._signs = signs
+        self.files_loaded += loaded
+        self.reloads += 1
+        return True
+
+    def get(self, stem):
+        """Sign for an exact file stem, or None"""
+        return self._signs.get(stem)
+
+    def file_names(self):
+        """Sign file names in the store, as a directory listing would give them"""
+        self.refresh(force=True)
+        return [stem + SIGML_EXT for stem in self._signs]
+
+    def stats(self):
+        signs = list(self._signs.values())
+        body = sum(len(s.body) for s in signs)
+        packed = sum(len(s._gzip) for s in signs if s._gzip)
+        elements = sum(len(e) for s in signs if s._elements for e in s._elements)
+        return {
+            "source": "archive" if self.archive_path else "directory",
+            "files": len(signs),
+            "disk_bytes": self.archive.size if self.archive else sum(s.size for s in signs),
+            "minified_bytes": body,
+            "gzip_bytes": packed,
+            # Archive bodies live in the page cache, not the heap
+            "footprint_bytes": (0 if self.archive else body) + packed + elements,
+            "reloads": self.reloads,
+            "files_loaded": self.files_loaded,
+        }
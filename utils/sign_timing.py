@@ -0,0 +1,185 @@
+"""
+Sign durations estimated from HamNoSys, and playback timelines built from them.
+Each <hns_sign> of a sign file is read as its <hamnosys_manual> symbol sequence
+and reduced to a small feature record. Its duration is a fixed cost for
+reaching the start posture plus the time of its movements:
+- every movement symbol (hammove*, hamcircle*, hamswinging, ...) has a base
+  time; hamsmallmod/hamlargemod/hamfast/hamslow scale the movement before it;
+- hamparbegin ... hamplus ... hamparend runs its branches at the same time, so
+  the block takes as long as its longest branch;
+- hamrepeatfromstart repeats all movement so far, hamrepeatcontinue the last
+  movement; the "several" forms count as two more repetitions.
+
+The costs are estimates of the avatar's timing at speed 1, not measurements;
+the player still waits for the avatar to go idle and uses a sign's estimate to
+time its frame capture and to bound the wait.
+"""
+import re
+
+from utils.gloss_cache import LRUCache
+from utils.sign_index import SIGML_EXT
+
+HNS_SIGN_RE = re.compile(rb'<hns_sign\b.*?</hns_sign>', re.DOTALL)
+MANUAL_RE = re.compile(rb'<hamnosys_manual>(.*?)</hamnosys_manual>', re.DOTALL)
+SYMBOL_RE = re.compile(rb'<(ham\w+)')
+
+# Milliseconds at speed 1
+POSTURE_MS = 500
+SIGN_GAP_MS = 150
+MOVE_MS = 300
+MOVEMENT_MS = {
+    'hamcircle': 500, 'hamclock': 500,
+    'hamswinging': 400, 'hamtwisting': 400, 'hamnodding': 400, 'hamstircw': 500, 'hamstirccw': 500,
+    'hamwavy': 400, 'hamzigzag': 400, 'hamfingerplay': 400, 'hambrushing': 300,
+    'hamreplace': 250,
+}
+# Scale the movement just before them
+MODIFIERS = {'hamsmallmod': 0.7, 'hamlargemod': 1.4, 'hamfast': 0.6, 'hamslow': 1.5, 'hamarcu': 1.2,
+             'hamarcd': 1.2, 'hamarcl': 1.2, 'hamarcr': 1.2}
+# Extra repetitions: (of everything so far?, count)
+REPEATS = {
+    'hamrepeatfromstart': (True, 1), 'hamrepeatfromstartseveral': (True, 2),
+    'hamrepeatreverse': (True, 1),
+    'hamrepeatcontinue': (False, 1), 'hamrepeatcontinueseveral': (False, 2),
+}
+TWO_HANDED = ('hamsymmpar', 'hamsymmlr')
+
+
+def movement_ms(symbol):
+    """Base time of a movement symbol, or None if it is not one"""
+    if symbol.startswith('hammove'):
+        return MOVE_MS
+    for prefix, ms in MOVEMENT_MS.items():
+        if symbol.startswith(prefix):
+            return ms
+    return None
+
+
+def manual_duration(symbols):
+    """(movement ms, movement count, repeat count) of one <hamnosys_manual> symbol sequence"""
+    # One frame per open hamparbegin: [branch totals], last movement
+    stack = [[[0.0], 0.0]]
+    movements = repeats = 0
+    for symbol in symbols:
+        frame = stack[-1]
+        branches = frame[0]
+        if symbol == 'hamparbegin':
+            stack.append([[0.0], 0.0])
+        elif symbol == 'hamplus' and len(stack) > 1:
+            branches.append(0.0)
+            frame[1] = 0.0
+        elif symbol == 'hamparend' and len(stack) > 1:
+            stack.pop()
+            block = max(branches)
+            stack[-1][0][-1] += block
+            stack[-1][1] = block
+        elif symbol in MODIFIERS:
+            extra = frame[1] * (MODIFIERS[symbol] - 1)
+            branches[-1] += extra
+            frame[1] += extra
+        elif symbol in REPEATS:
+            from_start, count = REPEATS[symbol]
+            repeats += 1
+            branches[-1] += (branches[-1] if from_start else frame[1]) * count
+        else:
+            ms = movement_ms(symbol)
+            if ms is not None:
+                movements += 1
+                branches[-1] += ms
+                frame[1] = ms
+    # Unclosed blocks (malformed files) still count
+    while len(stack) > 1:
+        block = max(stack.pop()[0])
+        stack[-1][0][-1] += block
+    return stack[0][0][-1], movements, repeats
+
+
+class SignTiming:
+    """Features and estimated duration of one sign file."""
+    __slots__ = ('elements', 'symbols', 'movements', 'repeats', 'two_handed', 'duration_ms')
+
+    def __init__(self, elements, symbols, movements, repeats, two_handed, duration_ms):
+        self.elements = elements
+        self.symbols = symbols
+        self.movements = movements
+        self.repeats = repeats
+        self.two_handed = two_handed
+        self.duration_ms = duration_ms
+
+    @classmethod
+    def from_sigml(cls, body):
+        """Timing of a SIGML document (bytes or memoryview); each <hns_sign> is played in turn"""
+        elements = symbols = movements = repeats = 0
+        two_handed = False
+        duration = 0.0
+        for element in HNS_SIGN_RE.findall(body):
+            manual = MANUAL_RE.search(element)
+            names = [s.decode('ascii') for s in SYMBOL_RE.findall(manual.group(1))] if manual else []
+            moving, moves, reps = manual_duration(names)
+            elements += 1
+            symbols += len(names)
+            movements += moves
+            repeats += reps
+            two_handed = two_handed or any(n in TWO_HANDED for n in names)
+            duration += POSTURE_MS + moving
+        # Signs with several <hns_sign> elements pause between them like separate signs
+        duration += SIGN_GAP_MS * max(0, elements - 1)
+        return cls(elements, symbols, movements, repeats, two_handed, int(round(duration)))
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class SignTimings:
+    """file stem -> SignTiming for every sign in a SignStore, kept in step with its ETags."""
+
+    def __init__(self, store, default_ms=POSTURE_MS + MOVE_MS, gap_ms=SIGN_GAP_MS):
+        self.store = store
+        self.default_ms = default_ms
+        self.gap_ms = gap_ms
+        # (stem, etag) -> SignTiming; large enough for every sign and one edit of each
+        self._timings = LRUCache(max_size=4096)
+        self.parsed = 0
+
+    def preload(self):
+        """Parse every sign in the store. Returns the number of signs."""
+        names = [name[:-len(SIGML_EXT)] for name in self.store.file_names()]
+        for stem in names:
+            self.get(stem)
+        return len(names)
+
+    def get(self, stem):
+        """SignTiming for a file stem, or None if there is no such sign"""
+        sign = self.store.get(stem)
+        if sign is None:
+            return None
+        key = (stem, sign.etag)
+        timing = self._timings.get(key)
+        if timing is None:
+            timing = SignTiming.from_sigml(sign.body)
+            self._timings.set(key, timing)
+            self.parsed += 1
+        return timing
+
+    def duration(self, stem):
+        timing = self.get(stem)
+        return timing.duration_ms if timing else self.default_ms
+
+    def timeline(self, stems):
+        """{"gap", "starts", "durations", "total"} in ms at speed 1, one entry per
+        sign in sequence order; each sign starts gap ms after the previous one ends"""
+        return self.timeline_from([self.duration(stem) for stem in stems])
+
+    def timeline_from(self, durations):
+        """timeline() for sign durations that were already looked up"""
+        starts = []
+        clock = 0
+        for duration in durations:
+            if starts:
+                clock += self.gap_ms
+            starts.append(clock)
+            clock += duration
+        return {"gap": self.gap_ms, "starts": starts, "durations": list(durations), "total": clock}
+
+    def stats(self):
+        return {"parsed": self.parsed, "cached": self._timings.stats()}
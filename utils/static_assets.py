@@ -0,0 +1,124 @@
+"""
+Precompressed, fingerprinted static files.
+build_static_assets.py writes a gzip copy (and a brotli copy when the brotli
+package is installed) of every compressible file under static/, plus a
+manifest of content hashes. StaticAssets picks the smallest variant a client
+accepts and names it with a strong ETag. The content hash also fingerprints
+URLs (/js/script.js?v=<hash>), so those can be cached as immutable.
+
+A file edited after the build no longer matches its manifest entry and is
+served as is, uncompressed and revalidated, until the next build.
+"""
+import hashlib
+import json
+import os
+import posixpath
+import threading
+
+MANIFEST_NAME = 'manifest.json'
+# Best first; a variant is only used if the client accepts it
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+COMPRESSIBLE = {'.sigml', '.html', '.htm', '.js', '.css', '.json', '.xml', '.xsl', '.txt',
+                '.properties', '.jnlp', '.svg', '.vert', '.frag', '.java', '.command'}
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def normalize_path(path):
+    """Manifest key for a request path: posix, relative, no '.' segments"""
+    path = posixpath.normpath(path.replace('\\', '/')).lstrip('/')
+    return None if path.startswith('..') or path == '.' else path
+
+
+def accepted_encodings(header):
+    """Content codings an Accept-Encoding header allows (q > 0)"""
+    accepted = set()
+    for part in (header or '').split(','):
+        name, _, params = part.strip().partition(';')
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if name and q > 0:
+            accepted.add(name.strip().lower())
+    if '*' in accepted:
+        accepted.update(enc for enc, _ in ENCODINGS)
+    return accepted
+
+
+class StaticAssets:
+    """Manifest-backed lookup of the best encoded variant of a static file."""
+
+    def __init__(self, static_dir, build_dir):
+        self.static_dir = static_dir
+        self.build_dir = build_dir
+        self.manifest_path = os.path.join(build_dir, MANIFEST_NAME)
+        self.files = {}
+        self._lock = threading.Lock()
+        self.served = {}
+        self.stale = 0
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.manifest_path):
+            print(f"[STATIC] No {self.manifest_path}; run build_static_assets.py for compressed assets")
+            return
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                self.files = json.load(f).get("files", {})
+        except (OSError, ValueError) as e:
+            print(f"[STATIC ERROR] Ignoring unreadable {self.manifest_path}: {e}")
+            return
+        print(f"[STATIC] Manifest: {len(self.files)} files, "
+              f"{sum(1 for e in self.files.values() if e.get('gzip'))} precompressed")
+
+    def version(self, path):
+        """Content hash of a static file for URL fingerprinting, or None"""
+        key = normalize_path(path)
+        entry = self.files.get(key) if key else None
+        return entry["hash"] if entry else None
+
+    def select(self, path, accept_encoding=''):
+        """(file path, content coding or None, strong ETag, content hash) for the
+        smallest acceptable variant, or None if the file is not in the manifest
+        or changed since the build"""
+        key = normalize_path(path)
+        entry = self.files.get(key) if key else None
+        if entry is None:
+            return None
+        source = os.path.join(self.static_dir, *key.split('/'))
+        try:
+            st = os.stat(source)
+        except OSError:
+            return None
+        if st.st_size != entry["size"] or st.st_mtime_ns != entry["mtime_ns"]:
+            with self._lock:
+                self.stale += 1
+            return None
+
+        accepted = accepted_encodings(accept_encoding)
+        selected = (source, None, entry["hash"], entry["hash"])
+        for encoding, suffix in ENCODINGS:
+            if encoding in accepted and entry.get(encoding):
+                variant = os.path.join(self.build_dir, *key.split('/')) + suffix
+                selected = (variant, encoding, f"{entry['hash']}-{encoding}", entry["hash"])
+                break
+        with self._lock:
+            name = selected[1] or 'identity'
+            self.served[name] = self.served.get(name, 0) + 1
+        return selected
+
+    def stats(self):
+        return {
+            "files": len(self.files),
+            "bytes": sum(e["size"] for e in self.files.values()),
+            "gzip_bytes": sum(e.get("gzip") or e["size"] for e in self.files.values()),
+            "br_bytes": sum(e.get("br") or e.get("gzip") or e["size"] for e in self.files.values()),
+            "served": dict(self.served),
+            "stale": self.stale,
+        }